@@ -14,18 +14,52 @@ package.path  = package.path..";.\\LuaSocket\\?.lua;"
 package.cpath = package.cpath..";.\\LuaSocket\\?.dll;"
 local socket 	= require("socket")
 
+local utils 	= require("DCSServerBotUtils")
+
 local dcsbotgui = {}
 
+-- frame scheduler, keeps the time the bot needs per frame within the configured budget
+local scheduler = {
+	budget = config.LUA_FRAME_BUDGET / 1000,
+	send_interval = config.LUA_SEND_INTERVAL,
+	stats_interval = 60,
+	last_send = 0,
+	frames = 0,
+	busy = 0,
+	max_busy = 0
+}
+
+function scheduler.report(now)
+	if scheduler.stats_start == nil then
+		scheduler.stats_start = now
+	elseif now - scheduler.stats_start >= scheduler.stats_interval then
+		local msg = {}
+		msg.command = 'perfmon'
+		msg.fps = scheduler.frames / (now - scheduler.stats_start)
+		msg.frame_time_avg = scheduler.busy / scheduler.frames * 1000
+		msg.frame_time_max = scheduler.max_busy * 1000
+		utils.sendBotTable(msg)
+		scheduler.stats_start = now
+		scheduler.frames = 0
+		scheduler.busy = 0
+		scheduler.max_busy = 0
+	end
+end
+
 function dcsbotgui.onSimulationFrame()
+	local start = socket.gettime()
 	-- general idea from HypeMan
 	if not dcsbotgui.UDPRecvSocket then
 		local host, port = config.DCS_HOST, config.DCS_PORT
 		local ip = socket.dns.toip(host)
 		dcsbotgui.UDPRecvSocket = socket.udp()
 		dcsbotgui.UDPRecvSocket:setsockname(ip, port)
-		dcsbotgui.UDPRecvSocket:settimeout(0.0001)
+		dcsbotgui.UDPRecvSocket:settimeout(0)
 	end
+	-- messages to the bot are queued while the simulation runs and sent in batches
+	utils.batching = true
 
+	-- anything that doesn't fit into the budget stays in the socket buffer until the next frame
 	local msg, err
 	repeat
 		msg, err = dcsbotgui.UDPRecvSocket:receive()
@@ -35,7 +69,30 @@ function dcsbotgui.onSimulationFrame()
 				dcsbot[json.command](json)
 			end
 		end
-	until err
+	until err or socket.gettime() - start >= scheduler.budget
+
+	if start - scheduler.last_send >= scheduler.send_interval then
+		utils.flush()
+		scheduler.last_send = start
+	end
+
+	local busy = socket.gettime() - start
+	scheduler.frames = scheduler.frames + 1
+	scheduler.busy = scheduler.busy + busy
+	if busy > scheduler.max_busy then
+		scheduler.max_busy = busy
+	end
+	scheduler.report(start)
+end
+
+function dcsbotgui.onSimulationStop()
+	-- no more frames will come, so everything is sent immediately from now on
+	utils.batching = false
+	utils.flush()
+	scheduler.stats_start = nil
+	scheduler.frames = 0
+	scheduler.busy = 0
+	scheduler.max_busy = 0
 end
 
 local function loadPlugin(plugin)
@@ -12,6 +12,7 @@ local table         = base.table
 local tonumber		= base.tonumber
 local DCS			= base.DCS
 local type			= base.type
+local ipairs		= base.ipairs
 
 local lfs			= require('lfs')
 local TableUtils 	= require('TableUtils')
@@ -27,6 +28,29 @@ local socket = require("socket")
 UDPSendSocket = socket.udp()
 
 local server_name
+-- set by the frame scheduler in DCSServerBotMain.lua
+batching = false
+local sendQueue = {}
+local MAX_BATCH_SIZE = 16384
+
+function flush()
+	-- queued messages are sent as JSON arrays, as long as they fit into one datagram
+	local batch = {}
+	local size = 0
+	for _, msg in ipairs(sendQueue) do
+		if #batch > 0 and size + #msg > MAX_BATCH_SIZE then
+			socket.try(UDPSendSocket:sendto('[' .. table.concat(batch, ',') .. ']', config.BOT_HOST, config.BOT_PORT))
+			batch = {}
+			size = 0
+		end
+		table.insert(batch, msg)
+		size = size + #msg + 1
+	end
+	if #batch > 0 then
+		socket.try(UDPSendSocket:sendto('[' .. table.concat(batch, ',') .. ']', config.BOT_HOST, config.BOT_PORT))
+	end
+	sendQueue = {}
+end
 
 function sendBotTable(tbl, channel)
 	if server_name == nil then
@@ -35,7 +59,12 @@ function sendBotTable(tbl, channel)
 	tbl.server_name = server_name
 	tbl.channel = channel or "-1"
 	local tbl_json_txt = JSON:encode(tbl)
-	socket.try(UDPSendSocket:sendto(tbl_json_txt, config.BOT_HOST, config.BOT_PORT))
+	if batching then
+		table.insert(sendQueue, tbl_json_txt)
+	else
+		flush()
+		socket.try(UDPSendSocket:sendto(tbl_json_txt, config.BOT_HOST, config.BOT_PORT))
+	end
 end
 
 function loadSettingsRaw()
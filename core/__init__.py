@@ -10,7 +10,13 @@ from .bot import *
 from .const import *
 from .extension import *
 from .listener import *
+from .loader import *
 from .mizfile import *
+from .monitor import *
 from .plugin import *
+from .process import *
+from .retention import *
+from .sessions import *
+from .transport import *
 from .utils import *
 from .report import *
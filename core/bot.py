@@ -4,18 +4,23 @@ import json
 import platform
 import psycopg2
 import re
-import socket
-import string
 from concurrent.futures import ThreadPoolExecutor
 from contextlib import closing
-from copy import deepcopy
 from core import utils, Server, Status, Channel, DataObjectFactory, Player
 from datetime import datetime
 from discord.ext import commands
-from queue import Queue
-from socketserver import BaseRequestHandler, ThreadingUDPServer
+from psutil import Process
+from socketserver import BaseRequestHandler, UDPServer
 from typing import Callable, Optional, Tuple, Union
+from .chat import ChatRelay
+from .dispatcher import EventDispatcher
 from .listener import EventListener
+from .loader import PluginLoader
+from .monitor import LoopMonitor
+from .process import DCS_EXECUTABLES, ProcessRegistry
+from .retention import RetentionService
+from .sessions import SessionCache
+from .transport import UDPTransport
 
 
 class DCSServerBot(commands.Bot):
@@ -29,7 +34,11 @@ class DCSServerBot(commands.Bot):
         self.eventListeners: list[EventListener] = []
         self.external_ip: Optional[str] = None
         self.udp_server = None
+        self.transport: Optional[UDPTransport] = None
+        self.dispatcher: Optional[EventDispatcher] = None
         self.servers: dict[str, Server] = dict()
+        # channel id => servers and the channel type they use that channel for
+        self.routes: dict[int, list[Tuple[Server, Channel]]] = dict()
         self.pool = kwargs['pool']
         self.log = kwargs['log']
         self.config = kwargs['config']
@@ -39,20 +48,44 @@ class DCSServerBot(commands.Bot):
         if 'OPT_PLUGINS' in self.config['BOT']:
             plugins += ', ' + self.config['BOT']['OPT_PLUGINS']
         self.plugins: list[str] = [p.strip() for p in plugins.split(',')]
+        self.plugin_versions: dict[str, str] = dict()
         self.audit_channel = None
         self.mission_stats = None
         self.synced: bool = False
         self.tree.on_error = self.on_app_command_error
         self.executor = ThreadPoolExecutor(thread_name_prefix='BotExecutor')
+        self.tree.interaction_check = self.on_app_command_invoke
+        self.chat = ChatRelay(self)
+        self.retention = RetentionService(self)
+        self.processes = ProcessRegistry(self)
+        self.sessions = SessionCache(self)
+        self.monitor = LoopMonitor(self, threshold=float(self.config['BOT']['LOOP_MONITORING_THRESHOLD']),
+                                   history=int(self.config['BOT']['LOOP_MONITORING_HISTORY']))
 
     async def close(self):
         await self.audit(message="DCSServerBot stopped.")
+        await self.chat.close()
+        await self.retention.close()
+        await self.sessions.close()
         await super().close()
         self.log.debug('Shutting down...')
+        if self.monitor.is_alive():
+            self.monitor.stop()
+            self.log.debug('- Loop monitor stopped.')
+        if self.processes.is_alive():
+            self.processes.stop()
+            self.log.debug('- Process registry stopped.')
         if self.udp_server:
             self.udp_server.shutdown()
             self.udp_server.server_close()
         self.log.debug('- Listener stopped.')
+        if self.dispatcher:
+            self.dispatcher.stop()
+        self.log.debug('- Dispatcher stopped.')
+        for server in self.servers.values():
+            server.transport.close()
+        if self.transport:
+            self.transport.close()
         self.executor.shutdown(wait=True)
         self.log.debug('- Executor stopped.')
         self.log.info('Shutdown complete.')
@@ -67,6 +100,7 @@ class DCSServerBot(commands.Bot):
                     Server.__name__, bot=self, name=server_name, installation=installation,
                     host=self.config[installation]['DCS_HOST'], port=self.config[installation]['DCS_PORT'])
                 self.servers[server_name] = server
+                self.add_routes(server)
                 # TODO: can be removed if bug in net.load_next_mission() is fixed
                 if 'listLoop' not in server.settings or not server.settings['listLoop']:
                     server.settings['listLoop'] = True
@@ -117,12 +151,45 @@ class DCSServerBot(commands.Bot):
 
     async def reload_plugin(self, plugin: str):
         await self.unload_plugin(plugin)
+        await PluginLoader(self).prepare([plugin])
         await self.load_plugin(plugin)
 
+    def _process_exited(self, key: str, process: Process) -> None:
+        for server in self.servers.values():
+            if server.installation != key or server.process is not process:
+                continue
+            self.log.debug(f'  => DCS server "{server.name}" exited (PID {process.pid}).')
+            server.process = None
+            # running servers are left to the hung server detection
+            if server.status in [Status.LOADING, Status.STOPPED]:
+                server.status = Status.SHUTDOWN
+
     async def start(self, token: str, *, reconnect: bool = True) -> None:
         self.init_servers()
+        # find the DCS servers that are already running once, they are tracked by their PID afterwards
+        await asyncio.get_running_loop().run_in_executor(self.executor, self.processes.discover, {
+            server.installation: (DCS_EXECUTABLES, server.installation) for server in self.servers.values()
+        })
+        for server in self.servers.values():
+            server.process = self.processes.get(server.installation)
+        self.processes.add_listener(self._process_exited)
+        self.processes.start()
+        if self.config.getboolean('BOT', 'LOOP_MONITORING'):
+            self.monitor.start()
         await super().start(token, reconnect=reconnect)
 
+    async def invoke(self, ctx: commands.Context) -> None:
+        if ctx.command:
+            plugin = getattr(ctx.cog, 'plugin_name', 'core')
+            self.monitor.label(f'{plugin}:{ctx.prefix}{ctx.command.qualified_name}')
+        await super().invoke(ctx)
+
+    async def on_app_command_invoke(self, interaction: discord.Interaction) -> bool:
+        if interaction.command:
+            plugin = getattr(getattr(interaction.command, 'binding', None), 'plugin_name', 'core')
+            self.monitor.label(f'{plugin}:/{interaction.command.qualified_name}')
+        return True
+
     def check_roles(self, roles: list, server: Optional[Server] = None):
         for role in roles:
             config_roles = [x.strip() for x in self.config['ROLES' if not server else server.installation][role].split(',')]
@@ -195,11 +262,7 @@ class DCSServerBot(commands.Bot):
                         self.check_roles(['Coalition Red', 'Coalition Blue'], server)
                     self.check_channels(server.installation)
                 self.log.info('- Loading Plugins ...')
-                for plugin in self.plugins:
-                    if await self.load_plugin(plugin.lower()):
-                        self.log.info(f'  => {string.capwords(plugin)} loaded.')
-                    else:
-                        self.log.info(f'  => {string.capwords(plugin)} NOT loaded.')
+                await PluginLoader(self).load(self.plugins)
                 if not self.synced:
                     self.log.debug('- Registering Discord Commands ...')
                     self.tree.copy_global_to(guild=self.guilds[0])
@@ -286,14 +349,12 @@ class DCSServerBot(commands.Bot):
 
     def sendtoBot(self, message: dict):
         message['channel'] = '-1'
-        msg = json.dumps(message)
-        self.log.debug('HOST->HOST: {}'.format(msg))
-        dcs_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        host = self.config['BOT']['HOST']
-        if host == '0.0.0.0':
-            host = '127.0.0.1'
-        dcs_socket.sendto(msg.encode('utf-8'), (host, int(self.config['BOT']['PORT'])))
-        dcs_socket.close()
+        if not self.transport:
+            host = self.config['BOT']['HOST']
+            if host == '0.0.0.0':
+                host = '127.0.0.1'
+            self.transport = UDPTransport(self, 'HOST', host, int(self.config['BOT']['PORT']))
+        self.transport.send(message)
 
     def get_channel(self, channel_id: int):
         return super().get_channel(channel_id) if id != -1 else None
@@ -518,11 +579,9 @@ class DCSServerBot(commands.Bot):
                 DataObjectFactory().new(Server.__name__, bot=self, name=data['server_name'],
                                         installation=installation, host=self.config[installation]['DCS_HOST'],
                                         port=self.config[installation]['DCS_PORT'])
+            self.add_routes(server)
         # set the PID
-        for exe in ['DCS_server.exe', 'DCS.exe']:
-            server.process = utils.find_process(exe, server.installation)
-            if server.process:
-                break
+        server.process = self.processes.find(server.installation, DCS_EXECUTABLES, server.installation)
         server.dcs_version = data['dcs_version']
         # update the database and check for server name changes
         conn = self.pool.getconn()
@@ -538,10 +597,12 @@ class DCSServerBot(commands.Bot):
                             server.rename(data['server_name'])
                             if server_name in self.servers:
                                 del self.servers[server_name]
+                            self.dispatcher.remove(server_name)
                         else:
                             self.log.warning(
                                 f"Registration of server \"{data['server_name']}\" aborted due to UDP port conflict.")
                             del self.servers[data['server_name']]
+                            self.dispatcher.remove(data['server_name'])
                             return False
                 cursor.execute('INSERT INTO servers (server_name, agent_host, host, port) VALUES(%s, %s, %s, '
                                '%s) ON CONFLICT (server_name) DO UPDATE SET agent_host=excluded.agent_host, '
@@ -556,94 +617,64 @@ class DCSServerBot(commands.Bot):
         self.log.debug(f"Server {server.name} initialized")
         return True
 
+    def add_routes(self, server: Server) -> None:
+        for channel_id in list(self.routes.keys()):
+            self.routes[channel_id] = [x for x in self.routes[channel_id] if x[0] is not server]
+            if not self.routes[channel_id]:
+                del self.routes[channel_id]
+        for channel in [Channel.ADMIN, Channel.STATUS, Channel.CHAT, Channel.COALITION_BLUE, Channel.COALITION_RED]:
+            channel_id = int(self.config[server.installation][channel.value])
+            if channel_id != -1:
+                self.routes.setdefault(channel_id, []).append((server, channel))
+
+    def update_routes(self) -> None:
+        # has to be called, if the channel configuration has changed
+        self.routes.clear()
+        for server in self.servers.values():
+            self.add_routes(server)
+
+    def get_routes(self, channel_id: int) -> list[Tuple[Server, Channel]]:
+        # servers that were unregistered or renamed in between are not routed anymore
+        return [
+            (server, channel) for server, channel in self.routes.get(channel_id, [])
+            if self.servers.get(server.name) is server
+        ]
+
     async def get_server(self, ctx: Union[commands.Context, discord.Interaction, discord.Message, str]) -> Optional[Server]:
         if self.master and len(self.servers) == 1 and self.master_only:
             return list(self.servers.values())[0]
-        for server_name, server in self.servers.items():
-            if isinstance(ctx, commands.Context) or isinstance(ctx, discord.Interaction) \
-                    or isinstance(ctx, discord.Message):
-                if server.status == Status.UNREGISTERED:
-                    continue
-                channels = [Channel.ADMIN, Channel.STATUS]
-                if int(self.config[server.installation][Channel.CHAT.value]) != -1:
-                    channels.append(Channel.CHAT)
-                if int(self.config[server.installation][Channel.COALITION_BLUE.value]) != -1:
-                    channels.append(Channel.COALITION_BLUE)
-                if int(self.config[server.installation][Channel.COALITION_RED.value]) != -1:
-                    channels.append(Channel.COALITION_RED)
-                for channel in channels:
-                    if server.get_channel(channel).id == ctx.channel.id:
-                        return server
-            else:
-                if server_name == ctx:
+        if isinstance(ctx, commands.Context) or isinstance(ctx, discord.Interaction) \
+                or isinstance(ctx, discord.Message):
+            for server, _ in self.get_routes(ctx.channel.id):
+                if server.status != Status.UNREGISTERED:
                     return server
-        return None
+            return None
+        return self.servers.get(ctx)
 
     async def start_udp_listener(self):
         class RequestHandler(BaseRequestHandler):
 
             def handle(s):
                 data = json.loads(s.request[0].strip())
-                # ignore messages not containing server names
-                if 'server_name' not in data:
-                    self.log.warning('Message without server_name received: {}'.format(data))
-                    return
-                server_name = data['server_name']
-                if server_name not in s.server.message_queue:
-                    s.server.message_queue[server_name] = Queue()
-                    s.server.executor.submit(s.process, server_name)
-                s.server.message_queue[server_name].put(data)
-
-            def process(s, server_name: str):
-                data = s.server.message_queue[server_name].get()
-                while len(data):
-                    try:
-                        self.log.debug('{}->HOST: {}'.format(data['server_name'], json.dumps(data)))
-                        command = data['command']
-                        if command == 'registerDCSServer':
-                            if not self.register_server(data):
-                                self.log.error(f"Error while registering server {server_name}. Exiting worker thread.")
-                                return
-                        elif (data['server_name'] not in self.servers or
-                              self.servers[data['server_name']].status == Status.UNREGISTERED):
-                            self.log.debug(f"Command {command} for unregistered server {data['server_name']} received, "
-                                           f"ignoring.")
-                            continue
-                        if 'channel' in data and data['channel'].startswith('sync-'):
-                            if data['channel'] in self.listeners:
-                                f = self.listeners[data['channel']]
-                                if not f.done():
-                                    self.loop.call_soon_threadsafe(f.set_result, data)
-                                if command != 'registerDCSServer':
-                                    continue
-                        for listener in self.eventListeners:
-                            if command in listener.commands:
-                                self.loop.call_soon_threadsafe(asyncio.create_task,
-                                                               listener.processEvent(deepcopy(data)))
-                    except Exception as ex:
-                        self.log.exception(ex)
-                    finally:
-                        s.server.message_queue[server_name].task_done()
-                        data = s.server.message_queue[server_name].get()
-
-        class MyThreadingUDPServer(ThreadingUDPServer):
+                # the hooks send messages in batches, the mission environment sends them one by one
+                for message in data if isinstance(data, list) else [data]:
+                    # ignore messages not containing server names
+                    if 'server_name' not in message:
+                        self.log.warning('Message without server_name received: {}'.format(message))
+                        continue
+                    self.dispatcher.put(message)
+
+        class MyUDPServer(UDPServer):
             def __init__(self, server_address: Tuple[str, int], request_handler: Callable[..., BaseRequestHandler]):
                 # enable reuse, in case the restart was too fast and the port was still in TIME_WAIT
-                MyThreadingUDPServer.allow_reuse_address = True
-                MyThreadingUDPServer.max_packet_size = 65504
-                self.message_queue: dict[str, Queue[str]] = {}
-                self.executor = ThreadPoolExecutor(thread_name_prefix='UDPServer')
+                MyUDPServer.allow_reuse_address = True
+                MyUDPServer.max_packet_size = 65504
                 super().__init__(server_address, request_handler)
 
-            def shutdown(self) -> None:
-                super().shutdown()
-                for server_name, queue in self.message_queue.items():
-                    queue.join()
-                    queue.put('')
-                self.executor.shutdown(wait=True)
-
         host = self.config['BOT']['HOST']
         port = int(self.config['BOT']['PORT'])
-        self.udp_server = MyThreadingUDPServer((host, port), RequestHandler)
+        self.dispatcher = EventDispatcher(self)
+        self.dispatcher.start()
+        self.udp_server = MyUDPServer((host, port), RequestHandler)
         self.executor.submit(self.udp_server.serve_forever)
         self.log.debug('- Listener started on interface {} port {} accepting commands.'.format(host, port))
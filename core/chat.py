@@ -0,0 +1,227 @@
+from __future__ import annotations
+import asyncio
+import discord
+import json
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from core import DCSServerBot, Server
+
+# Discord allows 2000 characters per message and about 5 messages per 5 seconds per channel
+MAX_MESSAGE_LENGTH = 2000
+RATE_LIMIT = 5
+RATE_PERIOD = 5.0
+# DCS reads at most 8192 bytes per datagram, we keep some room for safety
+MAX_PACKET_SIZE = 8192 - 256
+
+
+def _packet_size(messages: list[dict]) -> int:
+    # the size of the datagram as it is sent by UDPTransport
+    return len(json.dumps({"command": "sendChatMessage", "messages": messages}).encode('utf-8'))
+
+
+# the size of an empty packet, so that the sizes of single messages can be added up
+EMPTY_PACKET_SIZE = _packet_size([])
+
+
+def _split_packet(message: str, sender: Optional[str]) -> list[dict]:
+    # splits a message that does not fit into one packet on its own, non-ASCII characters are escaped by json
+    budget = MAX_PACKET_SIZE - _packet_size([{"from": sender, "message": ""}])
+    parts, part, size = [], '', 0
+    for c in message:
+        cost = len(json.dumps(c)) - 2
+        if size + cost > budget:
+            parts.append(part)
+            part, size = '', 0
+        part += c
+        size += cost
+    parts.append(part)
+    return [{"from": sender, "message": x} for x in parts]
+
+
+def _split(message: str) -> list[str]:
+    return [message[i:i + MAX_MESSAGE_LENGTH] for i in range(0, len(message), MAX_MESSAGE_LENGTH)] or ['']
+
+
+@dataclass
+class DiscordQueue:
+    channel: discord.abc.Messageable
+    messages: deque[str] = field(default_factory=deque)
+    length: int = 0
+    # timestamp of the oldest message waiting and the arrival times of the last RATE_PERIOD seconds
+    since: float = 0.0
+    arrivals: deque[float] = field(default_factory=deque)
+    sent: deque[float] = field(default_factory=deque)
+    retry_at: float = 0.0
+
+    def put(self, message: str, now: float) -> None:
+        if not self.messages:
+            self.since = now
+        self.arrivals.append(now)
+        for part in _split(message):
+            self.messages.append(part)
+            self.length += len(part) + 1
+
+    def next_chunk(self) -> str:
+        # joins as many messages as fit into one Discord message
+        parts = [self.messages.popleft()]
+        length = len(parts[0])
+        while self.messages and length + 1 + len(self.messages[0]) <= MAX_MESSAGE_LENGTH:
+            part = self.messages.popleft()
+            parts.append(part)
+            length += 1 + len(part)
+        self.length -= length + 1
+        return '\n'.join(parts)
+
+    def push_back(self, chunk: str) -> None:
+        self.messages.appendleft(chunk)
+        self.length += len(chunk) + 1
+
+    def rate(self, now: float) -> float:
+        # messages per second
+        while self.arrivals and self.arrivals[0] <= now - RATE_PERIOD:
+            self.arrivals.popleft()
+        return len(self.arrivals) / RATE_PERIOD
+
+    def token_at(self, now: float) -> float:
+        while self.sent and self.sent[0] <= now - RATE_PERIOD:
+            self.sent.popleft()
+        if len(self.sent) < RATE_LIMIT:
+            return max(now, self.retry_at)
+        return max(self.sent[0] + RATE_PERIOD, self.retry_at)
+
+
+@dataclass
+class DCSQueue:
+    server: Server
+    messages: list[dict] = field(default_factory=list)
+    size: int = 0
+    since: float = 0.0
+
+
+class ChatRelay:
+    """
+    Relays chat between Discord and DCS. Messages are collected per channel (or server) and sent in batches, so
+    that busy servers neither hit the Discord rate limits nor flood DCS with one packet per message.
+    The time a message is held back grows with the traffic of the channel, between min_delay and max_delay.
+    """
+
+    def __init__(self, bot: DCSServerBot, *, min_delay: float = 0.25, max_delay: float = 5.0):
+        self.bot = bot
+        self.log = bot.log
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.to_discord: dict[int, DiscordQueue] = dict()
+        self.to_dcs: dict[str, DCSQueue] = dict()
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def _start(self) -> None:
+        if not self._task or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        self._wakeup.set()
+
+    def send_to_discord(self, channel: discord.abc.Messageable, message: str) -> None:
+        if channel.id not in self.to_discord:
+            self.to_discord[channel.id] = DiscordQueue(channel=channel)
+        self.to_discord[channel.id].put(message, time.monotonic())
+        self._start()
+
+    def send_to_dcs(self, server: Server, message: str, sender: Optional[str] = None) -> None:
+        if server.name not in self.to_dcs:
+            self.to_dcs[server.name] = DCSQueue(server=server)
+        queue = self.to_dcs[server.name]
+        if not queue.messages:
+            queue.since = time.monotonic()
+        for part in _split_packet(message, sender):
+            queue.messages.append(part)
+            # one more message adds its own size plus the separator
+            queue.size += _packet_size([part]) - EMPTY_PACKET_SIZE + 2
+        self._start()
+
+    def _delay(self, queue: DiscordQueue, now: float) -> float:
+        # a quiet channel gets its messages right away, a chatty one waits to fill the batch
+        return min(max(queue.rate(now) * self.min_delay, self.min_delay), self.max_delay)
+
+    def _due(self, queue: DiscordQueue, now: float) -> float:
+        if queue.length >= MAX_MESSAGE_LENGTH:
+            return queue.token_at(now)
+        return max(queue.since + self._delay(queue, now), queue.token_at(now))
+
+    async def _send_discord(self, queue: DiscordQueue, now: float) -> None:
+        chunk = queue.next_chunk()
+        queue.sent.append(now)
+        queue.since = now
+        try:
+            await queue.channel.send(chunk)
+        except discord.HTTPException as ex:
+            if ex.status == 429:
+                queue.retry_at = time.monotonic() + float(getattr(ex, 'retry_after', RATE_PERIOD) or RATE_PERIOD)
+                queue.push_back(chunk)
+            else:
+                self.log.exception(ex)
+
+    def _send_dcs(self, queue: DCSQueue) -> None:
+        # coalesces the messages into as few packets as possible
+        packet, size = [], EMPTY_PACKET_SIZE
+        for message in queue.messages:
+            length = _packet_size([message]) - EMPTY_PACKET_SIZE + 2
+            if packet and size + length > MAX_PACKET_SIZE:
+                queue.server.sendtoDCS({"command": "sendChatMessage", "messages": packet})
+                packet, size = [], EMPTY_PACKET_SIZE
+            packet.append(message)
+            size += length
+        if packet:
+            queue.server.sendtoDCS({"command": "sendChatMessage", "messages": packet})
+        queue.messages = []
+        queue.size = 0
+
+    async def _process(self, flush: bool = False) -> float:
+        now = time.monotonic()
+        timeout = self.max_delay
+        for queue in list(self.to_dcs.values()):
+            if not queue.messages:
+                continue
+            if flush or queue.size >= MAX_PACKET_SIZE or now >= queue.since + self.min_delay:
+                try:
+                    self._send_dcs(queue)
+                except Exception as ex:
+                    self.log.exception(ex)
+                    queue.messages = []
+            else:
+                timeout = min(timeout, queue.since + self.min_delay - now)
+        for queue in list(self.to_discord.values()):
+            while queue.messages and queue.retry_at <= now and (flush or self._due(queue, now) <= now):
+                await self._send_discord(queue, now)
+                now = time.monotonic()
+            if queue.messages:
+                timeout = min(timeout, self._due(queue, now) - now)
+        return max(timeout, 0.01)
+
+    async def _run(self):
+        while True:
+            try:
+                self._wakeup.clear()
+                timeout = await self._process()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:
+                self.log.exception(ex)
+                await asyncio.sleep(1)
+
+    async def flush(self) -> None:
+        await self._process(flush=True)
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
@@ -2,6 +2,7 @@ import discord
 import psycopg2
 from contextlib import closing
 from core import DataObjectFactory, DataObject
+from core.report.cache import QueryCache
 from dataclasses import dataclass, field
 
 
@@ -48,6 +49,7 @@ class Member(DataObject):
                     cursor.execute('UPDATE players SET manual = %s WHERE ucid = %s', (flag, ucid))
                     self.ucids[ucid] = flag
             conn.commit()
+            QueryCache().invalidate('players')
         except (Exception, psycopg2.DatabaseError) as error:
             self.log.exception(error)
             conn.rollback()
@@ -62,6 +64,7 @@ class Member(DataObject):
                 cursor.execute('UPDATE players SET discord_id = %s, manual = %s WHERE ucid = %s',
                                (self.member.id, validated, ucid))
             conn.commit()
+            QueryCache().invalidate('players')
         except (Exception, psycopg2.DatabaseError) as error:
             self.log.exception(error)
             conn.rollback()
@@ -77,6 +80,7 @@ class Member(DataObject):
             with closing(conn.cursor()) as cursor:
                 cursor.execute('UPDATE players SET discord_id = -1, manual = FALSE WHERE ucid = %s', (ucid, ))
             conn.commit()
+            QueryCache().invalidate('players')
         except (Exception, psycopg2.DatabaseError) as error:
             self.log.exception(error)
             conn.rollback()
@@ -1,14 +1,11 @@
 from __future__ import annotations
 import asyncio
 import discord
-import json
 import luadata
 import os
 import psutil
-import socket
 import subprocess
 import psycopg2
-import uuid
 import win32con
 from contextlib import closing, suppress
 from dataclasses import dataclass, field
@@ -20,6 +17,7 @@ from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler, FileSystemEvent
 from .dataobject import DataObject, DataObjectFactory
 from .const import Status, Coalition, Channel
+from ..transport import UDPTransport
 from core import utils
 
 if TYPE_CHECKING:
@@ -119,12 +117,14 @@ class Server(DataObject):
     dcs_version: str = field(default=None, compare=False)
     extensions: dict[str, Extension] = field(default_factory=dict, compare=False)
     _lock: asyncio.Lock = field(init=False, compare=False)
+    transport: UDPTransport = field(init=False, compare=False, repr=False)
     afk: dict[str, datetime] = field(default_factory=dict, compare=False)
 
     def __post_init__(self):
         super().__post_init__()
         self._lock = asyncio.Lock()
         self.status_change = asyncio.Event()
+        self.transport = UDPTransport(self.bot, self.name, self.host, self.port)
         conn = self.pool.getconn()
         try:
             with closing(conn.cursor()) as cursor:
@@ -292,27 +292,22 @@ class Server(DataObject):
             filename = self.current_mission.filename
         return filename
 
-    def sendtoDCS(self, message: dict):
+    @staticmethod
+    def _prepare(message: dict) -> dict:
         # As Lua does not support large numbers, convert them to strings
         for key, value in message.items():
             if type(value) == int:
                 message[key] = str(value)
-        msg = json.dumps(message)
-        self.log.debug(f"HOST->{self.name}: {msg}")
-        dcs_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        dcs_socket.sendto(msg.encode('utf-8'), (self.host, int(self.port)))
-        dcs_socket.close()
-
-    async def sendtoDCSSync(self, message: dict, timeout: Optional[int] = 5.0):
-        future = self.bot.loop.create_future()
-        token = 'sync-' + str(uuid.uuid4())
-        message['channel'] = token
-        self.bot.listeners[token] = future
-        try:
-            self.sendtoDCS(message)
-            return await asyncio.wait_for(future, timeout)
-        finally:
-            del self.bot.listeners[token]
+        return message
+
+    def sendtoDCS(self, message: dict):
+        self.transport.send(self._prepare(message))
+
+    async def sendtoDCSSync(self, message: dict, timeout: Optional[int] = 5.0, retries: int = 0):
+        return await self.transport.request(self._prepare(message), timeout, retries)
+
+    async def sendtoDCSPipelined(self, messages: list[dict], timeout: Optional[int] = 5.0) -> list[dict]:
+        return await self.transport.request_many([self._prepare(x) for x in messages], timeout)
 
     def sendChatMessage(self, coalition: Coalition, message: str, sender: str = None):
         if coalition == Coalition.ALL:
@@ -356,6 +351,7 @@ class Server(DataObject):
         if update_settings:
             self.settings['name'] = new_name
         self.name = new_name
+        self.transport.name = new_name
 
     async def startup(self) -> None:
         basepath = os.path.expandvars(self.bot.config['DCS']['DCS_INSTALLATION'])
@@ -366,6 +362,11 @@ class Server(DataObject):
         else:
             self.log.error(f"No executable found to start a DCS server in {basepath}!")
             return
+        # make sure, the server starts with the luas that were deployed by the bot
+        repaired = await self.bot.loop.run_in_executor(self.bot.executor, utils.verify_installation,
+                                                       self.installation, [x.lower() for x in self.bot.plugins])
+        if repaired:
+            self.log.warning(f"  => {self.name}: Modified or missing luas redeployed: {', '.join(repaired)}")
         self.log.debug(r'Launching DCS server with: "{}" --server --norender -w {}'.format(path, self.installation))
         if self.bot.config.getboolean(self.installation, 'START_MINIMIZED'):
             info = subprocess.STARTUPINFO()
@@ -376,8 +377,7 @@ class Server(DataObject):
         p = subprocess.Popen(
             [exe, '--server', '--norender', '-w', self.installation], executable=path, startupinfo=info
         )
-        with suppress(Exception):
-            self.process = Process(p.pid)
+        self.process = self.bot.processes.register(self.installation, p.pid)
         timeout = 300 if self.bot.config.getboolean('BOT', 'SLOW_SYSTEM') else 180
         self.status = Status.LOADING
         await self.wait_for_status_change([Status.STOPPED, Status.PAUSED, Status.RUNNING], timeout)
@@ -398,6 +398,7 @@ class Server(DataObject):
             await asyncio.sleep(10)
         if self.status != Status.SHUTDOWN:
             self.status = Status.SHUTDOWN
+        self.bot.processes.unregister(self.installation)
         self.process = None
 
     async def stop(self) -> None:
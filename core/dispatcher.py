@@ -0,0 +1,195 @@
+from __future__ import annotations
+import asyncio
+import json
+import threading
+from collections import deque
+from copy import deepcopy
+from dataclasses import dataclass, field
+from typing import Optional, TYPE_CHECKING
+from .data.const import Status
+
+if TYPE_CHECKING:
+    from core import DCSServerBot
+
+
+@dataclass
+class EventQueue:
+    # registrations are processed ahead of any other event of that server
+    control: deque[dict] = field(default_factory=deque)
+    events: deque[list] = field(default_factory=deque)
+    coalesced: dict[str, list] = field(default_factory=dict)
+    pending: int = 0
+    dropped: int = 0
+    coalesced_count: int = 0
+
+    def __len__(self):
+        return len(self.control) + len(self.events)
+
+
+class EventDispatcher(threading.Thread):
+
+    def __init__(self, bot: DCSServerBot):
+        super().__init__(name='EventDispatcher', daemon=True)
+        self.bot = bot
+        self.log = bot.log
+        self.loop = bot.loop
+        config = bot.config['BOT']
+        self.queue_size = int(config['EVENT_QUEUE_SIZE'])
+        self.max_pending = int(config['EVENT_MAX_PENDING'])
+        self.coalesce = [x.strip() for x in config['EVENT_COALESCE'].split(',') if x.strip()]
+        self.drop = [x.strip() for x in config['EVENT_DROP'].split(',') if x.strip()]
+        self.queues: dict[str, EventQueue] = {}
+        self._cond = threading.Condition()
+        self._shutdown = False
+
+    @staticmethod
+    def _key(data: dict) -> str:
+        if data['command'] == 'onMissionEvent' and 'eventName' in data:
+            return f"onMissionEvent:{data['eventName']}"
+        return data['command']
+
+    def put(self, data: dict) -> None:
+        server_name = data['server_name']
+        command = data['command']
+        # replies to sendtoDCSSync() bypass the queue, as somebody is actively waiting for them
+        if command != 'registerDCSServer' and data.get('channel', '').startswith('sync-'):
+            if self._is_registered(server_name):
+                self._resolve(data)
+            return
+        with self._cond:
+            queue = self.queues.setdefault(server_name, EventQueue())
+            if command == 'registerDCSServer':
+                queue.control.append(data)
+            else:
+                key = self._key(data)
+                if key in self.coalesce and key in queue.coalesced:
+                    # replace the queued event with the latest data, keeping its position
+                    queue.coalesced[key][0] = data
+                    queue.coalesced_count += 1
+                    return
+                if key in self.drop and len(queue.events) >= self.queue_size / 2:
+                    queue.dropped += 1
+                    return
+                if len(queue.events) >= self.queue_size and not self._evict(queue):
+                    queue.dropped += 1
+                    if queue.dropped % 100 == 1:
+                        self.log.warning(f'Event queue for server "{server_name}" is full, {queue.dropped} events '
+                                         f'dropped so far.')
+                    return
+                cell = [data]
+                queue.events.append(cell)
+                if key in self.coalesce:
+                    queue.coalesced[key] = cell
+            self._cond.notify()
+
+    def _evict(self, queue: EventQueue) -> bool:
+        for cell in queue.events:
+            if self._key(cell[0]) in self.drop:
+                queue.events.remove(cell)
+                queue.dropped += 1
+                return True
+        return False
+
+    def _next(self) -> Optional[tuple[str, dict]]:
+        # round-robin over all servers, so that a busy server can't starve the others
+        for _ in range(len(self.queues)):
+            server_name, queue = next(iter(self.queues.items()))
+            self.queues[server_name] = self.queues.pop(server_name)
+            if queue.control:
+                return server_name, queue.control.popleft()
+            if queue.events and queue.pending < self.max_pending:
+                cell = queue.events.popleft()
+                key = self._key(cell[0])
+                if queue.coalesced.get(key) is cell:
+                    del queue.coalesced[key]
+                queue.pending += 1
+                return server_name, cell[0]
+        return None
+
+    def run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._shutdown and not (item := self._next()):
+                    self._cond.wait()
+                if self._shutdown:
+                    return
+            server_name, data = item
+            try:
+                self._process(server_name, data)
+            except Exception as ex:
+                self.log.exception(ex)
+
+    def stop(self) -> None:
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+        self.join()
+
+    def _is_registered(self, server_name: str) -> bool:
+        server = self.bot.servers.get(server_name)
+        return server is not None and server.status != Status.UNREGISTERED
+
+    def _resolve(self, data: dict) -> None:
+        f = self.bot.listeners.get(data['channel'])
+        if f and not f.done():
+            self.loop.call_soon_threadsafe(f.set_result, data)
+
+    def _release(self, server_name: str) -> None:
+        with self._cond:
+            self.queues[server_name].pending -= 1
+            self._prune(server_name)
+            self._cond.notify()
+
+    def _prune(self, server_name: str) -> None:
+        # the queue of a server that is gone is removed as soon as it is drained
+        queue = self.queues.get(server_name)
+        if queue is not None and not len(queue) and not queue.pending and server_name not in self.bot.servers:
+            del self.queues[server_name]
+
+    def remove(self, server_name: str) -> None:
+        with self._cond:
+            self._prune(server_name)
+
+    def _process(self, server_name: str, data: dict) -> None:
+        self.bot.log.debug('{}->HOST: {}'.format(server_name, json.dumps(data)))
+        command = data['command']
+        if command == 'registerDCSServer':
+            if not self.bot.register_server(data):
+                self.log.error(f"Error while registering server {server_name}.")
+                return
+            if data.get('channel', '').startswith('sync-'):
+                self._resolve(data)
+            # registrations don't count against the pending limit
+            with self._cond:
+                self.queues[server_name].pending += 1
+        elif not self._is_registered(server_name):
+            self.log.debug(f"Command {command} for unregistered server {server_name} received, ignoring.")
+            self._release(server_name)
+            return
+        listeners = [x for x in self.bot.eventListeners if command in x.commands]
+        if not listeners:
+            self._release(server_name)
+            return
+        self.loop.call_soon_threadsafe(asyncio.create_task, self._dispatch(server_name, data, listeners))
+
+    async def _dispatch(self, server_name: str, data: dict, listeners: list) -> None:
+        try:
+            await asyncio.gather(*[
+                self.bot.monitor.track(
+                    listener.processEvent(deepcopy(data)),
+                    f"{listener.plugin_name}:{type(listener).__name__}.{data['command']}"
+                ) for listener in listeners
+            ], return_exceptions=True)
+        finally:
+            self._release(server_name)
+
+    def get_statistics(self) -> dict[str, dict[str, int]]:
+        with self._cond:
+            return {
+                server_name: {
+                    "queued": len(queue),
+                    "pending": queue.pending,
+                    "dropped": queue.dropped,
+                    "coalesced": queue.coalesced_count
+                } for server_name, queue in self.queues.items()
+            }
@@ -1,4 +1,6 @@
 from __future__ import annotations
+import asyncio
+import time
 from abc import ABC, abstractmethod
 from core import report
 from datetime import datetime
@@ -7,6 +9,10 @@ from typing import Optional, TYPE_CHECKING
 if TYPE_CHECKING:
     from core import DCSServerBot, Server
 
+# results of is_running() are cached for that many seconds, checks that take longer than the timeout count as failed
+HEALTH_CHECK_TTL = 30.0
+HEALTH_CHECK_TIMEOUT = 5.0
+
 
 class Extension(ABC):
 
@@ -18,6 +24,9 @@ class Extension(ABC):
         self.server: Server = server
         self.locals: dict = self.load_config()
         self.lastrun = datetime.now()
+        self._running: Optional[bool] = None
+        self._checked = 0.0
+        self._version: Optional[str] = None
 
     def load_config(self) -> Optional[dict]:
         return dict()
@@ -43,6 +52,37 @@ class Extension(ABC):
     def is_running(self) -> bool:
         return True
 
+    async def check_running(self, *, force: bool = False) -> bool:
+        # is_running() might check ports or processes, so it is run in the executor and its result is cached
+        if force or self._running is None or time.monotonic() - self._checked > HEALTH_CHECK_TTL:
+            try:
+                self._running = await asyncio.wait_for(
+                    asyncio.get_running_loop().run_in_executor(self.bot.executor, self.is_running),
+                    HEALTH_CHECK_TIMEOUT)
+            except asyncio.TimeoutError:
+                self.log.warning(f"  => {self.server.name}: Health check of {self.name} timed out.")
+                self._running = False
+            self._checked = time.monotonic()
+        return self._running
+
+    @property
+    def running(self) -> bool:
+        # the last known state for callers that must not block, an extension that was never checked counts as stopped
+        return bool(self._running)
+
+    def get_version(self) -> str:
+        # reading the version out of a binary is expensive and it will only change with a restart of the extension
+        if not self._version:
+            self._version = self.version
+        return self._version
+
+    def reset(self, *, running: Optional[bool] = None) -> None:
+        # called after a start or stop, the new state is either known already or checked by the caller
+        self._version = None
+        if running is not None:
+            self._running = running
+            self._checked = time.monotonic()
+
     @property
     def name(self) -> str:
         return type(self).__name__
@@ -0,0 +1,87 @@
+from __future__ import annotations
+import asyncio
+import importlib
+import psycopg2
+import string
+import time
+from contextlib import closing
+from typing import TYPE_CHECKING
+from .plugin import Plugin
+
+if TYPE_CHECKING:
+    from core import DCSServerBot
+
+
+class PluginLoader:
+
+    def __init__(self, bot: DCSServerBot):
+        self.bot = bot
+        self.log = bot.log
+        self.pool = bot.pool
+        self.timings: dict[str, float] = dict()
+
+    @staticmethod
+    def get_requirements(plugin: str) -> list[str]:
+        try:
+            return getattr(importlib.import_module(f'plugins.{plugin}'), '__requires__', [])
+        except ModuleNotFoundError:
+            # will be reported when the plugin is loaded
+            return []
+
+    def resolve(self, plugins: list[str]) -> list[str]:
+        # dependencies are loaded before their dependents, otherwise the configured order is kept
+        requirements = {plugin: [x for x in self.get_requirements(plugin) if x in plugins] for plugin in plugins}
+        ordered: list[str] = []
+        while len(ordered) < len(plugins):
+            ready = [x for x in plugins if x not in ordered and all(r in ordered for r in requirements[x])]
+            if not ready:
+                cyclic = [x for x in plugins if x not in ordered]
+                self.log.warning(f"  => Cyclic plugin dependencies between {', '.join(cyclic)}!")
+                ordered.extend(cyclic)
+                break
+            ordered.extend(ready)
+        return ordered
+
+    def read_versions(self) -> None:
+        conn = self.pool.getconn()
+        try:
+            with closing(conn.cursor()) as cursor:
+                cursor.execute('SELECT plugin, version FROM plugins')
+                self.bot.plugin_versions = {row[0]: row[1] for row in cursor.fetchall()}
+        except (Exception, psycopg2.DatabaseError) as error:
+            self.log.exception(error)
+        finally:
+            self.pool.putconn(conn)
+
+    async def prepare(self, plugins: list[str]) -> None:
+        jobs = []
+        if self.bot.config.getboolean('BOT', 'MASTER'):
+            jobs.append(self.bot.loop.run_in_executor(self.bot.executor, self.read_versions))
+        for plugin in plugins:
+            for server in self.bot.servers.values():
+                jobs.append(self.bot.loop.run_in_executor(self.bot.executor, Plugin.install_luas, self.bot, plugin,
+                                                          server))
+        for result in await asyncio.gather(*jobs, return_exceptions=True):
+            if isinstance(result, Exception):
+                self.log.exception(result)
+
+    async def load(self, plugins: list[str]) -> None:
+        start = time.perf_counter()
+        plugins = self.resolve([x.lower() for x in plugins])
+        self.timings['resolve'] = time.perf_counter() - start
+        start = time.perf_counter()
+        await self.prepare(plugins)
+        self.timings['prepare'] = time.perf_counter() - start
+        start = time.perf_counter()
+        for plugin in plugins:
+            if await self.bot.load_plugin(plugin):
+                self.log.info(f'  => {string.capwords(plugin)} loaded.')
+            else:
+                self.log.info(f'  => {string.capwords(plugin)} NOT loaded.')
+        self.timings['load'] = time.perf_counter() - start
+        self.log.info('- Plugins loaded in {:.2f}s ({}).'.format(
+            sum(self.timings.values()), ', '.join([f'{k}: {v:.2f}s' for k, v in self.timings.items()])))
+        for cog in self.bot.cogs.values():  # type: Plugin
+            if isinstance(cog, Plugin) and cog.timings:
+                self.log.debug('  - {}: {}'.format(string.capwords(cog.plugin_name),
+                                                   ', '.join([f'{k}: {v:.3f}s' for k, v in cog.timings.items()])))
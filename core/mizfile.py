@@ -4,7 +4,7 @@ import os
 import tempfile
 import zipfile
 from datetime import datetime
-from typing import Union
+from typing import Optional, Union
 
 
 class MizFile:
@@ -19,8 +19,10 @@ class MizFile:
             with miz.open('mission') as mission:
                 self.mission = luadata.unserialize(io.TextIOWrapper(mission, encoding='utf-8').read(), 'utf-8')
 
-    def save(self):
-        tmpfd, tmpname = tempfile.mkstemp(dir=os.path.dirname(self.filename))
+    def save(self, filename: Optional[str] = None):
+        # the mission can be written to another file, to be swapped in later on
+        filename = filename or self.filename
+        tmpfd, tmpname = tempfile.mkstemp(dir=os.path.dirname(filename))
         os.close(tmpfd)
         with zipfile.ZipFile(self.filename, 'r') as zin:
             with zipfile.ZipFile(tmpname, 'w') as zout:
@@ -31,8 +33,7 @@ class MizFile:
                     else:
                         zout.writestr(item, "mission = " + luadata.serialize(self.mission, 'utf-8', indent='\t',
                                                                              indent_level=0))
-        os.remove(self.filename)
-        os.rename(tmpname, self.filename)
+        os.replace(tmpname, filename)
 
     @property
     def start_time(self) -> int:
@@ -0,0 +1,138 @@
+from __future__ import annotations
+import asyncio
+import heapq
+import os
+import sys
+import threading
+import time
+import traceback
+import weakref
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from core import DCSServerBot
+
+
+@dataclass(order=True)
+class Stall:
+    duration: float
+    timestamp: datetime = field(compare=False)
+    culprit: str = field(compare=False)
+    stack: list[str] = field(compare=False, repr=False)
+
+
+class LoopMonitor(threading.Thread):
+
+    def __init__(self, bot: DCSServerBot, threshold: float = 0.5, history: int = 10, interval: float = 0.25):
+        super().__init__(name='LoopMonitor', daemon=True)
+        self.bot = bot
+        self.log = bot.log
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.loop_thread_id: Optional[int] = None
+        self.threshold = threshold
+        self.history = history
+        self.interval = interval
+        self.stalls: list[Stall] = []
+        self.latency: float = 0.0
+        self.max_latency: float = 0.0
+        self.samples: int = 0
+        self._labels: weakref.WeakKeyDictionary[asyncio.Task, str] = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._shutdown = threading.Event()
+
+    def start(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread_id = threading.get_ident()
+        super().start()
+
+    def stop(self) -> None:
+        self._shutdown.set()
+
+    def label(self, name: str) -> None:
+        # mark the currently running task, so that stalls can be attributed to it
+        with self._lock:
+            task = asyncio.current_task()
+            if task:
+                self._labels[task] = name
+
+    async def track(self, coro, name: str):
+        self.label(name)
+        return await coro
+
+    def run(self) -> None:
+        while not self._shutdown.is_set():
+            heartbeat = threading.Event()
+            start = time.perf_counter()
+            try:
+                self.loop.call_soon_threadsafe(heartbeat.set)
+            except RuntimeError:
+                # loop closed
+                return
+            culprit = stack = None
+            if not heartbeat.wait(self.threshold):
+                # the loop is stalled right now, so the main thread stack points to the offender
+                culprit, stack = self._capture()
+                while not heartbeat.wait(1.0):
+                    if self._shutdown.is_set():
+                        return
+            latency = time.perf_counter() - start
+            self.latency = latency
+            self.max_latency = max(self.max_latency, latency)
+            self.samples += 1
+            if culprit:
+                self.log.warning(f'Event loop blocked for {latency:.3f}s by {culprit}')
+                self._record(Stall(duration=latency, timestamp=datetime.now(), culprit=culprit, stack=stack))
+            self._shutdown.wait(self.interval)
+
+    def _capture(self) -> tuple[str, list[str]]:
+        frame = sys._current_frames().get(self.loop_thread_id)
+        stack = traceback.format_stack(frame) if frame else []
+        with self._lock:
+            task = asyncio.current_task(self.loop)
+            label = self._labels.get(task) if task else None
+        if not label:
+            label = self._attribute(frame)
+        return label, stack
+
+    @staticmethod
+    def _attribute(frame) -> str:
+        # no labelled task running, so take the innermost frame that belongs to a plugin or the core
+        fallback = 'unknown'
+        while frame:
+            filename = os.path.normpath(frame.f_code.co_filename).split(os.sep)
+            if 'plugins' in filename:
+                idx = filename.index('plugins')
+                if len(filename) > idx + 1:
+                    return f'{filename[idx + 1]}:{frame.f_code.co_name}'
+            elif 'core' in filename and fallback == 'unknown':
+                fallback = f'core:{frame.f_code.co_name}'
+            frame = frame.f_back
+        return fallback
+
+    def _record(self, stall: Stall) -> None:
+        with self._lock:
+            if len(self.stalls) < self.history:
+                heapq.heappush(self.stalls, stall)
+            else:
+                heapq.heappushpop(self.stalls, stall)
+
+    def get_stalls(self) -> list[Stall]:
+        with self._lock:
+            return sorted(self.stalls, reverse=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.stalls.clear()
+        self.max_latency = 0.0
+
+    def report(self) -> str:
+        lines = [f'Event loop latency: last {self.latency * 1000:.1f} ms, max {self.max_latency * 1000:.1f} ms, '
+                 f'threshold {self.threshold * 1000:.0f} ms', '']
+        for idx, stall in enumerate(self.get_stalls(), start=1):
+            lines.append(f"#{idx} {stall.timestamp.strftime('%Y-%m-%d %H:%M:%S')} - {stall.duration:.3f}s "
+                         f"blocked by {stall.culprit}")
+            lines.extend(line.rstrip() for line in stall.stack)
+            lines.append('')
+        return '\n'.join(lines)
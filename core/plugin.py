@@ -5,12 +5,13 @@ import psycopg2
 import psycopg2.extras
 import string
 import sys
+import time
 from contextlib import closing
 from copy import deepcopy
 from discord.ext import commands
 from os import path
-from shutil import copytree
 from typing import Type, Optional, TYPE_CHECKING
+from core import utils
 from .listener import TEventListener
 
 if TYPE_CHECKING:
@@ -26,9 +27,14 @@ class Plugin(commands.Cog):
         self.log = bot.log
         self.pool = bot.pool
         self.loop = bot.loop
+        self.timings: dict[str, float] = dict()
+        start = time.perf_counter()
         self.locals = self.read_locals()
         self._config = dict[str, dict]()
+        self.timings['config'] = time.perf_counter() - start
+        start = time.perf_counter()
         self.install()
+        self.timings['install'] = time.perf_counter() - start
         self.eventlistener: Type[TEventListener] = eventlistener(self) if eventlistener else None
         if self.eventlistener:
             self.bot.register_eventListener(self.eventlistener)
@@ -74,13 +80,6 @@ class Plugin(commands.Cog):
             elif version != self.plugin_version:
                 self.migrate(self.plugin_version)
                 self.set_installed_version(self.plugin_name, self.plugin_version)
-        for server in self.bot.servers.values():
-            source_path = f'./plugins/{self.plugin_name}/lua'
-            if path.exists(source_path):
-                target_path = path.expandvars(self.bot.config[server.installation]['DCS_HOME'] +
-                                              f'\\Scripts\\net\\DCSServerBot\\{self.plugin_name}\\')
-                copytree(source_path, target_path, dirs_exist_ok=True)
-                self.log.debug(f'  => Luas installed into {server.installation}')
         # create report directories for convenience
         source_path = f'./plugins/{self.plugin_name}/reports'
         if path.exists(source_path):
@@ -88,6 +87,15 @@ class Plugin(commands.Cog):
             if not path.exists(target_path):
                 os.makedirs(target_path)
 
+    @staticmethod
+    def install_luas(bot: DCSServerBot, plugin_name: str, server: Server) -> None:
+        deployment = utils.install_luas(server.installation, plugin_name)
+        if deployment and deployment.failed:
+            bot.log.warning(f"  => {string.capwords(plugin_name)}: Luas could not be updated in "
+                            f"{server.installation}: {', '.join(deployment.failed)}")
+        elif deployment and deployment.changed:
+            bot.log.debug(f'  => {string.capwords(plugin_name)}: Luas installed into {server.installation}')
+
     def migrate(self, version: str) -> None:
         pass
 
@@ -101,6 +109,9 @@ class Plugin(commands.Cog):
         pass
 
     def init_db(self) -> None:
+        # the plugin versions might have been read in one go by the PluginLoader already
+        if self.bot.plugin_versions.get(self.plugin_name) == self.plugin_version:
+            return
         conn = self.pool.getconn()
         try:
             with closing(conn.cursor()) as cursor:
@@ -135,6 +146,7 @@ class Plugin(commands.Cog):
                     cursor.execute('UPDATE plugins SET version = %s WHERE plugin = %s',
                                    (self.plugin_version, self.plugin_name))
             conn.commit()
+            self.bot.plugin_versions[self.plugin_name] = self.plugin_version
         except (Exception, psycopg2.DatabaseError) as error:
             conn.rollback()
             self.log.exception(error)
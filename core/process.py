@@ -0,0 +1,124 @@
+from __future__ import annotations
+import asyncio
+import psutil
+import threading
+from contextlib import suppress
+from typing import Callable, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from core import DCSServerBot
+
+__all__ = ['DCS_EXECUTABLES', 'ProcessRegistry']
+
+DCS_EXECUTABLES = ['DCS_server.exe', 'DCS.exe']
+
+
+def _matches(info: dict, names: list[str], installation: str) -> bool:
+    if info['name'] not in names:
+        return False
+    with suppress(Exception):
+        for c in info['cmdline']:
+            if installation in c.replace('\\', '/').split('/'):
+                return True
+    return False
+
+
+class ProcessRegistry(threading.Thread):
+    """
+    Keeps track of the processes the bot is responsible for, like DCS or SRS. Processes are registered under a key
+    when they are launched, or found with a single walk over the process table on startup. Afterwards they are only
+    validated by their PID and create time. A watcher thread calls the listeners on the event loop, when one exits.
+    """
+
+    def __init__(self, bot: DCSServerBot, interval: float = 5.0):
+        super().__init__(name='ProcessRegistry', daemon=True)
+        self.bot = bot
+        self.log = bot.log
+        self.interval = interval
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.processes: dict[str, psutil.Process] = dict()
+        self.listeners: list[Callable[[str, psutil.Process], None]] = []
+        self._lock = threading.Lock()
+        self._shutdown = threading.Event()
+
+    def start(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        super().start()
+
+    def stop(self) -> None:
+        self._shutdown.set()
+
+    def add_listener(self, callback: Callable[[str, psutil.Process], None]) -> None:
+        self.listeners.append(callback)
+
+    def register(self, key: str, pid: int) -> Optional[psutil.Process]:
+        try:
+            # psutil remembers the create time, so a reused PID is never mistaken for this process
+            process = psutil.Process(pid)
+        except psutil.Error:
+            return None
+        with self._lock:
+            self.processes[key] = process
+        return process
+
+    def unregister(self, key: str) -> None:
+        with self._lock:
+            self.processes.pop(key, None)
+
+    def get(self, key: str) -> Optional[psutil.Process]:
+        with self._lock:
+            process = self.processes.get(key)
+        if process and process.is_running():
+            return process
+        return None
+
+    def find(self, key: str, names: list[str], installation: str) -> Optional[psutil.Process]:
+        # processes that were started outside the bot have to be searched for
+        process = self.get(key)
+        if not process:
+            self.discover({key: (names, installation)})
+            process = self.get(key)
+        return process
+
+    def discover(self, wanted: dict[str, tuple[list[str], str]]) -> None:
+        # one walk over the process table for all keys
+        missing = {k: v for k, v in wanted.items() if not self.get(k)}
+        if not missing:
+            return
+        for p in psutil.process_iter(['name', 'cmdline']):
+            for key, (names, installation) in list(missing.items()):
+                if _matches(p.info, names, installation):
+                    with self._lock:
+                        self.processes[key] = p
+                    del missing[key]
+                    break
+            if not missing:
+                break
+
+    def _notify(self, key: str, process: psutil.Process) -> None:
+        for callback in self.listeners:
+            try:
+                callback(key, process)
+            except Exception as ex:
+                self.log.exception(ex)
+
+    def run(self) -> None:
+        while not self._shutdown.is_set():
+            with self._lock:
+                watched = {p: k for k, p in self.processes.items()}
+            if not watched:
+                self._shutdown.wait(self.interval)
+                continue
+            gone, _ = psutil.wait_procs(list(watched.keys()), timeout=self.interval)
+            for process in gone:
+                key = watched[process]
+                with self._lock:
+                    # the key might have been given to a new process in the meantime
+                    if self.processes.get(key) is not process:
+                        continue
+                    del self.processes[key]
+                try:
+                    self.loop.call_soon_threadsafe(self._notify, key, process)
+                except RuntimeError:
+                    # loop closed
+                    return
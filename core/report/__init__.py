@@ -1,4 +1,5 @@
 from .env import *
+from .cache import *
 from .elements import *
 from .utils import *
 from .errors import *
@@ -16,6 +16,7 @@ from typing import List, Tuple, Optional, TYPE_CHECKING, Any, cast, Union
 
 from . import ReportEnv, parse_params, parse_input, utils, UnknownReportElement, ReportElement, ClassNotFound, \
     ReportException
+from .scheduler import RefreshScheduler
 from ..data.const import Channel
 
 if TYPE_CHECKING:
@@ -41,12 +42,18 @@ class Report:
             self.report_def = json.load(file)
 
     async def render(self, *args, **kwargs) -> ReportEnv:
+        await self.prepare(**kwargs)
+        return self._render()
+
+    async def prepare(self, **kwargs) -> None:
         if 'input' in self.report_def:
             self.env.params = await parse_input(self, kwargs, self.report_def['input'])
         else:
             self.env.params = kwargs.copy()
         # add the bot to be able to access the whole environment from inside the report
         self.env.params['bot'] = self.bot
+
+    def _render(self) -> ReportEnv:
         # format the embed
         if 'color' in self.report_def:
             self.env.embed = discord.Embed(color=getattr(discord.Color, self.report_def['color'])())
@@ -283,6 +290,7 @@ class PaginationReport(Report):
 
 
 class PersistentReport(Report):
+    _scheduler: Optional[RefreshScheduler] = None
 
     def __init__(self, bot: DCSServerBot, plugin: str, filename: str, server: Server, embed_name: str,
                  channel_id: Optional[Union[Channel, int]] = Channel.STATUS):
@@ -300,3 +308,11 @@ class PersistentReport(Report):
             return env
         except ReportException as ex:
             self.log.exception(ex)
+
+    def schedule(self, *, priority: int = 0, interval: Optional[float] = None, **kwargs) -> None:
+        # renders the report in the background, at most once per interval
+        if not PersistentReport._scheduler:
+            PersistentReport._scheduler = RefreshScheduler(self.bot)
+        if interval is None:
+            interval = float(self.bot.config['REPORTS'].get('REFRESH_INTERVAL', 10))
+        PersistentReport._scheduler.schedule(self, priority, interval, kwargs)
@@ -0,0 +1,139 @@
+from __future__ import annotations
+import re
+import threading
+import time
+from contextlib import closing
+from core import utils
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from enum import Enum
+from typing import Any, Optional, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import psycopg2.pool
+
+__all__ = ['QueryCache', 'CacheStatistics']
+
+
+@dataclass
+class CacheEntry:
+    rows: list
+    created: float
+    tags: frozenset[str]
+
+
+@dataclass
+class CacheStatistics:
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+    evictions: int = 0
+
+    @property
+    def ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def _normalize(value: Any) -> Any:
+    # turns the parameters of a query into something hashable that does not change with the object's identity
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    elif isinstance(value, Enum):
+        return value.value
+    elif isinstance(value, (datetime, date, timedelta)):
+        return str(value)
+    elif isinstance(value, dict):
+        return tuple(sorted((str(k), _normalize(v)) for k, v in value.items()))
+    elif isinstance(value, (list, tuple, set)):
+        return tuple(_normalize(x) for x in value)
+    elif hasattr(value, 'id'):
+        return type(value).__name__, value.id
+    elif hasattr(value, 'name'):
+        return type(value).__name__, value.name
+    return str(value)
+
+
+class QueryCache:
+    """
+    Caches the results of report queries. Entries expire after ttl seconds or as soon as one of the tables they read
+    from is invalidated by a writer, whatever comes first.
+    """
+    _instance = None
+
+    def __new__(cls) -> QueryCache:
+        if cls._instance is None:
+            cls._instance = super(QueryCache, cls).__new__(cls)
+            config = utils.config['REPORTS'] if 'REPORTS' in utils.config else {}
+            cls._instance.ttl = int(config.get('CACHE_TTL', 60))
+            cls._instance.max_entries = int(config.get('CACHE_SIZE', 1000))
+            cls._instance.entries = dict[tuple, CacheEntry]()
+            # tag => time of the last write
+            cls._instance.versions = dict[str, float]()
+            cls._instance.statistics = CacheStatistics()
+            cls._instance._lock = threading.Lock()
+        return cls._instance
+
+    @staticmethod
+    def get_tags(sql: str) -> frozenset[str]:
+        # every word of the statement is a potential table name
+        return frozenset(re.findall(r'[a-z_][a-z0-9_]*', sql.lower()))
+
+    def _is_valid(self, entry: CacheEntry, now: float) -> bool:
+        if now - entry.created > self.ttl:
+            return False
+        return all(self.versions.get(tag, 0) < entry.created for tag in entry.tags if tag in self.versions)
+
+    def fetch(self, pool: psycopg2.pool.ThreadedConnectionPool, sql: str, params: Union[dict, tuple, None] = None, *,
+              cursor_factory=None, element: Optional[str] = None) -> list:
+        if params is None:
+            args = None
+        elif isinstance(params, dict):
+            # only the parameters the statement uses are part of the key
+            names = set(re.findall(r'%\((\w+)\)s', sql))
+            args = tuple(sorted((k, _normalize(v)) for k, v in params.items() if k in names))
+        else:
+            args = _normalize(params)
+        key = (element, sql, args, cursor_factory.__name__ if cursor_factory else None)
+        now = time.monotonic()
+        if self.ttl > 0:
+            with self._lock:
+                entry = self.entries.get(key)
+                if entry and self._is_valid(entry, now):
+                    self.statistics.hits += 1
+                    return entry.rows
+                self.statistics.misses += 1
+        conn = pool.getconn()
+        try:
+            with closing(conn.cursor(cursor_factory=cursor_factory)) as cursor:
+                cursor.execute(sql, params)
+                rows = cursor.fetchall() if cursor.description else []
+        finally:
+            pool.putconn(conn)
+        if self.ttl > 0:
+            with self._lock:
+                if len(self.entries) >= self.max_entries:
+                    self._evict(now)
+                self.entries[key] = CacheEntry(rows=rows, created=now, tags=self.get_tags(sql))
+        return rows
+
+    def _evict(self, now: float) -> None:
+        expired = [k for k, v in self.entries.items() if not self._is_valid(v, now)]
+        if not expired:
+            # drop the oldest entry
+            expired = [min(self.entries.keys(), key=lambda k: self.entries[k].created)]
+        for key in expired:
+            del self.entries[key]
+        self.statistics.evictions += len(expired)
+
+    def invalidate(self, *tags: str) -> None:
+        # marks all entries stale that were read from one of these tables
+        now = time.monotonic()
+        with self._lock:
+            for tag in tags:
+                self.versions[tag.lower()] = now
+            self.statistics.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self.entries.clear()
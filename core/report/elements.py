@@ -5,11 +5,12 @@ import inspect
 import numpy as np
 import os
 import psycopg2
+import psycopg2.extras
 import sys
 import uuid
 from abc import ABC, abstractmethod
-from contextlib import closing
 from core import utils
+from core.report.cache import QueryCache
 from core.report.env import ReportEnv
 from core.report.errors import UnknownGraphElement, ClassNotFound, TooManyElements, UnknownValue, NothingToPlot
 from core.report.utils import parse_params
@@ -29,6 +30,11 @@ class ReportElement(ABC):
         self.log = env.bot.log
         self.pool = env.bot.pool
 
+    def query(self, sql: str, params: Union[dict, tuple, None] = None, *,
+              cursor_factory=psycopg2.extras.DictCursor) -> list:
+        # results are shared between all reports that run the same query with the same parameters
+        return QueryCache().fetch(self.pool, sql, params, cursor_factory=cursor_factory, element=type(self).__name__)
+
     @abstractmethod
     def render(self, **kwargs):
         pass
@@ -203,48 +209,39 @@ class Graph(ReportElement):
 
 class SQLField(EmbedElement):
     def render(self, sql: str, inline: Optional[bool] = True):
-        conn = self.pool.getconn()
         try:
-            with closing(conn.cursor(cursor_factory=psycopg2.extras.DictCursor)) as cursor:
-                cursor.execute(utils.format_string(sql, **self.env.params), self.env.params)
-                if cursor.rowcount > 0:
-                    row = cursor.fetchone()
-                    name = list(row.keys())[0]
-                    value = row[0]
-                    self.add_field(name=name, value=value, inline=inline)
+            rows = self.query(utils.format_string(sql, **self.env.params), self.env.params)
+            if rows:
+                row = rows[0]
+                name = list(row.keys())[0]
+                value = row[0]
+                self.add_field(name=name, value=value, inline=inline)
         except psycopg2.DatabaseError as error:
             self.log.exception(error)
-        finally:
-            self.pool.putconn(conn)
 
 
 class SQLTable(EmbedElement):
     def render(self, sql: str, inline: Optional[bool] = True):
-        conn = self.pool.getconn()
         try:
-            with closing(conn.cursor(cursor_factory=psycopg2.extras.DictCursor)) as cursor:
-                cursor.execute(utils.format_string(sql, **self.env.params), self.env.params)
-                header = None
-                cols = []
-                elements = 0
-                for row in cursor.fetchall():
-                    elements = len(row)
-                    if not header:
-                        header = list(row.keys())
-                    for i in range(0, elements):
-                        if len(cols) <= i:
-                            cols.append(str(row[i]) + '\n')
-                        else:
-                            cols[i] += str(row[i]) + '\n'
+            header = None
+            cols = []
+            elements = 0
+            for row in self.query(utils.format_string(sql, **self.env.params), self.env.params):
+                elements = len(row)
+                if not header:
+                    header = list(row.keys())
                 for i in range(0, elements):
-                    self.add_field(name=header[i], value=cols[i], inline=inline)
-                if elements % 3 and inline:
-                    for i in range(0, 3 - elements % 3):
-                        self.add_field(name='_ _', value='_ _')
+                    if len(cols) <= i:
+                        cols.append(str(row[i]) + '\n')
+                    else:
+                        cols[i] += str(row[i]) + '\n'
+            for i in range(0, elements):
+                self.add_field(name=header[i], value=cols[i], inline=inline)
+            if elements % 3 and inline:
+                for i in range(0, 3 - elements % 3):
+                    self.add_field(name='_ _', value='_ _')
         except psycopg2.DatabaseError as error:
             self.log.exception(error)
-        finally:
-            self.pool.putconn(conn)
 
 
 class BarChart(GraphElement):
@@ -290,24 +287,21 @@ class BarChart(GraphElement):
 
 class SQLBarChart(BarChart):
     def render(self, sql: str):
-        conn = self.pool.getconn()
         try:
-            with closing(conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)) as cursor:
-                cursor.execute(utils.format_string(sql, **self.env.params), self.env.params)
-                if cursor.rowcount == 1:
-                    super().render(cursor.fetchone())
-                elif cursor.rowcount > 1:
-                    values = {}
-                    for row in cursor.fetchall():
-                        d = list(row.values())
-                        values[d[0]] = d[1]
-                    super().render(values)
-                else:
-                    super().render({})
+            rows = self.query(utils.format_string(sql, **self.env.params), self.env.params,
+                              cursor_factory=psycopg2.extras.RealDictCursor)
+            if len(rows) == 1:
+                super().render(rows[0])
+            elif len(rows) > 1:
+                values = {}
+                for row in rows:
+                    d = list(row.values())
+                    values[d[0]] = d[1]
+                super().render(values)
+            else:
+                super().render({})
         except psycopg2.DatabaseError as error:
             self.log.exception(error)
-        finally:
-            self.pool.putconn(conn)
 
 
 class PieChart(GraphElement):
@@ -346,21 +340,18 @@ class PieChart(GraphElement):
 
 class SQLPieChart(PieChart):
     def render(self, sql: str):
-        conn = self.pool.getconn()
         try:
-            with closing(conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)) as cursor:
-                cursor.execute(utils.format_string(sql, **self.env.params), self.env.params)
-                if cursor.rowcount == 1:
-                    super().render(cursor.fetchone())
-                elif cursor.rowcount > 1:
-                    values = {}
-                    for row in cursor.fetchall():
-                        d = list(row.values())
-                        values[d[0]] = d[1]
-                    super().render(values)
-                else:
-                    super().render({})
+            rows = self.query(utils.format_string(sql, **self.env.params), self.env.params,
+                              cursor_factory=psycopg2.extras.RealDictCursor)
+            if len(rows) == 1:
+                super().render(rows[0])
+            elif len(rows) > 1:
+                values = {}
+                for row in rows:
+                    d = list(row.values())
+                    values[d[0]] = d[1]
+                super().render(values)
+            else:
+                super().render({})
         except psycopg2.DatabaseError as error:
             self.log.exception(error)
-        finally:
-            self.pool.putconn(conn)
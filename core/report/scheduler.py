@@ -0,0 +1,120 @@
+from __future__ import annotations
+import asyncio
+import discord
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Optional, TYPE_CHECKING
+
+from .utils import snapshot
+
+if TYPE_CHECKING:
+    from core import DCSServerBot
+    from .base import PersistentReport
+
+__all__ = ['RefreshScheduler']
+
+
+@dataclass(order=True)
+class RefreshJob:
+    priority: int
+    due: float
+    key: tuple[str, str] = field(compare=False)
+    report: PersistentReport = field(compare=False)
+    kwargs: dict = field(compare=False)
+    interval: float = field(compare=False)
+    dirty: bool = field(default=True, compare=False)
+    last_run: float = field(default=0.0, compare=False)
+    digest: Optional[str] = field(default=None, compare=False)
+
+
+class RefreshScheduler:
+    """
+    Refreshes persistent reports. Every event only marks its report dirty, the report is then rendered at most once per
+    interval with the parameters of the latest event. Dirty reports are rendered one by one in the order of their
+    priority (lowest first) in the bots executor, and the Discord message is only edited if the result changed.
+    The reports get a snapshot of their parameters, as the events keep changing the live objects, like the server and
+    its players, while the report is rendered.
+    """
+
+    def __init__(self, bot: DCSServerBot):
+        self.bot = bot
+        self.log = bot.log
+        self.jobs: dict[tuple[str, str], RefreshJob] = dict()
+        self.renders = 0
+        self.skipped = 0
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+
+    def schedule(self, report: PersistentReport, priority: int, interval: float, kwargs: dict) -> None:
+        key = (report.server.name, report.embed_name)
+        job = self.jobs.get(key)
+        if not job:
+            job = self.jobs[key] = RefreshJob(priority=priority, due=0.0, key=key, report=report, kwargs=kwargs,
+                                              interval=interval)
+        else:
+            job.report = report
+            job.kwargs = kwargs
+            job.priority = priority
+            job.interval = interval
+            job.dirty = True
+        job.due = job.last_run + job.interval
+        if not self._task or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        self._wakeup.set()
+
+    @staticmethod
+    def _digest(embed: discord.Embed, filename: Optional[str]) -> str:
+        data = json.dumps(embed.to_dict(), sort_keys=True, default=str)
+        if filename:
+            # graphs are attached with a random name
+            data = data.replace(os.path.basename(filename), '')
+        digest = hashlib.sha256(data.encode('utf-8'))
+        if filename:
+            with open(filename, 'rb') as file:
+                digest.update(file.read())
+        return digest.hexdigest()
+
+    async def _refresh(self, job: RefreshJob) -> None:
+        report = job.report
+        job.dirty = False
+        job.last_run = time.monotonic()
+        await report.prepare(**job.kwargs)
+        report.env.params = snapshot(report.env.params)
+        env = await asyncio.get_running_loop().run_in_executor(self.bot.executor, report._render)
+        self.renders += 1
+        file = None
+        try:
+            digest = self._digest(env.embed, env.filename)
+            if digest == job.digest:
+                self.skipped += 1
+                return
+            file = discord.File(env.filename, filename=os.path.basename(env.filename)) if env.filename else None
+            await report.server.setEmbed(report.embed_name, env.embed, file, channel_id=report.channel_id)
+            job.digest = digest
+        finally:
+            if file:
+                file.close()
+            if env.filename and os.path.exists(env.filename):
+                os.remove(env.filename)
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            now = time.monotonic()
+            due = sorted(job for job in self.jobs.values() if job.dirty and job.due <= now)
+            for job in due:
+                try:
+                    await self._refresh(job)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as ex:
+                    self.log.exception(ex)
+            pending = [job.due for job in self.jobs.values() if job.dirty]
+            timeout = max(min(pending) - time.monotonic(), 0.01) if pending else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
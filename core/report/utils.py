@@ -1,12 +1,32 @@
 import asyncio
+import copy
 
 import psycopg2
 from contextlib import closing
 from core import utils
+from core.data.dataobject import DataObject
 from core.report.errors import ValueNotInRange
 from typing import Any, List, Tuple
 
 
+def snapshot(value: Any, depth: int = 4) -> Any:
+    # copies data objects and plain containers, so that a report can be rendered outside of the event loop, while
+    # the events keep changing the originals
+    if depth == 0:
+        return value
+    if isinstance(value, DataObject):
+        obj = copy.copy(value)
+        for name, attr in vars(obj).items():
+            if isinstance(attr, DataObject) or type(attr) in (dict, list, set, tuple):
+                obj.__dict__[name] = snapshot(attr, depth - 1)
+        return obj
+    elif type(value) is dict:
+        return {k: snapshot(v, depth - 1) for k, v in value.items()}
+    elif type(value) in (list, set, tuple):
+        return type(value)(snapshot(x, depth - 1) for x in value)
+    return value
+
+
 def parse_params(kwargs: dict, params: Tuple[dict, List]):
     new_args = kwargs.copy()
     if isinstance(params, dict):
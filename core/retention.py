@@ -0,0 +1,181 @@
+from __future__ import annotations
+import asyncio
+import fnmatch
+import gzip
+import os
+import shutil
+import time
+from dataclasses import dataclass, field
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from core import DCSServerBot
+
+__all__ = ['RetentionPolicy', 'RetentionService']
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    path: str
+    pattern: str = '*'
+    # days, bytes and number of files, whatever applies first
+    max_age: Optional[float] = None
+    max_size: Optional[int] = None
+    max_count: Optional[int] = None
+    # files older than this (in days) are gzip'ed before they are deleted later on
+    compress_after: Optional[float] = None
+
+
+@dataclass
+class FileEntry:
+    size: int
+    mtime: float
+
+
+@dataclass
+class RetentionState:
+    policy: RetentionPolicy
+    # the catalog of the directory, it is only read again if the directory changed
+    catalog: dict[str, FileEntry] = field(default_factory=dict)
+    dir_mtime: float = 0.0
+    deleted: int = 0
+    compressed: int = 0
+    freed: int = 0
+
+
+class RetentionService:
+    """
+    Cleans up directories that grow with every mission, like Tacview exports or trapsheets. Each directory is checked
+    in the bots executor once per interval against its policy. Files are only read again, if the directory changed.
+    """
+
+    def __init__(self, bot: DCSServerBot, *, interval: float = 3600.0):
+        self.bot = bot
+        self.log = bot.log
+        self.interval = interval
+        self.states: dict[tuple[str, str], RetentionState] = dict()
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+
+    def register(self, policy: RetentionPolicy) -> None:
+        # servers sharing a directory share its policy, the latest registration wins
+        path = os.path.normpath(os.path.expandvars(policy.path))
+        key = (path.casefold(), policy.pattern)
+        state = self.states.get(key)
+        if state and state.policy == policy:
+            return
+        if state:
+            state.policy = policy
+        else:
+            self.states[key] = RetentionState(policy=policy)
+        if not self._task or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        self._wakeup.set()
+
+    def unregister(self, policy: RetentionPolicy) -> None:
+        path = os.path.normpath(os.path.expandvars(policy.path))
+        self.states.pop((path.casefold(), policy.pattern), None)
+
+    @staticmethod
+    def _scan(state: RetentionState, path: str) -> None:
+        dir_mtime = os.stat(path).st_mtime
+        if dir_mtime == state.dir_mtime:
+            return
+        catalog = dict()
+        with os.scandir(path) as it:
+            for entry in it:
+                if not entry.is_file() or not fnmatch.fnmatch(entry.name, state.policy.pattern):
+                    continue
+                # scandir returns the stats without additional calls on Windows
+                stat = entry.stat()
+                catalog[entry.name] = FileEntry(size=stat.st_size, mtime=stat.st_mtime)
+        state.catalog = catalog
+        state.dir_mtime = dir_mtime
+
+    @staticmethod
+    def _is_unchanged(filename: str, entry: FileEntry) -> bool:
+        # files that are still written to (like logs) have to be checked again before they are touched
+        try:
+            stat = os.stat(filename)
+            return stat.st_mtime == entry.mtime and stat.st_size == entry.size
+        except FileNotFoundError:
+            return False
+
+    def _delete(self, state: RetentionState, path: str, name: str) -> None:
+        entry = state.catalog.pop(name)
+        filename = os.path.join(path, name)
+        if not self._is_unchanged(filename, entry):
+            # will be picked up again with the next scan
+            state.dir_mtime = 0.0
+            return
+        os.remove(filename)
+        state.deleted += 1
+        state.freed += entry.size
+
+    def _compress(self, state: RetentionState, path: str, name: str) -> None:
+        entry = state.catalog.pop(name)
+        filename = os.path.join(path, name)
+        if not self._is_unchanged(filename, entry):
+            state.dir_mtime = 0.0
+            return
+        with open(filename, 'rb') as infile, gzip.open(filename + '.gz', 'wb') as outfile:
+            shutil.copyfileobj(infile, outfile)
+        # keep the timestamp, so that the age of the file is still known
+        shutil.copystat(filename, filename + '.gz')
+        os.remove(filename)
+        size = os.path.getsize(filename + '.gz')
+        if fnmatch.fnmatch(name + '.gz', state.policy.pattern):
+            state.catalog[name + '.gz'] = FileEntry(size=size, mtime=entry.mtime)
+        state.compressed += 1
+        state.freed += entry.size - size
+
+    def _apply(self, state: RetentionState) -> tuple[int, int]:
+        policy = state.policy
+        path = os.path.normpath(os.path.expandvars(policy.path))
+        if not os.path.isdir(path):
+            return 0, 0
+        files, freed = state.deleted + state.compressed, state.freed
+        self._scan(state, path)
+        now = time.time()
+        if policy.max_age is not None:
+            for name in [k for k, v in state.catalog.items() if v.mtime < now - policy.max_age * 86400]:
+                self._delete(state, path, name)
+        if policy.compress_after is not None:
+            for name in [k for k, v in state.catalog.items()
+                         if v.mtime < now - policy.compress_after * 86400 and not k.endswith('.gz')]:
+                self._compress(state, path, name)
+        if policy.max_count is not None or policy.max_size is not None:
+            total = sum(x.size for x in state.catalog.values())
+            # oldest first
+            for name in sorted(state.catalog.keys(), key=lambda x: state.catalog[x].mtime):
+                if (policy.max_count is None or len(state.catalog) <= policy.max_count) and \
+                        (policy.max_size is None or total <= policy.max_size):
+                    break
+                total -= state.catalog[name].size
+                self._delete(state, path, name)
+        files = state.deleted + state.compressed - files
+        return files, state.freed - freed
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._wakeup.clear()
+            for state in list(self.states.values()):
+                try:
+                    files, freed = await loop.run_in_executor(self.bot.executor, self._apply, state)
+                    if files:
+                        self.log.info(f'- Retention: {files} files deleted or compressed in {state.policy.path}, '
+                                      f'{freed / 1048576:.1f} MB freed.')
+                except asyncio.CancelledError:
+                    raise
+                except Exception as ex:
+                    self.log.exception(ex)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,156 @@
+from __future__ import annotations
+import asyncio
+import psycopg2
+from contextlib import closing
+from dataclasses import dataclass
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from core import DCSServerBot, Player
+
+__all__ = ['PlayerRecord', 'SessionCache']
+
+# seconds between two writes of the players' last_seen and names
+FLUSH_INTERVAL = 30.0
+
+
+@dataclass
+class PlayerRecord:
+    discord_id: int
+    banned: bool
+    manual: bool
+    coalition: Optional[str]
+
+
+class SessionCache:
+    """
+    Holds what a player needs from the database while they are connected. Players that are reported together, like on
+    server registration, are read and upserted in one go. Names and last_seen are written behind in batches, and the
+    automatch runs in the background, as it has to go through all Discord members. Whoever needs its result can wait
+    for it.
+    """
+
+    def __init__(self, bot: DCSServerBot, *, interval: float = FLUSH_INTERVAL):
+        self.bot = bot
+        self.log = bot.log
+        self.pool = bot.pool
+        self.interval = interval
+        # records that were read ahead and not picked up by their player yet
+        self.records: dict[str, PlayerRecord] = dict()
+        # ucid => latest name of players that have been seen since the last flush
+        self.dirty: dict[str, Optional[str]] = dict()
+        self.matches: asyncio.Queue[Player] = asyncio.Queue()
+        # ucid => pending automatch, for the ones that have to wait for its result
+        self.pending: dict[str, asyncio.Future] = dict()
+        self._flusher: Optional[asyncio.Task] = None
+        self._matcher: Optional[asyncio.Task] = None
+
+    def hydrate(self, players: list[tuple[str, str]]) -> None:
+        # registers the players (ucid, name) and reads their data with one statement each
+        if not players:
+            return
+        ucids = [x[0] for x in players]
+        conn = self.pool.getconn()
+        try:
+            with closing(conn.cursor()) as cursor:
+                cursor.execute('INSERT INTO players (ucid, discord_id, name, last_seen) SELECT x.ucid, -1, x.name, '
+                               'NOW() FROM UNNEST(%s::TEXT[], %s::TEXT[]) AS x(ucid, name) ON CONFLICT (ucid) DO '
+                               'UPDATE SET name=excluded.name, last_seen=excluded.last_seen',
+                               (ucids, [x[1] for x in players]))
+                cursor.execute('SELECT p.ucid, p.discord_id, CASE WHEN b.ucid IS NOT NULL THEN TRUE ELSE FALSE END '
+                               'AS banned, p.manual, c.coalition FROM players p LEFT OUTER JOIN bans b ON '
+                               'p.ucid = b.ucid LEFT OUTER JOIN coalitions c ON p.ucid = c.player_ucid '
+                               'WHERE p.ucid = ANY(%s::TEXT[])', (ucids, ))
+                for row in cursor.fetchall():
+                    self.records[row[0]] = PlayerRecord(discord_id=row[1], banned=row[2], manual=row[3],
+                                                        coalition=row[4])
+            conn.commit()
+        except (Exception, psycopg2.DatabaseError) as error:
+            conn.rollback()
+            self.log.exception(error)
+        finally:
+            self.pool.putconn(conn)
+
+    def get(self, ucid: str, name: str) -> Optional[PlayerRecord]:
+        if ucid not in self.records:
+            self.hydrate([(ucid, name)])
+        return self.records.pop(ucid, None)
+
+    def touch(self, ucid: str, name: Optional[str] = None) -> None:
+        # a name change wins over an update without a name
+        self.dirty[ucid] = name or self.dirty.get(ucid)
+        if not self._flusher or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_later())
+
+    def _write(self, dirty: dict[str, Optional[str]]) -> bool:
+        conn = self.pool.getconn()
+        try:
+            with closing(conn.cursor()) as cursor:
+                cursor.execute('UPDATE players p SET name = COALESCE(x.name, p.name), last_seen = NOW() FROM '
+                               'UNNEST(%s::TEXT[], %s::TEXT[]) AS x(ucid, name) WHERE p.ucid = x.ucid',
+                               (list(dirty.keys()), list(dirty.values())))
+            conn.commit()
+            return True
+        except (Exception, psycopg2.DatabaseError) as error:
+            conn.rollback()
+            self.log.exception(error)
+            return False
+        finally:
+            self.pool.putconn(conn)
+
+    def _retry(self, dirty: dict[str, Optional[str]]) -> None:
+        # try again with the next flush, newer changes win
+        self.dirty = dirty | self.dirty
+
+    def flush(self) -> None:
+        # dirty is only touched on the event loop, the executor gets a snapshot
+        dirty, self.dirty = self.dirty, dict()
+        if dirty and not self._write(dirty):
+            self._retry(dirty)
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.interval)
+        dirty, self.dirty = self.dirty, dict()
+        if dirty and not await asyncio.get_running_loop().run_in_executor(self.bot.executor, self._write, dirty):
+            self._retry(dirty)
+            self._flusher = asyncio.create_task(self._flush_later())
+
+    def automatch(self, player: Player) -> None:
+        if player.ucid not in self.pending:
+            self.pending[player.ucid] = asyncio.get_running_loop().create_future()
+        self.matches.put_nowait(player)
+        if not self._matcher or self._matcher.done():
+            self._matcher = asyncio.create_task(self._match())
+
+    async def wait_for_match(self, player: Player) -> None:
+        # returns as soon as a pending automatch of this player is done
+        future = self.pending.get(player.ucid)
+        if future:
+            await asyncio.shield(future)
+
+    async def _match(self):
+        while True:
+            player = await self.matches.get()
+            try:
+                # the player might have been linked or left in the meantime
+                if player.member or player.server.get_player(ucid=player.ucid) is not player:
+                    continue
+                member = await asyncio.get_running_loop().run_in_executor(
+                    self.bot.executor, self.bot.match_user, {"ucid": player.ucid, "name": player.name})
+                if member and not player.member:
+                    player.member = member
+            except Exception as ex:
+                self.log.exception(ex)
+            finally:
+                future = self.pending.pop(player.ucid, None)
+                if future and not future.done():
+                    future.set_result(None)
+
+    async def close(self) -> None:
+        for task in [self._flusher, self._matcher]:
+            if task:
+                task.cancel()
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+        self.flush()
@@ -0,0 +1,97 @@
+from __future__ import annotations
+import asyncio
+import json
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from core import DCSServerBot
+
+
+@dataclass
+class RoundTripStatistics:
+    requests: int = 0
+    timeouts: int = 0
+    retries: int = 0
+    last: float = 0.0
+    avg: float = 0.0
+    min: float = 0.0
+    max: float = 0.0
+
+    def add(self, rtt: float) -> None:
+        self.last = rtt
+        if not self.requests:
+            self.avg = self.min = self.max = rtt
+        else:
+            # exponential moving average, so that the value follows the current load of the server
+            self.avg = 0.9 * self.avg + 0.1 * rtt
+            self.min = min(self.min, rtt)
+            self.max = max(self.max, rtt)
+        self.requests += 1
+
+
+class UDPTransport:
+
+    def __init__(self, bot: DCSServerBot, name: str, host: str, port: int):
+        self.bot = bot
+        self.log = bot.log
+        self.name = name
+        self.host = host
+        self.port = int(port)
+        self.statistics = RoundTripStatistics()
+        self._socket: Optional[socket.socket] = None
+        self._lock = threading.Lock()
+
+    def send(self, message: dict) -> None:
+        msg = json.dumps(message)
+        self.log.debug(f"HOST->{self.name}: {msg}")
+        with self._lock:
+            if not self._socket:
+                self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            try:
+                self._socket.sendto(msg.encode('utf-8'), (self.host, self.port))
+            except OSError:
+                # recreate the socket on the next send
+                self._socket.close()
+                self._socket = None
+                raise
+
+    async def request(self, message: dict, timeout: Optional[float] = 5.0, retries: int = 0) -> dict:
+        future = self.bot.loop.create_future()
+        token = 'sync-' + str(uuid.uuid4())
+        message['channel'] = token
+        self.bot.listeners[token] = future
+        start = time.perf_counter()
+        try:
+            # the timeout is split across all attempts, so the caller never waits longer than requested
+            attempt_timeout = timeout / (retries + 1) if timeout else None
+            for attempt in range(retries + 1):
+                if attempt:
+                    self.statistics.retries += 1
+                self.send(message)
+                try:
+                    result = await asyncio.wait_for(asyncio.shield(future), attempt_timeout)
+                    self.statistics.add(time.perf_counter() - start)
+                    return result
+                except asyncio.TimeoutError:
+                    if attempt == retries:
+                        self.statistics.timeouts += 1
+                        raise
+        finally:
+            del self.bot.listeners[token]
+            if not future.done():
+                future.cancel()
+
+    async def request_many(self, messages: list[dict], timeout: Optional[float] = 5.0, retries: int = 0) -> list[dict]:
+        # pipeline all requests, so that the total time is the slowest reply and not the sum of all
+        return await asyncio.gather(*[self.request(message, timeout, retries) for message in messages])
+
+    def close(self) -> None:
+        with self._lock:
+            if self._socket:
+                self._socket.close()
+                self._socket = None
@@ -12,6 +12,7 @@ config = reload()
 
 from .campaigns import *
 from .coalitions import *
+from .deploy import *
 from .dcs import *
 from .discord import *
 from .helper import *
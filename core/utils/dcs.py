@@ -11,6 +11,7 @@ from contextlib import closing
 from core.const import SAVED_GAMES
 from typing import Optional, List, Tuple
 from . import config
+from .deploy import Deployment, deploy, verify
 from .. import utils
 
 REGEXP = {
@@ -58,6 +59,59 @@ def getInstalledVersion(path: str) -> Tuple[Optional[str], Optional[str]]:
     return branch, version
 
 
+def render_hook_config(installation: str) -> str:
+    lines = []
+    with open(r'Scripts/net/DCSServerBot/DCSServerBotConfig.lua.tmpl', 'r') as template:
+        for line in template.readlines():
+            s = line.find('{')
+            e = line.find('}')
+            if s != -1 and e != -1 and (e - s) > 1:
+                param = line[s + 1:e].split('.')
+                if len(param) == 2:
+                    if param[0] == 'BOT' and param[1] == 'HOST' and config[param[0]][param[1]] == '0.0.0.0':
+                        line = line.replace('{' + '.'.join(param) + '}', '127.0.0.1')
+                    else:
+                        line = line.replace('{' + '.'.join(param) + '}', config[param[0]][param[1]])
+                elif len(param) == 1:
+                    line = line.replace('{' + '.'.join(param) + '}', config[installation][param[0]])
+            lines.append(line)
+    return ''.join(lines)
+
+
+def get_scripts_path(installation: str) -> str:
+    return os.path.expandvars(config[installation]['DCS_HOME'] + '\\Scripts')
+
+
+def install_hooks(installation: str, check: bool = False) -> Deployment:
+    # the generated configuration is part of the deployment, so config changes are deployed, too
+    return deploy('./Scripts', get_scripts_path(installation),
+                  ignore=shutil.ignore_patterns('DCSServerBotConfig.lua.tmpl'),
+                  generated={'net/DCSServerBot/DCSServerBotConfig.lua': render_hook_config(installation)},
+                  check=check)
+
+
+def install_luas(installation: str, plugin_name: str, check: bool = False) -> Optional[Deployment]:
+    source_path = f'./plugins/{plugin_name}/lua'
+    if not os.path.exists(source_path):
+        return None
+    return deploy(source_path, get_scripts_path(installation) + f'\\net\\DCSServerBot\\{plugin_name}', check=check)
+
+
+def verify_installation(installation: str, plugins: list[str]) -> list[str]:
+    # redeploys every hook or plugin lua that is missing or was modified since the last deployment
+    repaired = []
+    scripts = get_scripts_path(installation)
+    if verify(scripts):
+        deployment = install_hooks(installation, check=True)
+        repaired.extend(deployment.copied)
+    for plugin_name in plugins:
+        if verify(scripts + f'\\net\\DCSServerBot\\{plugin_name}'):
+            deployment = install_luas(installation, plugin_name, check=True)
+            if deployment:
+                repaired.extend([f'{plugin_name}/{x}' for x in deployment.copied])
+    return repaired
+
+
 def get_all_servers(self) -> list[str]:
     retval: list[str] = list()
     conn = self.pool.getconn()
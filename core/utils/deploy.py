@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import shutil
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+MANIFEST = '.dcsserverbot.manifest'
+
+
+@dataclass
+class Deployment:
+    copied: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    failed: list[str] = field(default_factory=list)
+    unchanged: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return len(self.copied) > 0 or len(self.removed) > 0
+
+
+def hash_file(filename: str) -> Optional[str]:
+    try:
+        with open(filename, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def read_manifest(target: str) -> dict[str, str]:
+    try:
+        with open(os.path.join(target, MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_manifest(target: str, manifest: dict[str, str]) -> None:
+    filename = os.path.join(target, MANIFEST)
+    with open(filename + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(filename + '.tmp', filename)
+
+
+def _write_atomic(filename: str, *, source: Optional[str] = None, content: Optional[bytes] = None) -> None:
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    tmp = filename + '.tmp'
+    if source:
+        shutil.copyfile(source, tmp)
+    else:
+        with open(tmp, 'wb') as f:
+            f.write(content)
+    try:
+        os.replace(tmp, filename)
+    except OSError:
+        os.remove(tmp)
+        raise
+
+
+def deploy(source: str, target: str, *, ignore: Optional[Callable] = None,
+           generated: Optional[dict[str, str]] = None, check: bool = False) -> Deployment:
+    """
+    Copies all files from source to target that have changed since the last deployment, removes files that were
+    deployed before but are no longer part of source and records the result in a manifest inside target.
+    Generated files (relative path => content) are deployed like any other file.
+    If check is set, the content of target is compared instead of trusting the manifest.
+    """
+    result = Deployment()
+    old = read_manifest(target)
+    new: dict[str, str] = {}
+    files: dict[str, tuple[Optional[str], Optional[bytes]]] = {}
+    for root, dirs, filenames in os.walk(source):
+        ignored = ignore(root, dirs + filenames) if ignore else set()
+        dirs[:] = [x for x in dirs if x not in ignored]
+        for name in filenames:
+            if name not in ignored:
+                path = os.path.join(root, name)
+                files[os.path.relpath(path, source).replace('\\', '/')] = (path, None)
+    for name, content in (generated or {}).items():
+        files[name] = (None, content.encode('utf-8'))
+    for name, (path, content) in files.items():
+        checksum = hash_file(path) if path else hashlib.sha256(content).hexdigest()
+        filename = os.path.join(target, *name.split('/'))
+        # the manifest avoids reading the target, a missing manifest entry falls back to a comparison
+        if (not check and old.get(name) == checksum and os.path.exists(filename)) or \
+                ((check or name not in old) and hash_file(filename) == checksum):
+            new[name] = checksum
+            result.unchanged += 1
+            continue
+        try:
+            _write_atomic(filename, source=path, content=content)
+            new[name] = checksum
+            result.copied.append(name)
+        except OSError:
+            # most likely opened by a running DCS, keep the old state to retry on the next deployment
+            if name in old:
+                new[name] = old[name]
+            result.failed.append(name)
+    for name in old.keys() - files.keys():
+        try:
+            os.remove(os.path.join(target, *name.split('/')))
+            result.removed.append(name)
+        except FileNotFoundError:
+            result.removed.append(name)
+        except OSError:
+            new[name] = old[name]
+            result.failed.append(name)
+    if result.changed or new != old:
+        os.makedirs(target, exist_ok=True)
+        write_manifest(target, new)
+    return result
+
+
+def verify(target: str) -> list[str]:
+    # returns all deployed files that are missing or were changed since the deployment
+    return [
+        name for name, checksum in read_manifest(target).items()
+        if hash_file(os.path.join(target, *name.split('/'))) != checksum
+    ]
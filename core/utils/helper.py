@@ -1,25 +1,34 @@
 import importlib
 import json
 import string
-from datetime import datetime, timedelta
-from typing import Optional
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional, Tuple
 
 
-def is_in_timeframe(time: datetime, timeframe: str) -> bool:
-    def parse_time(time_str: str) -> datetime:
+@lru_cache(maxsize=None)
+def parse_timeframe(timeframe: str) -> Tuple[int, int]:
+    # returns the start and end of a timeframe like "18:00-24:00" in minutes of the day
+    def parse_time(time_str: str) -> int:
         fmt, time_str = ('%H:%M', time_str.replace('24:', '00:')) \
             if time_str.find(':') > -1 else ('%H', time_str.replace('24', '00'))
-        return datetime.strptime(time_str, fmt)
+        t = datetime.strptime(time_str, fmt)
+        return t.hour * 60 + t.minute
 
     pos = timeframe.find('-')
     if pos != -1:
-        start_time = parse_time(timeframe[:pos])
-        end_time = parse_time(timeframe[pos+1:])
-        if end_time <= start_time:
-            end_time += timedelta(days=1)
+        return parse_time(timeframe[:pos]), parse_time(timeframe[pos+1:])
     else:
-        start_time = end_time = parse_time(timeframe)
-    check_time = time.replace(year=start_time.year, month=start_time.month, day=start_time.day, second=0, microsecond=0)
+        start_time = parse_time(timeframe)
+        return start_time, start_time
+
+
+def is_in_timeframe(time: datetime, timeframe: str) -> bool:
+    start_time, end_time = parse_timeframe(timeframe)
+    check_time = time.hour * 60 + time.minute
+    if '-' in timeframe and end_time <= start_time:
+        # timeframes that end on the next day are checked until midnight
+        return start_time <= check_time
     return start_time <= check_time <= end_time
 
 
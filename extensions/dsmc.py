@@ -37,6 +37,9 @@ class DSMC(Extension):
         return cfg
 
     async def prepare(self) -> bool:
+        return await self.bot.loop.run_in_executor(self.bot.executor, self._prepare)
+
+    def _prepare(self) -> bool:
         # we don't want to have DSMC
         if self.locals['DSMC_updateMissionList'] or self.locals['DSMC_AutosaveExit_time']:
             dcs_home = os.path.expandvars(self.bot.config[self.server.installation]['DCS_HOME'])
@@ -55,6 +58,9 @@ class DSMC(Extension):
         return True
 
     async def beforeMissionLoad(self) -> bool:
+        return await self.bot.loop.run_in_executor(self.bot.executor, self._beforeMissionLoad)
+
+    def _beforeMissionLoad(self) -> bool:
         filename = self.server.get_current_mission_file()
         if not filename or not filename.startswith('DSMC'):
             return False
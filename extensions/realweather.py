@@ -13,6 +13,10 @@ class RealWeather(Extension):
         return "1.5.0"
 
     async def beforeMissionLoad(self) -> bool:
+        # realweather.exe takes a while, so don't block the bot
+        return await self.bot.loop.run_in_executor(self.bot.executor, self._beforeMissionLoad)
+
+    def _beforeMissionLoad(self) -> bool:
         filename = None
         rw_home = os.path.expandvars(self.config['installation'])
         dcs_home = os.path.expandvars(self.bot.config[self.server.installation]['DCS_HOME'])
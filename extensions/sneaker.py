@@ -2,6 +2,7 @@ from __future__ import annotations
 import json
 import os
 import subprocess
+import threading
 from typing import Optional
 from core import Extension, report, DCSServerBot, Server, Status
 
@@ -10,6 +11,8 @@ class Sneaker(Extension):
     _instance = None
     _process = None
     _servers: set[str] = set()
+    # all servers share one Sneaker process
+    _lock = threading.Lock()
 
     def __new__(cls, bot: DCSServerBot, server: Server, config: dict) -> Sneaker:
         if cls._instance is None:
@@ -47,6 +50,14 @@ class Sneaker(Extension):
         if 'Tacview' not in self.server.options['plugins']:
             self.log.warning('Sneaker needs Tacview to be enabled in your server!')
             return False
+        await self.bot.loop.run_in_executor(self.bot.executor, self._startup)
+        return await self.check_running(force=True)
+
+    def _startup(self):
+        with self._lock:
+            self._do_startup()
+
+    def _do_startup(self):
         if 'config' not in self.config:
             self.create_config()
             if self._process:
@@ -61,9 +72,16 @@ class Sneaker(Extension):
                                                   os.path.expandvars(self.config['config'])],
                                                  executable=os.path.expandvars(self.config['cmd']))
         self._servers.add(self.server.name)
-        return self.is_running()
 
     async def shutdown(self) -> bool:
+        await self.bot.loop.run_in_executor(self.bot.executor, self._shutdown)
+        return True
+
+    def _shutdown(self):
+        with self._lock:
+            self._do_shutdown()
+
+    def _do_shutdown(self):
         self._servers.remove(self.server.name)
         if not self._servers:
             self._process.kill()
@@ -74,7 +92,6 @@ class Sneaker(Extension):
             cmd = os.path.basename(self.config['cmd'])
             self._process = subprocess.Popen([cmd, "--bind", self.config['bind'], "--config", 'config\\sneaker.json'],
                                              executable=os.path.expandvars(self.config['cmd']))
-        return True
 
     def is_running(self) -> bool:
         if self._process and self._process.poll():
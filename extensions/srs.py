@@ -12,13 +12,17 @@ class SRS(Extension):
         self.cfg = RawConfigParser()
         self.cfg.optionxform = str
         super().__init__(bot, server, config)
-        self.process = None
+        # the key SRS is tracked under in the process registry
+        self.key = f'SRS:{server.installation}'
 
     def load_config(self) -> Optional[dict]:
         self.cfg.read(os.path.expandvars(self.config['config']), encoding='utf-8')
         return {s: dict(self.cfg.items(s)) for s in self.cfg.sections()}
 
     async def prepare(self) -> bool:
+        return await self.bot.loop.run_in_executor(self.bot.executor, self._prepare)
+
+    def _prepare(self) -> bool:
         # Set SRS port if necessary
         dirty = False
         if 'port' in self.config and int(self.cfg['Server Settings']['SERVER_PORT']) != int(self.config['port']):
@@ -67,17 +71,18 @@ class SRS(Extension):
         if 'autostart' not in self.config or self.config['autostart']:
             self.log.debug(r'Launching SRS server with: "{}\SR-Server.exe" -cfg="{}"'.format(
                 os.path.expandvars(self.config['installation']), os.path.expandvars(self.config['config'])))
-            self.process = subprocess.Popen(['SR-Server.exe', '-cfg={}'.format(
-                os.path.expandvars(self.config['config']))],
-                                            executable=os.path.expandvars(self.config['installation']) + r'\SR-Server.exe')
-        return self.is_running()
+            p = await self.bot.loop.run_in_executor(self.bot.executor, lambda: subprocess.Popen(
+                ['SR-Server.exe', '-cfg={}'.format(os.path.expandvars(self.config['config']))],
+                executable=os.path.expandvars(self.config['installation']) + r'\SR-Server.exe'))
+            self.bot.processes.register(self.key, p.pid)
+        return await self.check_running(force=True)
 
     async def shutdown(self):
         if 'autostart' not in self.config or self.config['autostart']:
-            p = self.process or utils.find_process('SR-Server.exe', self.server.installation)
+            p = self.bot.processes.find(self.key, ['SR-Server.exe'], self.server.installation)
             if p:
                 p.kill()
-                self.process = None
+                self.bot.processes.unregister(self.key)
                 return True
             else:
                 return False
@@ -85,12 +90,8 @@ class SRS(Extension):
             return True
 
     def is_running(self) -> bool:
-        if self.process:
-            if not self.process.poll():
-                self.process = None
-                return False
-            else:
-                return True
+        if self.bot.processes.get(self.key):
+            return True
         server_ip = self.locals['Server Settings']['SERVER_IP'] if 'SERVER_IP' in self.locals['Server Settings'] else '127.0.0.1'
         if server_ip == '0.0.0.0':
             server_ip = '127.0.0.1'
@@ -117,7 +118,7 @@ class SRS(Extension):
                 red = self.locals['External AWACS Mode Settings']['EXTERNAL_AWACS_MODE_RED_PASSWORD']
                 if blue or red:
                     value += f'\n🔹 Pass: {blue}\n🔸 Pass: {red}'
-            embed.add_field(name="SRS (online)" if self.is_running() else "SRS (offline)", value=value)
+            embed.add_field(name="SRS (online)" if self.running else "SRS (offline)", value=value)
 
     def verify(self) -> bool:
         # check if SRS is installed
@@ -2,11 +2,9 @@ import asyncio
 import discord
 import os
 import re
-import time
 import win32api
 from collections import deque
-from core import Extension, report, Server
-from datetime import datetime, timedelta
+from core import Extension, report, Server, RetentionPolicy
 from typing import Optional
 
 
@@ -42,6 +40,9 @@ class Tacview(Extension):
         return options['Tacview']
 
     async def prepare(self) -> bool:
+        return await self.bot.loop.run_in_executor(self.bot.executor, self._prepare)
+
+    def _prepare(self) -> bool:
         dirty = False
         options = self.server.options['plugins']
         if 'tacviewExportPath' in self.config:
@@ -119,18 +120,14 @@ class Tacview(Extension):
 
     def schedule(self):
         # check if autodelete is configured
-        if 'delete_after' not in self.config:
-            return
-        # only run once a day
-        if self.lastrun > (datetime.now() - timedelta(days=1)):
+        if 'delete_after' not in self.config and 'max_size' not in self.config \
+                and 'compress_after' not in self.config:
             return
-        now = time.time()
         path = self.server.options['plugins']['Tacview']['tacviewExportPath'] or DEFAULT_DIR
-        for f in [os.path.join(path, x) for x in os.listdir(path)]:
-            if os.stat(f).st_mtime < (now - self.config['delete_after'] * 86400):
-                if os.path.isfile(f):
-                    os.remove(f)
-        self.lastrun = datetime.now()
+        self.bot.retention.register(RetentionPolicy(
+            path=path, max_age=self.config.get('delete_after'),
+            max_size=self.config['max_size'] * 1048576 if 'max_size' in self.config else None,
+            compress_after=self.config.get('compress_after')))
 
     def verify(self) -> bool:
         dll_installed = os.path.exists(os.path.expandvars(self.bot.config[self.server.installation]['DCS_HOME']) +
@@ -165,7 +162,12 @@ class Tacview(Extension):
         log = os.path.expandvars(self.bot.config[server.installation]['DCS_HOME']) + '/Logs/dcs.log'
         exp = re.compile(r'TACVIEW.DLL (.*): Successfully saved \[(?P<filename>.*)\]')
         filename = None
-        lines = deque(open(log, encoding='utf-8'), 50)
+
+        def tail() -> deque[str]:
+            with open(log, encoding='utf-8') as file:
+                return deque(file, 50)
+
+        lines = await self.bot.loop.run_in_executor(self.bot.executor, tail)
         for line in lines:
             match = exp.search(line)
             if match:
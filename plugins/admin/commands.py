@@ -11,10 +11,12 @@ import shutil
 import string
 import subprocess
 from contextlib import closing
-from core import utils, DCSServerBot, Plugin, Player, Status, Server, Coalition
+from datetime import datetime
+from core import utils, DCSServerBot, Plugin, Player, Status, Server, Coalition, QueryCache
 from discord import Interaction, SelectOption
 from discord.ext import commands, tasks
 from discord.ui import Select, View, Button, Modal, TextInput
+from io import BytesIO
 from pathlib import Path
 from typing import Union, List, Optional
 from zipfile import ZipFile
@@ -207,6 +209,7 @@ class Agent(Plugin):
                     server.rename(new_name=s.name.value, update_settings=True)
                     self.bot.servers[s.name.value] = server
                     del self.bot.servers[old_name]
+                    self.bot.dispatcher.remove(old_name)
                 server.settings['description'] = s.description.value
                 server.settings['password'] = s.password.value
                 server.settings['maxPlayers'] = int(s.max_player.value)
@@ -495,6 +498,95 @@ class Agent(Plugin):
             else:
                 await ctx.send(f"Usage: {ctx.prefix}shell <command>")
 
+    @commands.command(description='Shows the worst event loop stalls', usage='[export|clear]', hidden=True)
+    @utils.has_role('Admin')
+    @commands.guild_only()
+    async def stalls(self, ctx, param: Optional[str] = None):
+        server: Server = await self.bot.get_server(ctx)
+        if not server:
+            return
+        monitor = self.bot.monitor
+        if not monitor.is_alive():
+            await ctx.send('Loop monitoring is disabled. Set LOOP_MONITORING = true in your dcsserverbot.ini.')
+            return
+        if param and param.lower() == 'clear':
+            monitor.clear()
+            await ctx.send('Stall history cleared.')
+            return
+        if param and param.lower() == 'export':
+            file = discord.File(BytesIO(monitor.report().encode('utf-8')),
+                                filename=f"stalls-{platform.node()}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.txt")
+            await ctx.send(file=file)
+            return
+        embed = discord.Embed(title=f'Event Loop Stalls ({platform.node()})', color=discord.Color.blue())
+        embed.description = f'Latency: {monitor.latency * 1000:.1f} ms (max: {monitor.max_latency * 1000:.1f} ms)'
+        stalls = monitor.get_stalls()
+        if stalls:
+            times = durations = culprits = ''
+            for stall in stalls:
+                times += stall.timestamp.strftime('%d/%m %H:%M:%S') + '\n'
+                durations += f'{stall.duration:.2f}s\n'
+                culprits += stall.culprit[:40] + '\n'
+            embed.add_field(name='Time', value=times)
+            embed.add_field(name='Blocked', value=durations)
+            embed.add_field(name='Culprit', value=culprits)
+            embed.set_footer(text=f'Use {ctx.prefix}stalls export to download the stack traces.')
+        else:
+            embed.add_field(name='_ _', value='No stalls recorded.')
+        await ctx.send(embed=embed)
+
+    @commands.command(description='Shows the statistics of the report cache', usage='[clear]', hidden=True)
+    @utils.has_role('Admin')
+    @commands.guild_only()
+    async def cache(self, ctx, param: Optional[str] = None):
+        server: Server = await self.bot.get_server(ctx)
+        if not server:
+            return
+        cache = QueryCache()
+        if param and param.lower() == 'clear':
+            cache.clear()
+            await ctx.send('Report cache cleared.')
+            return
+        stats = cache.statistics
+        embed = discord.Embed(title=f'Report Cache ({platform.node()})', color=discord.Color.blue())
+        embed.description = f'TTL: {cache.ttl}s, {len(cache.entries)} of {cache.max_entries} entries in use'
+        embed.add_field(name='Hits', value=f'{stats.hits} ({stats.ratio * 100:.1f}%)')
+        embed.add_field(name='Misses', value=str(stats.misses))
+        embed.add_field(name='Invalidations', value=str(stats.invalidations))
+        await ctx.send(embed=embed)
+
+    @commands.command(description='Shows the traffic between the bot and its DCS servers', hidden=True)
+    @utils.has_role('Admin')
+    @commands.guild_only()
+    async def traffic(self, ctx):
+        server: Server = await self.bot.get_server(ctx)
+        if not server:
+            return
+        embed = discord.Embed(title=f'DCS Traffic ({platform.node()})', color=discord.Color.blue())
+        events = self.bot.dispatcher.get_statistics()
+        names = rtts = errors = queues = ''
+        for server_name, server in self.bot.servers.items():
+            stats = server.transport.statistics
+            names += server_name[:40] + '\n'
+            if stats.requests:
+                rtts += f'{stats.avg * 1000:.0f} / {stats.max * 1000:.0f} ms\n'
+            else:
+                rtts += 'n/a\n'
+            errors += f'{stats.timeouts} / {stats.retries}\n'
+            queue = events.get(server_name, {})
+            queues += f"{queue.get('queued', 0)} / {queue.get('pending', 0)} / {queue.get('dropped', 0)} / " \
+                      f"{queue.get('coalesced', 0)}\n"
+        if names:
+            embed.add_field(name='Server', value=names)
+            embed.add_field(name='Round Trip (avg / max)', value=rtts)
+            embed.add_field(name='Timeouts / Retries', value=errors)
+            embed.add_field(name='Server', value=names)
+            embed.add_field(name='Events (queued / running / dropped / coalesced)', value=queues)
+            embed.add_field(name='_ _', value='_ _')
+        else:
+            embed.add_field(name='_ _', value='No servers registered.')
+        await ctx.send(embed=embed)
+
     @tasks.loop(minutes=5.0)
     async def check_for_dcs_update(self):
         # don't run, if an update is currently running
@@ -544,6 +636,7 @@ class Agent(Plugin):
                             with open('config/dcsserverbot.ini', 'w', encoding='utf-8') as outfile:
                                 outfile.writelines('\n'.join((await response.text(encoding='utf-8')).splitlines()))
                             self.bot.config = utils.config = utils.reload()
+                            self.bot.update_routes()
                             await message.channel.send('dcsserverbot.ini updated.')
                             if await utils.yn_question(ctx, 'Do you want to restart the bot?'):
                                 exit(-1)
@@ -662,6 +755,8 @@ class Master(Agent):
                         await plugin.prune(conn, days=days)
                     await ctx.send(f"All data older than {days} days pruned.")
             conn.commit()
+            # the data of all plugins might have changed
+            QueryCache().clear()
         except (Exception, psycopg2.DatabaseError) as error:
             conn.rollback()
             self.bot.log.exception(error)
@@ -1,6 +1,9 @@
 import aiohttp
 import asyncio
 import discord
+import gzip
+import hashlib
+import json
 import os
 import pandas as pd
 import platform
@@ -9,9 +12,20 @@ import shutil
 from contextlib import closing
 from core import Plugin, DCSServerBot, utils, TEventListener, PaginationReport, Status
 from discord.ext import commands, tasks
-from typing import Type, Any, Optional, Union
+from typing import Type, Any, Optional, Union, Tuple
 from .listener import CloudListener
 
+# number of aggregates uploaded per run of cloud_sync, depending on the backlog
+MIN_BATCH_SIZE = 100
+MAX_BATCH_SIZE = 1000
+# parallel uploads, if the cloud does not support bulk uploads
+MAX_CONCURRENCY = 10
+MAX_RETRIES = 3
+# seconds between two bans or unbans of the global ban list in Discord
+BAN_INTERVAL = 1.0
+# bans that are revoked per run at most, so that a partial ban list can't lift all bans at once
+MAX_REVOCATIONS = 25
+
 
 class CloudHandlerAgent(Plugin):
 
@@ -47,10 +61,10 @@ class CloudHandlerAgent(Plugin):
         async with self.session.get(url) as response:  # type: aiohttp.ClientResponse
             return await response.json()
 
-    async def post(self, request: str, data: Any) -> Any:
+    async def post(self, request: str, data: Any, *, headers: Optional[dict] = None) -> Any:
         async def send(element):
             url = f"{self.base_url}/{request}/"
-            async with self.session.post(url, json=element) as response:  # type: aiohttp.ClientResponse
+            async with self.session.post(url, json=element, headers=headers) as response:  # type: aiohttp.ClientResponse
                 return await response.json()
 
         if isinstance(data, list):
@@ -59,6 +73,28 @@ class CloudHandlerAgent(Plugin):
         else:
             await send(data)
 
+    async def post_with_retry(self, request: str, data: Any, *, compress: bool = False) -> Any:
+        # the key is the same for every retry of the same payload, so the cloud can drop duplicates
+        payload = json.dumps(data, sort_keys=True, default=str)
+        headers = {"Idempotency-Key": hashlib.sha256(payload.encode('utf-8')).hexdigest()}
+        body = payload.encode('utf-8')
+        if compress:
+            body = gzip.compress(body)
+            headers['Content-Encoding'] = 'gzip'
+        url = f"{self.base_url}/{request}/"
+        for attempt in range(0, MAX_RETRIES + 1):
+            try:
+                async with self.session.post(url, data=body, headers=headers) as response:  # type: aiohttp.ClientResponse
+                    return await response.json()
+            except aiohttp.ClientResponseError as ex:
+                # client errors other than rate limits won't get better with a retry
+                if attempt == MAX_RETRIES or (ex.status < 500 and ex.status != 429):
+                    raise
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt == MAX_RETRIES:
+                    raise
+            await asyncio.sleep(2 ** attempt)
+
     @commands.command(description='Test the cloud-connection')
     @utils.has_role('Admin')
     @commands.guild_only()
@@ -76,16 +112,15 @@ class CloudHandlerAgent(Plugin):
     @tasks.loop(minutes=15.0)
     async def cloud_bans(self):
         try:
-            bans = await self.get('bans')
+            bans = {x['ucid']: x['reason'] for x in await self.get('bans')}
             for server in self.bot.servers.values():
                 if server.status in [Status.RUNNING, Status.PAUSED, Status.STOPPED]:
-                    for ban in bans:
-                        player = server.get_player(ucid=ban["ucid"], active=True)
-                        if player:
+                    for player in server.get_active_players():
+                        if player.ucid in bans:
                             server.sendtoDCS({
                                 "command": "ban",
-                                "ucid": ban["ucid"],
-                                "reason": ban["reason"]
+                                "ucid": player.ucid,
+                                "reason": bans[player.ucid]
                             })
         except aiohttp.ClientError:
             self.log.error('- Cloud service not responding.')
@@ -98,6 +133,9 @@ class CloudHandlerMaster(CloudHandlerAgent):
         if ('dcs-ban' not in self.config or self.config['dcs-ban']) and \
                 ('discord-ban' not in self.config or self.config['discord-ban']):
             self.master_bans.start()
+        # discord id => reason of the ban, None to unban
+        self.ban_queue: dict[int, Optional[str]] = dict()
+        self.ban_worker: Optional[asyncio.Task] = None
         if 'token' in self.config:
             self.cloud_sync.start()
 
@@ -107,6 +145,8 @@ class CloudHandlerMaster(CloudHandlerAgent):
         if ('dcs-ban' not in self.config or self.config['dcs-ban']) and \
                 ('discord-ban' not in self.config or self.config['discord-ban']):
             self.master_bans.cancel()
+        if self.ban_worker:
+            self.ban_worker.cancel()
         await super().cog_unload()
 
     @commands.command(description='Resync all statistics with the cloud', usage='[ucid / @member]')
@@ -160,72 +200,182 @@ class CloudHandlerMaster(CloudHandlerAgent):
         finally:
             await ctx.message.delete()
 
+    def update_bans(self, bans: list[dict]) -> list[str]:
+        # stores the global ban list in one go and returns the ucids of the revoked bans
+        if not bans:
+            # an empty list is rather a problem of the cloud than a pardon for everyone
+            self.log.warning('- Cloud returned an empty ban list, no bans revoked.')
+            return []
+        conn = self.pool.getconn()
+        try:
+            with closing(conn.cursor()) as cursor:
+                ucids = [x['ucid'] for x in bans]
+                cursor.execute('INSERT INTO bans (ucid, banned_by, reason) SELECT u.ucid, %s, u.reason FROM '
+                               'UNNEST(%s::TEXT[], %s::TEXT[]) AS u(ucid, reason) ON CONFLICT DO NOTHING',
+                               (self.plugin_name, ucids, [x['reason'] for x in bans]))
+                cursor.execute('DELETE FROM bans WHERE ucid IN (SELECT ucid FROM bans WHERE banned_by = %s AND '
+                               'ucid <> ALL(%s::TEXT[]) LIMIT %s) RETURNING ucid',
+                               (self.plugin_name, ucids, MAX_REVOCATIONS))
+                revoked = [x[0] for x in cursor.fetchall()]
+            conn.commit()
+            return revoked
+        except (Exception, psycopg2.DatabaseError):
+            conn.rollback()
+            raise
+        finally:
+            self.pool.putconn(conn)
+
+    async def process_bans(self):
+        guild = self.bot.guilds[0]
+        while self.ban_queue:
+            user_id, reason = self.ban_queue.popitem()
+            try:
+                if reason is None:
+                    await guild.unban(discord.Object(id=user_id), reason='DGSA: ban revoked.')
+                else:
+                    await guild.ban(discord.Object(id=user_id), reason='DGSA: ' + reason)
+            except discord.NotFound:
+                pass
+            except discord.Forbidden:
+                self.log.warning('- DCSServerBot does not have the permission to ban users.')
+                self.ban_queue.clear()
+                return
+            except discord.HTTPException as ex:
+                self.log.exception(ex)
+            await asyncio.sleep(BAN_INTERVAL)
+
     @tasks.loop(minutes=15.0)
     async def master_bans(self):
-        conn = self.pool.getconn()
         try:
             if 'dcs-ban' not in self.config or self.config['dcs-ban']:
-                with closing(conn.cursor()) as cursor:
-                    for ban in (await self.get('bans')):
-                        cursor.execute('INSERT INTO bans (ucid, banned_by, reason) VALUES (%s, %s, %s) '
-                                       'ON CONFLICT DO NOTHING', (ban['ucid'], self.plugin_name, ban['reason']))
-                conn.commit()
+                bans: list[dict] = await self.get('bans')
+                revoked = await self.bot.loop.run_in_executor(self.bot.executor, self.update_bans, bans)
+                for server in self.bot.servers.values():
+                    if server.status in [Status.RUNNING, Status.PAUSED, Status.STOPPED]:
+                        for ucid in revoked:
+                            server.sendtoDCS({"command": "unban", "ucid": ucid})
             if 'discord-ban' not in self.config or self.config['discord-ban']:
                 bans: list[dict] = await self.get('discord-bans')
-                users_to_ban = [await self.bot.fetch_user(x['discord_id']) for x in bans]
-                guild = self.bot.guilds[0]
-                guild_bans = [entry async for entry in guild.bans()]
-                banned_users = [x.user for x in guild_bans if x.reason and x.reason.startswith('DGSA:')]
-                # unban users that should not be banned anymore
-                for user in [x for x in banned_users if x not in users_to_ban]:
-                    await guild.unban(user, reason='DGSA: ban revoked.')
-                # ban users that were not banned yet
-                for user in [x for x in users_to_ban if x not in banned_users]:
-                    if user.id == self.bot.owner_id:
-                        continue
-                    reason = next(x['reason'] for x in bans if x['discord_id'] == user.id)
-                    await guild.ban(user, reason='DGSA: ' + reason)
+                users_to_ban = {x['discord_id']: x['reason'] for x in bans if x['discord_id'] != self.bot.owner_id}
+                banned_users = {
+                    x.user.id async for x in self.bot.guilds[0].bans(limit=None)
+                    if x.reason and x.reason.startswith('DGSA:')
+                }
+                # the queue always reflects the latest difference, no matter what was pending before
+                if users_to_ban:
+                    revoked = list(banned_users - users_to_ban.keys())[:MAX_REVOCATIONS]
+                else:
+                    self.log.warning('- Cloud returned an empty Discord ban list, no bans revoked.')
+                    revoked = []
+                queue = {user_id: None for user_id in revoked}
+                queue |= {user_id: users_to_ban[user_id] for user_id in users_to_ban.keys() - banned_users}
+                self.ban_queue = queue
+                if self.ban_queue and (not self.ban_worker or self.ban_worker.done()):
+                    self.ban_worker = asyncio.create_task(self.process_bans())
         except aiohttp.ClientError:
             self.log.error('- Cloud service not responding.')
         except discord.Forbidden:
-            self.log.warn('- DCSServerBot does not have the permission to ban users.')
+            self.log.warning('- DCSServerBot does not have the permission to ban users.')
         except (Exception, psycopg2.DatabaseError) as error:
             self.log.exception(error)
+
+    def get_batch(self) -> Tuple[int, list[dict]]:
+        conn = self.pool.getconn()
+        try:
+            with closing(conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)) as cursor:
+                # players that are (re)synced as a whole mark all their aggregates as dirty
+                cursor.execute('INSERT INTO cloud_dirty (player_ucid, mission_theatre, slot) SELECT DISTINCT '
+                               's.player_ucid, m.mission_theatre, s.slot FROM statistics s, missions m, players p '
+                               'WHERE s.mission_id = m.id AND s.player_ucid = p.ucid AND p.synced IS FALSE AND '
+                               'p.discord_id <> -1 ON CONFLICT (player_ucid, mission_theatre, slot) DO UPDATE '
+                               'SET marked = NOW()')
+                cursor.execute('UPDATE players SET synced = TRUE WHERE synced IS FALSE AND discord_id <> -1')
+                conn.commit()
+                cursor.execute('SELECT COUNT(*) FROM cloud_dirty')
+                backlog = cursor.fetchone()['count']
+                if not backlog:
+                    return 0, []
+                batch_size = min(max(backlog // 10, MIN_BATCH_SIZE), MAX_BATCH_SIZE)
+                # aggregates of players that are still flying this slot are uploaded after they hopped off
+                cursor.execute('WITH batch AS (SELECT d.player_ucid, d.mission_theatre, d.slot, d.marked FROM cloud_dirty d '
+                               'WHERE NOT EXISTS (SELECT 1 FROM statistics s WHERE s.player_ucid = d.player_ucid '
+                               'AND s.slot = d.slot AND s.hop_off IS NULL) LIMIT %s) '
+                               'SELECT b.player_ucid, b.mission_theatre, b.slot, b.marked, SUM(s.kills) as kills, '
+                               'SUM(s.pvp) as pvp, SUM(deaths) as deaths, SUM(ejections) as ejections, '
+                               'SUM(crashes) as crashes, SUM(teamkills) as teamkills, SUM(kills_planes) AS '
+                               'kills_planes, SUM(kills_helicopters) AS kills_helicopters, SUM(kills_ships) AS '
+                               'kills_ships, SUM(kills_sams) AS kills_sams, SUM(kills_ground) AS kills_ground, '
+                               'SUM(deaths_pvp) as deaths_pvp, SUM(deaths_planes) AS deaths_planes, '
+                               'SUM(deaths_helicopters) AS deaths_helicopters, SUM(deaths_ships) AS deaths_ships, '
+                               'SUM(deaths_sams) AS deaths_sams, SUM(deaths_ground) AS deaths_ground, '
+                               'SUM(takeoffs) as takeoffs, SUM(landings) as landings, ROUND(SUM( '
+                               'EXTRACT(EPOCH FROM (s.hop_off - s.hop_on)))) AS playtime FROM batch b LEFT OUTER '
+                               'JOIN (statistics s JOIN missions m ON s.mission_id = m.id AND s.hop_off IS NOT NULL) '
+                               'ON s.player_ucid = b.player_ucid AND s.slot = b.slot AND m.mission_theatre = '
+                               'b.mission_theatre GROUP BY 1, 2, 3, 4', (batch_size, ))
+                return backlog, cursor.fetchall()
+        except (Exception, psycopg2.DatabaseError):
             conn.rollback()
+            raise
         finally:
             self.pool.putconn(conn)
 
-    @tasks.loop(minutes=1.0)
-    async def cloud_sync(self):
+    def clear_dirty(self, rows: list[dict]) -> None:
         conn = self.pool.getconn()
         try:
-            with closing(conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)) as cursor:
-                cursor.execute('SELECT ucid FROM players WHERE synced IS FALSE AND discord_id <> -1 ORDER BY '
-                               'last_seen DESC LIMIT 10')
-                for row in cursor.fetchall():
-                    cursor.execute('SELECT s.player_ucid, m.mission_theatre, s.slot, SUM(s.kills) as kills, '
-                                   'SUM(s.pvp) as pvp, SUM(deaths) as deaths, SUM(ejections) as ejections, '
-                                   'SUM(crashes) as crashes, SUM(teamkills) as teamkills, SUM(kills_planes) AS '
-                                   'kills_planes, SUM(kills_helicopters) AS kills_helicopters, SUM(kills_ships) AS '
-                                   'kills_ships, SUM(kills_sams) AS kills_sams, SUM(kills_ground) AS kills_ground, '
-                                   'SUM(deaths_pvp) as deaths_pvp, SUM(deaths_planes) AS deaths_planes, '
-                                   'SUM(deaths_helicopters) AS deaths_helicopters, SUM(deaths_ships) AS deaths_ships, '
-                                   'SUM(deaths_sams) AS deaths_sams, SUM(deaths_ground) AS deaths_ground, '
-                                   'SUM(takeoffs) as takeoffs, SUM(landings) as landings, ROUND(SUM( '
-                                   'EXTRACT(EPOCH FROM (s.hop_off - s.hop_on)))) AS playtime FROM statistics s, '
-                                   'missions m WHERE s.player_ucid = %s AND s.hop_off IS NOT null AND s.mission_id = '
-                                   'm.id GROUP BY 1, 2, 3', (row['ucid'], ))
-                    for line in cursor.fetchall():
-                        line['client'] = self.client
-                        await self.post('upload', line)
-                    cursor.execute('UPDATE players SET synced = TRUE WHERE ucid = %s', (row['ucid'], ))
-                conn.commit()
-        except (Exception, psycopg2.DatabaseError) as error:
-            self.log.exception(error)
+            with closing(conn.cursor()) as cursor:
+                # aggregates that were marked again in the meantime stay dirty
+                cursor.executemany('DELETE FROM cloud_dirty WHERE player_ucid = %s AND mission_theatre = %s AND '
+                                   'slot = %s AND marked = %s',
+                                   [(x['player_ucid'], x['mission_theatre'], x['slot'], x['marked']) for x in rows])
+            conn.commit()
+        except (Exception, psycopg2.DatabaseError):
             conn.rollback()
+            raise
         finally:
             self.pool.putconn(conn)
 
+    async def upload(self, rows: list[dict]) -> list[dict]:
+        # aggregates without any statistics left (deleted or reset) are just dropped
+        rows = [x for x in rows if x['playtime'] is not None]
+        payloads = [{k: v for k, v in x.items() if k != 'marked'} | {"client": self.client} for x in rows]
+        # cloud services that support it get the whole batch in a single compressed request
+        if self.config.get('bulk', False):
+            await self.post_with_retry('upload', payloads, compress=True)
+            return rows
+        semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+
+        async def send(row: dict, payload: dict) -> Optional[dict]:
+            async with semaphore:
+                try:
+                    await self.post_with_retry('upload', payload)
+                    return row
+                except aiohttp.ClientError as ex:
+                    self.log.debug(f"- Upload of {row['player_ucid']} / {row['slot']} failed: {ex}")
+                    return None
+
+        return [x for x in await asyncio.gather(*[send(x, y) for x, y in zip(rows, payloads)]) if x]
+
+    @tasks.loop(minutes=1.0)
+    async def cloud_sync(self):
+        try:
+            backlog, rows = await self.bot.loop.run_in_executor(self.bot.executor, self.get_batch)
+            uploaded = await self.upload(rows) if rows else []
+            done = uploaded + [x for x in rows if x['playtime'] is None]
+            if done:
+                await self.bot.loop.run_in_executor(self.bot.executor, self.clear_dirty, done)
+            if len(done) < len(rows):
+                self.log.error(f'- Cloud service not responding, {len(rows) - len(done)} uploads failed.')
+            # work off larger backlogs faster, as long as the cloud keeps up
+            if backlog > len(done) and done:
+                self.cloud_sync.change_interval(seconds=10)
+            else:
+                self.cloud_sync.change_interval(minutes=1.0)
+        except aiohttp.ClientError:
+            self.log.error('- Cloud service not responding.')
+            self.cloud_sync.change_interval(minutes=1.0)
+        except (Exception, psycopg2.DatabaseError) as error:
+            self.log.exception(error)
 
 async def setup(bot: DCSServerBot):
     if not os.path.exists('config/cloud.json'):
@@ -1 +1,2 @@
-ALTER TABLE players ADD COLUMN IF NOT EXISTS synced BOOLEAN DEFAULT FALSE;
\ No newline at end of file
+ALTER TABLE players ADD COLUMN IF NOT EXISTS synced BOOLEAN DEFAULT FALSE;
+CREATE TABLE IF NOT EXISTS cloud_dirty (player_ucid TEXT NOT NULL, mission_theatre TEXT NOT NULL, slot TEXT NOT NULL, marked TIMESTAMP NOT NULL DEFAULT NOW(), PRIMARY KEY (player_ucid, mission_theatre, slot));
\ No newline at end of file
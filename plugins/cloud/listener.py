@@ -1,10 +1,36 @@
-import asyncio
 import psycopg2
-from core import EventListener, Server, Player, Side
+from core import EventListener, Server, Player
 from contextlib import closing
 
 
 class CloudListener(EventListener):
+    """
+    Marks the aggregates (player, theatre, slot) that changed as dirty, they are uploaded in batches by the cloud_sync
+    task of the master.
+    """
+
+    SQL_MARK_DIRTY = 'INSERT INTO cloud_dirty (player_ucid, mission_theatre, slot) SELECT DISTINCT s.player_ucid, ' \
+                     'm.mission_theatre, s.slot FROM statistics s, missions m, players p WHERE s.mission_id = m.id ' \
+                     'AND s.player_ucid = p.ucid AND p.discord_id <> -1 AND s.mission_id = %s'
+    SQL_ON_CONFLICT = ' ON CONFLICT (player_ucid, mission_theatre, slot) DO UPDATE SET marked = NOW()'
+
+    def _mark_dirty(self, server: Server, player: Player = None) -> None:
+        if server.mission_id == -1:
+            return
+        conn = self.pool.getconn()
+        try:
+            with closing(conn.cursor()) as cursor:
+                if player:
+                    cursor.execute(self.SQL_MARK_DIRTY + ' AND s.player_ucid = %s' + self.SQL_ON_CONFLICT,
+                                   (server.mission_id, player.ucid))
+                else:
+                    cursor.execute(self.SQL_MARK_DIRTY + self.SQL_ON_CONFLICT, (server.mission_id, ))
+            conn.commit()
+        except (Exception, psycopg2.DatabaseError) as error:
+            conn.rollback()
+            self.log.exception(error)
+        finally:
+            self.pool.putconn(conn)
 
     async def onPlayerChangeSlot(self, data: dict) -> None:
         if 'side' not in data or data['id'] == 1:
@@ -16,29 +42,21 @@ class CloudListener(EventListener):
         player: Player = server.get_player(id=data['id'])
         if not player:
             return
-        if player.side == Side.SPECTATOR:
+        self._mark_dirty(server, player)
+
+    async def onGameEvent(self, data: dict) -> None:
+        if data['eventName'] != 'disconnect' or data['arg1'] == 1:
             return
-        conn = self.pool.getconn()
-        try:
-            with closing(conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)) as cursor:
-                cursor.execute('SELECT s.player_ucid, m.mission_theatre, s.slot, SUM(s.kills) as kills, '
-                               'SUM(s.pvp) as pvp, SUM(deaths) as deaths, SUM(ejections) as ejections, '
-                               'SUM(crashes) as crashes, SUM(teamkills) as teamkills, SUM(kills_planes) AS '
-                               'kills_planes, SUM(kills_helicopters) AS kills_helicopters, SUM(kills_ships) AS '
-                               'kills_ships, SUM(kills_sams) AS kills_sams, SUM(kills_ground) AS kills_ground, '
-                               'SUM(deaths_pvp) as deaths_pvp, SUM(deaths_planes) AS deaths_planes, '
-                               'SUM(deaths_helicopters) AS deaths_helicopters, SUM(deaths_ships) AS deaths_ships, '
-                               'SUM(deaths_sams) AS deaths_sams, SUM(deaths_ground) AS deaths_ground, '
-                               'SUM(takeoffs) as takeoffs, SUM(landings) as landings, ROUND(SUM( '
-                               'EXTRACT(EPOCH FROM (s.hop_off - s.hop_on)))) AS playtime FROM statistics s, '
-                               'missions m WHERE s.player_ucid = %s AND m.mission_theatre = %s AND s.slot = %s '
-                               'AND s.hop_off IS NOT null AND s.mission_id = m.id GROUP BY 1, 2, 3',
-                               (player.ucid, server.current_mission.map, player.unit_type))
-                if cursor.rowcount > 0:
-                    row = cursor.fetchone()
-                    row['client'] = self.plugin.client
-                    self.bot.loop.call_soon(asyncio.create_task, self.plugin.post('upload', row))
-        except (Exception, psycopg2.DatabaseError) as error:
-            self.log.exception(error)
-        finally:
-            self.pool.putconn(conn)
+        server: Server = self.bot.servers[data['server_name']]
+        config = self.plugin.get_config(server)
+        if 'token' not in config:
+            return
+        player: Player = server.get_player(id=data['arg1'])
+        if player:
+            self._mark_dirty(server, player)
+
+    async def onSimulationStop(self, data: dict) -> None:
+        server: Server = self.bot.servers[data['server_name']]
+        config = self.plugin.get_config(server)
+        if 'token' in config:
+            self._mark_dirty(server)
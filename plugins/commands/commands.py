@@ -1,20 +1,150 @@
+import asyncio
+import discord
 import os
+import psutil
 import shlex
 import subprocess
+import time
+from contextlib import suppress
 from core import Plugin, DCSServerBot, TEventListener, utils
+from dataclasses import dataclass, field
 from discord.ext import commands
 from discord.ext.commands import Command
-from typing import Type
+from io import BytesIO
+from typing import Optional, Type
+
+
+@dataclass
+class Execution:
+    name: str
+    process: asyncio.subprocess.Process
+    start: float = field(default_factory=time.monotonic)
+    output: bytearray = field(default_factory=bytearray)
+    cpu: dict[int, float] = field(default_factory=dict)
+    memory: int = 0
+    cancelled: bool = False
+
+    def sample(self) -> None:
+        # CPU times are kept per pid, as children might end before the shell does
+        with suppress(psutil.Error):
+            parent = psutil.Process(self.process.pid)
+            cpu = dict(self.cpu)
+            memory = 0
+            for p in [parent] + parent.children(recursive=True):
+                with suppress(psutil.Error):
+                    times = p.cpu_times()
+                    cpu[p.pid] = times.user + times.system
+                    memory += p.memory_info().rss
+            # replaced as a whole, as the loop might read it in the meantime
+            self.cpu = cpu
+            self.memory = max(self.memory, memory)
+
+    @property
+    def text(self) -> str:
+        return self.output.decode('cp1252', 'ignore')
+
+    def summary(self) -> str:
+        return 'Exit code {}, runtime {:.1f}s, CPU {:.1f}s, peak memory {:.1f} MB'.format(
+            self.process.returncode, time.monotonic() - self.start, sum(self.cpu.values()), self.memory / 1048576)
 
 
 class Commands(Plugin):
+    # output is shown in a message that is updated at most every UPDATE_INTERVAL seconds
+    UPDATE_INTERVAL = 2
+    MAX_MESSAGE_SIZE = 1900
+    # the resource usage of a running command is sampled every SAMPLE_INTERVAL seconds
+    SAMPLE_INTERVAL = 1
+
     def __init__(self, bot: DCSServerBot, eventlistener: Type[TEventListener] = None):
         super().__init__(bot, eventlistener)
         self.commands: dict[str, dict] = dict()
+        self.semaphores: dict[str, asyncio.Semaphore] = dict()
+        self.executions: dict[str, list[Execution]] = dict()
         self._register_commands()
 
     def cog_unload(self):
         self._unregister_commands()
+        for executions in self.executions.values():
+            for execution in executions:
+                self.kill(execution)
+
+    @staticmethod
+    def kill(execution: Execution) -> None:
+        execution.cancelled = True
+        with suppress(psutil.Error):
+            parent = psutil.Process(execution.process.pid)
+            for p in parent.children(recursive=True) + [parent]:
+                with suppress(psutil.Error):
+                    p.kill()
+
+    async def read_output(self, execution: Execution, message: discord.Message) -> None:
+        last_update = time.monotonic()
+        shown = ''
+        while True:
+            data = await execution.process.stdout.read(4096)
+            if not data:
+                return
+            execution.output.extend(data)
+            if time.monotonic() - last_update > self.UPDATE_INTERVAL:
+                tail = execution.text[-self.MAX_MESSAGE_SIZE:]
+                if tail != shown:
+                    with suppress(discord.HTTPException):
+                        await message.edit(content=f'```{tail}```')
+                    shown = tail
+                last_update = time.monotonic()
+
+    async def sample(self, execution: Execution) -> None:
+        # walking the process tree is expensive, so it is done in the executor
+        while execution.process.returncode is None:
+            await self.bot.loop.run_in_executor(self.bot.executor, execution.sample)
+            await asyncio.sleep(self.SAMPLE_INTERVAL)
+
+    async def run_shell(self, ctx: commands.Context, config: dict, cmd: list[str]) -> None:
+        if 'cwd' in config['cmd']:
+            cwd = os.path.expandvars(config['cmd']['cwd'])
+        else:
+            cwd = None
+        name = ctx.command.name
+        semaphore = self.semaphores[name]
+        if semaphore.locked():
+            await ctx.send(f'{ctx.prefix}{name} is already running, use {ctx.prefix}abort {name} to cancel it.')
+            return
+        async with semaphore:
+            try:
+                process = await asyncio.create_subprocess_shell(subprocess.list2cmdline(cmd), cwd=cwd,
+                                                                stdout=asyncio.subprocess.PIPE,
+                                                                stderr=asyncio.subprocess.STDOUT)
+            except Exception as ex:
+                await ctx.send(ex.__str__())
+                return
+            execution = Execution(name=name, process=process)
+            self.executions.setdefault(name, []).append(execution)
+            sampler = asyncio.create_task(self.sample(execution))
+            message = await ctx.send(f'Running {ctx.prefix}{name} ...')
+            try:
+                await asyncio.wait_for(self.read_output(execution, message), timeout=config.get('timeout', 300))
+                await process.wait()
+            except asyncio.TimeoutError:
+                self.kill(execution)
+                await process.wait()
+                await ctx.send('Timeout.')
+            finally:
+                sampler.cancel()
+                self.executions[name].remove(execution)
+            output = execution.text.strip()
+            if execution.cancelled:
+                summary = 'Cancelled. ' + execution.summary()
+            else:
+                summary = execution.summary()
+            self.log.debug(f'Custom command {name}: {summary}')
+            if not output:
+                await message.edit(content=f'Done. {summary}')
+            elif len(output) > self.MAX_MESSAGE_SIZE:
+                await message.edit(content=summary, attachments=[
+                    discord.File(BytesIO(output.encode('utf-8')), filename=f'{name}.txt')
+                ])
+            else:
+                await message.edit(content=f'```{output}```{summary}')
 
     async def exec_command(self, ctx: commands.Context, *args):
         config = self.commands[ctx.command.name]
@@ -26,34 +156,33 @@ class Commands(Plugin):
         if 'args' in config['cmd']:
             cmd.extend([utils.format_string(x, **kwargs) for x in shlex.split(config['cmd']['args'])])
         if 'shell' in config['cmd']:
-            if 'cwd' in config['cmd']:
-                cwd = os.path.expandvars(config['cmd']['cwd'])
-            else:
-                cwd = None
-            try:
-                p = subprocess.run(cmd, shell=True, cwd=cwd, capture_output=True, timeout=300)
-            except Exception as ex:
-                await ctx.send(ex.__str__())
-                return
-            output = p.stdout.decode('cp1252', 'ignore')
-            if not output:
-                await ctx.send('Done')
-                return
-            tmp = '```'
-            for line in output.splitlines():
-                if len(tmp) + len(line) > 1997:
-                    tmp += '```'
-                    await ctx.send(tmp)
-                    tmp = '```'
-                else:
-                    tmp += line + '\n'
-            if len(tmp) > 3:
-                tmp += '```'
-                await ctx.send(tmp)
+            await self.run_shell(ctx, config, cmd)
         else:
             subprocess.Popen(cmd, executable=os.path.expandvars(config['cmd']['cwd']) + os.path.sep + config['cmd']['exe'])
             await ctx.send('Done.')
 
+    @commands.command(description='Cancels a running custom command', usage='<command>')
+    @commands.guild_only()
+    async def abort(self, ctx, name: Optional[str] = None):
+        if not name:
+            running = [f'{ctx.prefix}{x}' for x, y in self.executions.items() if y]
+            await ctx.send('Running: ' + ', '.join(running) if running else 'No command is running.')
+            return
+        name = name.lstrip(ctx.prefix)
+        if name not in self.commands:
+            await ctx.send(f'Unknown command {ctx.prefix}{name}.')
+            return
+        # you can only cancel what you are allowed to run
+        if 'roles' in self.commands[name] and not utils.check_roles(self.commands[name]['roles'], ctx.author):
+            await ctx.send(f"You don't have the permission to cancel {ctx.prefix}{name}.")
+            return
+        if not self.executions.get(name):
+            await ctx.send(f'{ctx.prefix}{name} is not running.')
+            return
+        for execution in self.executions[name]:
+            self.kill(execution)
+        await ctx.send(f'{ctx.prefix}{name} cancelled.')
+
     def _register_commands(self):
         for cmd in self.locals['commands']:
             try:
@@ -67,6 +196,7 @@ class Commands(Plugin):
                     c.params = params
                 self.bot.add_command(c)
                 self.commands[cmd['name']] = cmd
+                self.semaphores[cmd['name']] = asyncio.Semaphore(cmd.get('max_concurrent', 1))
                 self.log.debug(f"  - Custom command \"{self.bot.config['BOT']['COMMAND_PREFIX']}{cmd['name']}\" registered.")
             except commands.CommandRegistrationError as ex:
                 self.log.warning(f"  - Custom command \"{self.bot.config['BOT']['COMMAND_PREFIX']}{cmd['name']}\" NOT registered: {ex}")
@@ -3,7 +3,7 @@ import psycopg2
 import string
 from contextlib import closing
 from copy import deepcopy
-from core import utils, DCSServerBot, Plugin, PluginRequiredError, Server
+from core import utils, DCSServerBot, Plugin, PluginRequiredError, Server, QueryCache
 from discord.ext import commands
 from typing import Optional, cast, Union
 from .listener import CreditSystemListener
@@ -205,6 +205,7 @@ class CreditSystemMaster(CreditSystemAgent):
                                                                                f'Credit points change by Admin '
                                                                                f'{ctx.message.author.display_name}'))
             conn.commit()
+            QueryCache().invalidate('credits', 'credits_log')
             if donation > 0:
                 await ctx.send(to.mention + f' you just received {donation} credit points from an Admin.')
             else:
@@ -301,6 +302,7 @@ class CreditSystemMaster(CreditSystemAgent):
                                                                                f'Donation from member '
                                                                                f'{ctx.message.author.display_name}'))
             conn.commit()
+            QueryCache().invalidate('credits', 'credits_log')
             await ctx.send(to.mention + f' you just received {donation} credit points from ' +
                            '{}!'.format(utils.escape_string(ctx.message.author.display_name)))
         except (Exception, psycopg2.DatabaseError) as error:
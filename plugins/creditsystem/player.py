@@ -1,6 +1,6 @@
 import psycopg2
 from contextlib import closing
-from core import Player, DataObjectFactory, utils, Plugin
+from core import Player, DataObjectFactory, utils, Plugin, QueryCache
 from dataclasses import field, dataclass
 from typing import cast
 
@@ -66,6 +66,7 @@ class CreditPlayer(Player):
                                '%s) ON CONFLICT (campaign_id, player_ucid) DO UPDATE SET points = EXCLUDED.points',
                                (campaign_id, self.ucid, self._points))
             conn.commit()
+            QueryCache().invalidate('credits', 'credits_log')
             self.server.sendtoDCS({
                 'command': 'updateUserPoints',
                 'ucid': self.ucid,
@@ -88,6 +89,7 @@ class CreditPlayer(Player):
                                'remark) VALUES (%s, %s, %s, %s, %s, %s)',
                                (campaign_id, event, self.ucid, old_points, self._points, remark))
             conn.commit()
+            QueryCache().invalidate('credits', 'credits_log')
         except (Exception, psycopg2.DatabaseError) as error:
             conn.rollback()
             self.log.exception(error)
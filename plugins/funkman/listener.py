@@ -1,10 +1,9 @@
-import os
 import discord
 import sys
 import uuid
-import matplotlib.figure
 from core import EventListener, Plugin, Server
-from matplotlib import pyplot as plt
+from io import BytesIO
+from .renderer import FunkPlotRenderer
 
 
 class FunkManEventListener(EventListener):
@@ -13,11 +12,13 @@ class FunkManEventListener(EventListener):
         super().__init__(plugin)
         config = self.locals['configs'][0]
         sys.path.append(config['install'])
-        from funkman.funkplot.funkplot import FunkPlot
         from funkman.utils.utils import _GetVal
-        self.funkplot = FunkPlot(ImagePath=config['IMAGEPATH'])
+        self.renderer = FunkPlotRenderer(config['install'], config['IMAGEPATH'])
         self._GetVal = _GetVal
 
+    async def shutdown(self):
+        self.renderer.close()
+
     # from FunkBot, to be replaced with a proper function call!
     def _create_lso_embed(self, result: dict) -> discord.Embed:
         actype = self._GetVal(result, "airframe", "Unkown")
@@ -84,22 +85,11 @@ class FunkManEventListener(EventListener):
         embed.set_footer(text=f"{theatre}: {missiondate} ({missiontime})")
         return embed
 
-    @staticmethod
-    def _save_fig(fig: matplotlib.figure.Figure) -> str:
-        filename = f'{uuid.uuid4()}.png'
-        fig.savefig(filename, bbox_inches='tight', facecolor='#2C2F33')
-        plt.close(fig)
-        return filename
-
-    async def _send_fig(self, server: Server, fig: matplotlib.figure.Figure, channel: str):
-        filename = self._save_fig(fig)
-        try:
-            config = self.plugin.get_config(server)
-            channel = self.bot.get_channel(int(config[channel]))
-            await channel.send(file=discord.File(filename))
-        finally:
-            if os.path.exists(filename):
-                os.remove(filename)
+    async def _send_fig(self, server: Server, method: str, data: dict, channel: str):
+        image = await self.renderer.render(method, data)
+        config = self.plugin.get_config(server)
+        channel = self.bot.get_channel(int(config[channel]))
+        await channel.send(file=discord.File(BytesIO(image), filename=f'{uuid.uuid4()}.png'))
 
     async def moose_text(self, data: dict):
         server: Server = self.bot.servers[data['server_name']]
@@ -109,24 +99,18 @@ class FunkManEventListener(EventListener):
 
     async def moose_bomb_result(self, data: dict):
         server: Server = self.bot.servers[data['server_name']]
-        fig, _ = self.funkplot.PlotBombRun(data)
-        await self._send_fig(server, fig, 'CHANNELID_RANGE')
+        await self._send_fig(server, 'PlotBombRun', data, 'CHANNELID_RANGE')
 
     async def moose_strafe_result(self, data: dict):
         server: Server = self.bot.servers[data['server_name']]
-        fig, _ = self.funkplot.PlotStrafeRun(data)
-        await self._send_fig(server, fig, 'CHANNELID_RANGE')
+        await self._send_fig(server, 'PlotStrafeRun', data, 'CHANNELID_RANGE')
 
     async def moose_lso_grade(self, data: dict):
         embed = self._create_lso_embed(data)
-        fig, _ = self.funkplot.PlotTrapSheet(data)
-        filename = self._save_fig(fig)
-        try:
-            embed.set_image(url=f"attachment://{filename}")
-            server: Server = self.bot.servers[data['server_name']]
-            config = self.plugin.get_config(server)
-            channel = self.bot.get_channel(int(config['CHANNELID_AIRBOSS']))
-            await channel.send(embed=embed, file=discord.File(filename))
-        finally:
-            if os.path.exists(filename):
-                os.remove(filename)
+        image = await self.renderer.render('PlotTrapSheet', data)
+        filename = f'{uuid.uuid4()}.png'
+        embed.set_image(url=f"attachment://{filename}")
+        server: Server = self.bot.servers[data['server_name']]
+        config = self.plugin.get_config(server)
+        channel = self.bot.get_channel(int(config['CHANNELID_AIRBOSS']))
+        await channel.send(embed=embed, file=discord.File(BytesIO(image), filename=filename))
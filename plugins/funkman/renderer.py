@@ -0,0 +1,87 @@
+import asyncio
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Optional, Union
+
+# the FunkPlot instance of the worker process, which keeps the static images (carriers, ranges) loaded
+_funkplot = None
+
+
+def _init(install: str, image_path: str):
+    global _funkplot
+
+    import matplotlib
+    matplotlib.use('agg')
+    sys.path.append(install)
+    from funkman.funkplot.funkplot import FunkPlot
+    _funkplot = FunkPlot(ImagePath=image_path)
+
+
+def _render(jobs: list[tuple[str, dict]]) -> list[Union[bytes, Exception]]:
+    from matplotlib import pyplot as plt
+
+    results = []
+    for method, data in jobs:
+        try:
+            fig, _ = getattr(_funkplot, method)(data)
+            try:
+                buffer = BytesIO()
+                fig.savefig(buffer, format='png', bbox_inches='tight', facecolor='#2C2F33')
+                results.append(buffer.getvalue())
+            finally:
+                plt.close(fig)
+        except Exception as ex:
+            results.append(ex)
+    return results
+
+
+class FunkPlotRenderer:
+    """
+    Renders FunkPlot figures into PNG images in a separate process. Results that arrive within BATCH_DELAY seconds
+    are rendered in one go.
+    """
+    BATCH_DELAY = 0.1
+
+    def __init__(self, install: str, image_path: str):
+        self.executor = ProcessPoolExecutor(max_workers=1, initializer=_init, initargs=(install, image_path))
+        self.jobs: list[tuple[str, dict, asyncio.Future]] = []
+        self._handle: Optional[asyncio.TimerHandle] = None
+
+    async def render(self, method: str, data: dict) -> bytes:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.jobs.append((method, data, future))
+        if not self._handle:
+            self._handle = loop.call_later(self.BATCH_DELAY, self._flush)
+        return await future
+
+    def _flush(self):
+        jobs = self.jobs
+        self.jobs = []
+        self._handle = None
+        asyncio.create_task(self._run(jobs))
+
+    async def _run(self, jobs: list[tuple[str, dict, asyncio.Future]]):
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.executor, _render, [(method, data) for method, data, _ in jobs])
+        except Exception as ex:
+            for _, _, future in jobs:
+                if not future.done():
+                    future.set_exception(ex)
+            return
+        for (_, _, future), result in zip(jobs, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def close(self):
+        if self._handle:
+            self._handle.cancel()
+        for _, _, future in self.jobs:
+            future.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -39,22 +39,23 @@ class GameMasterAgent(Plugin):
         # ignore bot messages
         if message.author.bot:
             return
-        for server in self.bot.servers.values():
+        for server, channel in self.bot.get_routes(message.channel.id):
             if server.status != Status.RUNNING:
                 continue
-            if self.bot.config.getboolean(server.installation, 'COALITIONS'):
+            if channel in [Channel.COALITION_BLUE, Channel.COALITION_RED] and \
+                    self.bot.config.getboolean(server.installation, 'COALITIONS'):
                 sides = utils.get_sides(message, server)
-                if Coalition.BLUE in sides and server.get_channel(Channel.COALITION_BLUE).id == message.channel.id:
+                if Coalition.BLUE in sides and channel == Channel.COALITION_BLUE:
                     # TODO: ignore messages for now, as DCS does not understand the coalitions yet
                     # server.sendChatMessage(Coalition.BLUE, message.content, message.author.display_name)
                     pass
-                elif Coalition.RED in sides and server.get_channel(Channel.COALITION_RED).id == message.channel.id:
+                elif Coalition.RED in sides and channel == Channel.COALITION_RED:
                     # TODO:  ignore messages for now, as DCS does not understand the coalitions yet
                     # server.sendChatMessage(Coalition.RED, message.content, message.author.display_name)
                     pass
-            if server.get_channel(Channel.CHAT) and server.get_channel(Channel.CHAT).id == message.channel.id:
+            elif channel == Channel.CHAT:
                 if message.content.startswith(self.bot.config['BOT']['COMMAND_PREFIX']) is False:
-                    server.sendChatMessage(Coalition.ALL, message.content, message.author.display_name)
+                    self.bot.chat.send_to_dcs(server, message.content, message.author.display_name)
 
     @commands.command(description='Send a chat message to a running DCS instance', usage='<message>', hidden=True)
     @utils.has_role('DCS')
@@ -114,7 +115,7 @@ class GameMasterAgent(Plugin):
                 })
                 await ctx.send(f"Flag {flag} set to {value}.")
             else:
-                data = await server.sendtoDCSSync({"command": "getFlag", "flag": flag})
+                data = await server.sendtoDCSSync({"command": "getFlag", "flag": flag}, retries=1)
                 await ctx.send(f"Flag {flag} has value {data['value']}.")
         else:
             await ctx.send(f"Mission is {server.status.name.lower()}, can't set/get flag.")
@@ -135,7 +136,7 @@ class GameMasterAgent(Plugin):
                 await ctx.send(f"Variable {name} set to {value}.")
             else:
                 try:
-                    data = await server.sendtoDCSSync({"command": "getVariable", "name": name})
+                    data = await server.sendtoDCSSync({"command": "getVariable", "name": name}, retries=1)
                 except asyncio.TimeoutError:
                     await ctx.send('Timeout while retrieving variable. Most likely a lua error occurred. '
                                    'Check your dcs.log.')
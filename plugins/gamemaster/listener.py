@@ -50,7 +50,7 @@ class GameMasterEventListener(EventListener):
             chat_channel = server.get_channel(Channel.CHAT)
         if chat_channel:
             if 'from_id' in data and data['from_id'] != 1 and len(data['message']) > 0:
-                await chat_channel.send(data['from_name'] + ': ' + data['message'])
+                self.bot.chat.send_to_discord(chat_channel, data['from_name'] + ': ' + data['message'])
 
     def _get_coalition(self, server: Server, player: Player) -> Optional[Coalition]:
         if not player.coalition:
@@ -85,6 +85,9 @@ class GameMasterEventListener(EventListener):
         server: Server = self.bot.servers[data['server_name']]
         if data['id'] != 1 and self.bot.config.getboolean(server.installation, 'COALITIONS'):
             player: Player = server.get_player(id=data['id'])
+            if not player:
+                return
+            await self.bot.sessions.wait_for_match(player)
             if player.has_discord_roles(['DCS Admin', 'GameMaster']):
                 side = Side.UNKNOWN
             elif player.coalition == Coalition.BLUE:
@@ -3,10 +3,10 @@ import json
 import os
 import psycopg2
 import shutil
-import time
 from contextlib import closing
 from copy import deepcopy
-from core import Plugin, DCSServerBot, PluginRequiredError, utils, PaginationReport, Report, Server, TEventListener
+from core import Plugin, DCSServerBot, PluginRequiredError, utils, PaginationReport, Report, Server, TEventListener, \
+    RetentionPolicy
 from datetime import datetime
 from discord import SelectOption, TextStyle
 from discord.ext import commands, tasks
@@ -156,22 +156,16 @@ class GreenieBoardAgent(Plugin):
 
     @tasks.loop(hours=24.0)
     async def auto_delete(self):
-        def do_delete(path: str, days: int):
-            now = time.time()
-            for f in [os.path.join(path, x) for x in os.listdir(path)]:
-                if os.stat(f).st_mtime < (now - days * 86400):
-                    if os.path.isfile(f):
-                        os.remove(f)
-
         for server in self.bot.servers.values():
             config = self.get_config(server)
-            basedir = os.path.expandvars(self.bot.config[server.installation]['DCS_HOME'])
-            if 'Moose.AIRBOSS' in config and 'delete_after' in config['Moose.AIRBOSS']:
-                basedir += os.path.sep + config['Moose.AIRBOSS']['basedir'] if 'basedir' in config['Moose.AIRBOSS'] else ''
-                do_delete(basedir, config['Moose.AIRBOSS']['delete_after'])
-            elif 'FunkMan' in config and 'delete_after' in config['FunkMan']:
-                basedir += os.path.sep + config['FunkMan']['basedir'] if 'basedir' in config['FunkMan'] else ''
-                do_delete(basedir, config['FunkMan']['delete_after'])
+            for section in ['Moose.AIRBOSS', 'FunkMan']:
+                if section in config and 'delete_after' in config[section]:
+                    basedir = os.path.expandvars(self.bot.config[server.installation]['DCS_HOME'])
+                    if 'basedir' in config[section]:
+                        basedir += os.path.sep + config[section]['basedir']
+                    self.bot.retention.register(RetentionPolicy(path=basedir,
+                                                                max_age=config[section]['delete_after']))
+                    break
 
 
 class GreenieBoardMaster(GreenieBoardAgent):
@@ -1,4 +1,3 @@
-import asyncio
 import os
 import psycopg2
 import re
@@ -6,7 +5,7 @@ import string
 import sys
 import uuid
 from contextlib import closing
-from core import EventListener, Server, Player, Channel, Side, Plugin, PersistentReport
+from core import EventListener, Server, Player, Channel, Side, Plugin, PersistentReport, QueryCache
 from matplotlib import pyplot as plt
 from pathlib import Path
 from plugins.creditsystem.player import CreditPlayer
@@ -47,8 +46,7 @@ class GreenieBoardEventListener(EventListener):
             num_rows = config['num_rows'] if 'num_rows' in config else 10
             report = PersistentReport(self.bot, self.plugin_name, 'greenieboard.json',
                                       server, f'greenieboard-{server.name}', channel_id=channel_id)
-            self.bot.loop.call_soon(asyncio.create_task, report.render(server_name=server.name,
-                                                                       num_rows=num_rows))
+            report.schedule(priority=3, server_name=server.name, num_rows=num_rows)
         # shall we render the global board?
         config = self.locals['configs'][0]
         if 'persistent_channel' in config and server == list(self.bot.servers.values())[0]:
@@ -58,7 +56,7 @@ class GreenieBoardEventListener(EventListener):
             num_rows = config['num_rows'] if 'num_rows' in config else 10
             report = PersistentReport(self.bot, self.plugin_name, 'greenieboard.json',
                                       server, f'greenieboard', channel_id=channel_id)
-            self.bot.loop.call_soon(asyncio.create_task, report.render(server_name=None, num_rows=num_rows))
+            report.schedule(priority=3, server_name=None, num_rows=num_rows)
 
     async def _send_chat_message(self, player: Player, data: dict):
         server: Server = self.bot.servers[data['server_name']]
@@ -102,6 +100,7 @@ class GreenieBoardEventListener(EventListener):
                                 data['details'], data['place']['name'], case, wire, night, points,
                                 data['trapsheet'] if 'trapsheet' in data else None))
             conn.commit()
+            QueryCache().invalidate('greenieboard')
         except (Exception, psycopg2.DatabaseError) as error:
             conn.rollback()
             self.log.exception(error)
@@ -2,7 +2,6 @@ import discord
 import os
 import psycopg2
 import re
-from contextlib import closing
 from core import report, Coalition, Side, utils, EmbedElement, NothingToPlot
 from datetime import datetime
 from plugins.userstats.filter import StatisticsFilter
@@ -152,34 +151,29 @@ class HighscoreTraps(report.GraphElement):
         sql += ' AND ' + flt.filter(self.env.bot, period, server_name)
         sql += f' GROUP BY 1, 2 ORDER BY 3 DESC LIMIT {limit}'
 
-        conn = self.pool.getconn()
         try:
-            with closing(conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)) as cursor:
-                labels = []
-                values = []
-                self.log.debug(sql)
-                cursor.execute(sql)
-                for row in cursor.fetchall():
-                    member = self.bot.guilds[0].get_member(row['discord_id']) if row['discord_id'] != '-1' else None
-                    name = member.display_name if member else row['name']
-                    labels.insert(0, name)
-                    values.insert(0, row['value'])
-                self.axes.barh(labels, values, color=['#CD7F32', 'silver', 'gold'], label="Traps", height=0.75)
-                self.axes.set_title("Traps", color='white', fontsize=25)
-                self.axes.set_xlabel("traps")
-                if len(values) == 0:
-                    self.axes.set_xticks([])
-                    self.axes.set_yticks([])
-                    self.axes.text(0, 0, 'No data available.', ha='center', va='center', rotation=45, size=15)
+            labels = []
+            values = []
+            self.log.debug(sql)
+            rows = self.query(sql, cursor_factory=psycopg2.extras.RealDictCursor)
+            for row in rows:
+                member = self.bot.guilds[0].get_member(row['discord_id']) if row['discord_id'] != '-1' else None
+                name = member.display_name if member else row['name']
+                labels.insert(0, name)
+                values.insert(0, row['value'])
+            self.axes.barh(labels, values, color=['#CD7F32', 'silver', 'gold'], label="Traps", height=0.75)
+            self.axes.set_title("Traps", color='white', fontsize=25)
+            self.axes.set_xlabel("traps")
+            if len(values) == 0:
+                self.axes.set_xticks([])
+                self.axes.set_yticks([])
+                self.axes.text(0, 0, 'No data available.', ha='center', va='center', rotation=45, size=15)
         except (Exception, psycopg2.DatabaseError) as error:
             self.log.exception(error)
-        finally:
-            self.pool.putconn(conn)
 
 
 class GreenieBoard(EmbedElement):
     def render(self, server_name: str, num_rows: int):
-        conn = self.pool.getconn()
         try:
             sql1 = 'SELECT g.player_ucid, p.name, g.points, MAX(g.time) AS time FROM (' \
                    'SELECT player_ucid, ROW_NUMBER() OVER w AS rn, AVG(points) OVER w AS points, MAX(time) ' \
@@ -193,42 +187,39 @@ class GreenieBoard(EmbedElement):
                    'g, players p WHERE g.player_ucid = p.ucid AND g.rn = 1 GROUP BY 1, 2, 3 ORDER BY 3 DESC LIMIT %s'
             sql2 += ' ORDER BY ID DESC LIMIT 10'
 
-            with closing(conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)) as cursor:
-                cursor.execute(sql1, (num_rows, ))
-                if cursor.rowcount > 0:
-                    pilots = points = landings = ''
-                    max_time = datetime.fromisocalendar(1970, 1, 1)
-                    for row in cursor.fetchall():
-                        pilots += utils.escape_string(row['name']) + '\n'
-                        points += f"{row['points']:.2f}\n"
-                        cursor.execute(sql2, (row['player_ucid'], ))
-                        i = 0
-                        landings += '**|'
-                        for landing in cursor.fetchall():
-                            if landing['night']:
-                                landings += const.NIGHT_EMOJIS[landing['grade']] + '|'
-                            else:
-                                landings += const.DAY_EMOJIS[landing['grade']] + '|'
-                            i += 1
-                        for i in range(i, 10):
-                            landings += const.DAY_EMOJIS[None] + '|'
-                        landings += '**\n'
-                        if row['time'] > max_time:
-                            max_time = row['time']
-                    self.add_field(name='Pilot', value=pilots)
-                    self.add_field(name='Avg', value=points)
-                    self.add_field(name='|:one:|:two:|:three:|:four:|:five:|:six:|:seven:|:eight:|:nine:|:zero:|',
-                                   value=landings)
-                    footer = ''
-                    for grade, text in const.GRADES.items():
-                        if grade not in ['WOP', 'OWO', 'TWO', 'WOFD']:
-                            footer += const.DAY_EMOJIS[grade] + '\t' + grade.ljust(6) + '\t' + text + '\n'
-                    footer += '\nLandings are added at the front, meaning 1 is your latest landing.\n' \
-                              'Night landings shown by round markers.'
-                    if max_time:
-                        footer += f'\nLast recorded trap: {max_time:%y-%m-%d %H:%M:%S}'
-                    self.embed.set_footer(text=footer)
+            rows = self.query(sql1, (num_rows, ), cursor_factory=psycopg2.extras.RealDictCursor)
+            if rows:
+                pilots = points = landings = ''
+                max_time = datetime.fromisocalendar(1970, 1, 1)
+                for row in rows:
+                    pilots += utils.escape_string(row['name']) + '\n'
+                    points += f"{row['points']:.2f}\n"
+                    i = 0
+                    landings += '**|'
+                    for landing in self.query(sql2, (row['player_ucid'], ),
+                                              cursor_factory=psycopg2.extras.RealDictCursor):
+                        if landing['night']:
+                            landings += const.NIGHT_EMOJIS[landing['grade']] + '|'
+                        else:
+                            landings += const.DAY_EMOJIS[landing['grade']] + '|'
+                        i += 1
+                    for i in range(i, 10):
+                        landings += const.DAY_EMOJIS[None] + '|'
+                    landings += '**\n'
+                    if row['time'] > max_time:
+                        max_time = row['time']
+                self.add_field(name='Pilot', value=pilots)
+                self.add_field(name='Avg', value=points)
+                self.add_field(name='|:one:|:two:|:three:|:four:|:five:|:six:|:seven:|:eight:|:nine:|:zero:|',
+                               value=landings)
+                footer = ''
+                for grade, text in const.GRADES.items():
+                    if grade not in ['WOP', 'OWO', 'TWO', 'WOFD']:
+                        footer += const.DAY_EMOJIS[grade] + '\t' + grade.ljust(6) + '\t' + text + '\n'
+                footer += '\nLandings are added at the front, meaning 1 is your latest landing.\n' \
+                          'Night landings shown by round markers.'
+                if max_time:
+                    footer += f'\nLast recorded trap: {max_time:%y-%m-%d %H:%M:%S}'
+                self.embed.set_footer(text=footer)
         except (Exception, psycopg2.DatabaseError) as error:
             self.log.exception(error)
-        finally:
-            self.pool.putconn(conn)
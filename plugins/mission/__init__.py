@@ -1 +1,3 @@
 from .version import __version__
+
+__requires__ = ['gamemaster']
@@ -351,10 +351,12 @@ class Mission(Plugin):
             return
         if server.status in [Status.RUNNING, Status.PAUSED, Status.STOPPED]:
             if len(filename) == 0:
-                data = await server.sendtoDCSSync({"command": "listMissions"})
-                installed = [mission[(mission.rfind('\\') + 1):] for mission in data['missionList']]
-                data = await server.sendtoDCSSync({"command": "listMizFiles"})
-                available = data['missions']
+                missions, mizfiles = await server.sendtoDCSPipelined([
+                    {"command": "listMissions"},
+                    {"command": "listMizFiles"}
+                ])
+                installed = [mission[(mission.rfind('\\') + 1):] for mission in missions['missionList']]
+                available = mizfiles['missions']
                 files: list = sorted(list(set(available) - set(installed)))
                 if len(files) == 0:
                     await ctx.send('No (new) mission found to add.')
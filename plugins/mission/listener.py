@@ -1,11 +1,8 @@
 from __future__ import annotations
 import asyncio
-import discord
-from core import utils, EventListener, PersistentReport, Plugin, Report, Status, Side, Mission, Player, Coalition, \
+from core import utils, EventListener, PersistentReport, Report, Status, Side, Mission, Player, Coalition, \
     Channel, DataObjectFactory
 from datetime import datetime
-from discord.ext import tasks
-from queue import Queue
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -52,33 +49,8 @@ class MissionEventListener(EventListener):
         }
     }
 
-    def __init__(self, plugin: Plugin):
-        super().__init__(plugin)
-        self.queue: dict[discord.TextChannel, Queue[str]] = dict()
-        self.print_queue.start()
-
     async def shutdown(self):
-        self.print_queue.cancel()
-        await self._work_queue(True)
-
-    async def _work_queue(self, flush: bool = False):
-        for channel in self.queue.keys():
-            if self.queue[channel].empty():
-                continue
-            messages: set = set()
-            while not self.queue[channel].empty():
-                messages.add(self.queue[channel].get())
-                if messages.__sizeof__() > 1900:
-                    if not flush:
-                        break
-                    await channel.send(''.join(messages))
-                    messages.clear()
-            if messages:
-                await channel.send(''.join(messages))
-
-    @tasks.loop(seconds=2)
-    async def print_queue(self):
-        await self._work_queue()
+        await self.bot.chat.flush()
 
     async def sendMessage(self, data):
         server: Server = self.bot.servers[data['server_name']]
@@ -108,9 +80,7 @@ class MissionEventListener(EventListener):
     def _send_chat_message(self, server: Server, message: str) -> None:
         chat_channel = server.get_channel(Channel.CHAT)
         if chat_channel:
-            if chat_channel not in self.queue:
-                self.queue[chat_channel] = Queue()
-            self.queue[chat_channel].put(message)
+            self.bot.chat.send_to_discord(chat_channel, message)
 
     def _display_mission_embed(self, server: Server):
         try:
@@ -119,7 +89,7 @@ class MissionEventListener(EventListener):
             players = server.get_active_players()
             num_players = len(players) + 1
             report = PersistentReport(self.bot, self.plugin_name, 'serverStatus.json', server, 'mission_embed')
-            self.bot.loop.call_soon(asyncio.create_task, report.render(server=server, num_players=num_players))
+            report.schedule(priority=0, server=server, num_players=num_players)
         except Exception as ex:
             self.log.exception(ex)
 
@@ -127,8 +97,7 @@ class MissionEventListener(EventListener):
     def _display_player_embed(self, server: Server):
         if not self.bot.config.getboolean(server.installation, 'COALITIONS'):
             report = PersistentReport(self.bot, self.plugin_name, 'players.json', server, 'players_embed')
-            self.bot.loop.call_soon(asyncio.create_task,
-                                    report.render(server=server, sides=[Coalition.BLUE, Coalition.RED]))
+            report.schedule(priority=1, server=server, sides=[Coalition.BLUE, Coalition.RED])
 
     async def callback(self, data):
         server: Server = self.bot.servers[data['server_name']]
@@ -156,6 +125,9 @@ class MissionEventListener(EventListener):
             data['players'] = []
             server.status = Status.STOPPED
         server.afk.clear()
+        # read all players at once, instead of one by one on creation
+        await self.bot.loop.run_in_executor(self.bot.executor, self.bot.sessions.hydrate,
+                                            [(p['ucid'], p['name']) for p in data['players'] if p['id'] != 1])
         for p in data['players']:
             if p['id'] == 1:
                 continue
@@ -235,6 +207,8 @@ class MissionEventListener(EventListener):
             server.add_player(player)
         else:
             player.update(data)
+        # the greeting depends on the result of the automatch
+        await self.bot.sessions.wait_for_match(player)
         if not player.member:
             player.sendChatMessage(self.bot.config['DCS']['GREETING_MESSAGE_UNMATCHED'].format(
                 name=player.name, prefix=self.bot.config['BOT']['COMMAND_PREFIX']))
@@ -316,8 +316,7 @@ function dcsbot.getWeatherInfo(json)
 	utils.sendBotTable(msg, json.channel)
 end
 
-function dcsbot.sendChatMessage(json)
-    log.write('DCSServerBot', log.DEBUG, 'Mission: sendChatMessage()')
+local function sendChatMessage(json)
 	local message = json.message
 	if (json.from) then
 		message = json.from .. ': ' .. message
@@ -331,6 +330,18 @@ function dcsbot.sendChatMessage(json)
 	end
 end
 
+function dcsbot.sendChatMessage(json)
+    log.write('DCSServerBot', log.DEBUG, 'Mission: sendChatMessage()')
+	-- the bot relays Discord chat in batches
+	if json.messages then
+		for _, message in ipairs(json.messages) do
+			sendChatMessage(message)
+		end
+	else
+		sendChatMessage(json)
+	end
+end
+
 function dcsbot.sendPopupMessage(json)
 	log.write('DCSServerBot', log.DEBUG, 'Mission: sendPopupMessage()')
 	local message = json.message
@@ -113,7 +113,7 @@ class ExtensionsInfo(report.EmbedElement):
         for ext in server.extensions.values():
             with suppress(Exception):
                 ext.render(self)
-                footer += ', ' + ext.name + ' v' + ext.version
+                footer += ', ' + ext.name + ' v' + ext.get_version()
         self.embed.set_footer(text=footer)
 
 
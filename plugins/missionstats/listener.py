@@ -1,7 +1,7 @@
 import asyncio
 import psycopg2
 from contextlib import closing
-from core import EventListener, Plugin, PersistentReport, Status, Server, Coalition, Channel
+from core import EventListener, Plugin, PersistentReport, Status, Server, Coalition, Channel, QueryCache
 
 
 class MissionStatisticsEventListener(EventListener):
@@ -33,6 +33,14 @@ class MissionStatisticsEventListener(EventListener):
         }
     }
 
+    # events that are needed by the listeners, no matter if they are persisted or not
+    REQUIRED_EVENTS = [
+        'S_EVENT_BIRTH', 'S_EVENT_KILL', 'S_EVENT_UNIT_LOST', 'S_EVENT_PLAYER_LEAVE_UNIT', 'S_EVENT_BASE_CAPTURED',
+        'S_EVENT_LANDING_QUALITY_MARK'
+    ]
+    # high-rate events that are summed up in DCS
+    AGGREGATED_EVENTS = ['S_EVENT_SHOT', 'S_EVENT_HIT']
+
     def __init__(self, plugin: Plugin):
         super().__init__(plugin)
         if not self.bot.mission_stats:
@@ -49,11 +57,24 @@ class MissionStatisticsEventListener(EventListener):
     def _toggle_mission_stats(self, data):
         server: Server = self.bot.servers[data['server_name']]
         if self.bot.config.getboolean(server.installation, 'MISSION_STATISTICS'):
-            server.sendtoDCS({"command": "enableMissionStats"})
+            server.sendtoDCS(self._get_subscription(server))
             server.sendtoDCS({"command": "getMissionSituation", "channel": server.get_channel(Channel.STATUS).id})
         else:
             server.sendtoDCS({"command": "disableMissionStats"})
 
+    def _get_subscription(self, server: Server) -> dict:
+        # only the events that are consumed by the bot are sent by DCS
+        config = self.bot.config[server.installation]
+        return {
+            "command": "enableMissionStats",
+            "required": self.REQUIRED_EVENTS,
+            "persist": config.getboolean('PERSIST_MISSION_STATISTICS'),
+            "filter": [x for x in self.filter if x not in self.REQUIRED_EVENTS],
+            "players_only": not config.getboolean('PERSIST_AI_STATISTICS'),
+            "aggregate": self.AGGREGATED_EVENTS,
+            "interval": int(config['EVENT_AGGREGATION'])
+        }
+
     async def registerDCSServer(self, data):
         server: Server = self.bot.servers[data['server_name']]
         if data['channel'].startswith('sync') and server.status in [Status.RUNNING, Status.PAUSED]:
@@ -70,9 +91,8 @@ class MissionStatisticsEventListener(EventListener):
             stats = self.bot.mission_stats[data['server_name']]
             if 'coalitions' in stats:
                 report = PersistentReport(self.bot, self.plugin_name, 'missionstats.json', server, 'stats_embed')
-                self.bot.loop.call_soon(asyncio.create_task, report.render(stats=stats,
-                                                                           mission_id=server.mission_id,
-                                                                           sides=[Coalition.BLUE, Coalition.RED]))
+                report.schedule(priority=2, stats=stats, mission_id=server.mission_id,
+                                sides=[Coalition.BLUE, Coalition.RED])
 
     def _update_database(self, data):
         if data['eventName'] in self.filter:
@@ -109,12 +129,16 @@ class MissionStatisticsEventListener(EventListener):
                         'place': get_value(data, 'place', 'name'),
                         'comment': data['comment'] if 'comment' in data else ''
                     }
+                    # aggregated events are stored as one row per event
+                    dataset['count'] = data.get('count', 1)
                     cursor.execute('INSERT INTO missionstats (mission_id, event, init_id, init_side, init_type, '
                                    'init_cat, target_id, target_side, target_type, target_cat, weapon, '
-                                   'place, comment) VALUES (%(mission_id)s, %(event)s, %(init_id)s, %(init_side)s, '
+                                   'place, comment) SELECT %(mission_id)s, %(event)s, %(init_id)s, %(init_side)s, '
                                    '%(init_type)s, %(init_cat)s, %(target_id)s, %(target_side)s, %(target_type)s, '
-                                   '%(target_cat)s, %(weapon)s, %(place)s, %(comment)s)', dataset)
+                                   '%(target_cat)s, %(weapon)s, %(place)s, %(comment)s FROM generate_series(1, '
+                                   '%(count)s)', dataset)
                     conn.commit()
+                    QueryCache().invalidate('missionstats')
         except (Exception, psycopg2.DatabaseError) as error:
             self.log.exception(error)
             conn.rollback()
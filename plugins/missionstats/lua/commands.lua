@@ -6,8 +6,35 @@ function dcsbot.getMissionSituation(json)
     net.dostring_in('mission', 'a_do_script("dcsbot.getMissionSituation(\\"' .. json.channel .. '\\")")')
 end
 
-function dcsbot.enableMissionStats()
-    net.dostring_in('mission', 'a_do_script("dcsbot.enableMissionStats()")')
+-- converts the subscription into a lua table that can be passed into the mission environment
+local function serialize(value)
+    if type(value) == 'table' then
+        local items = {}
+        for k, v in pairs(value) do
+            if type(k) == 'number' then
+                table.insert(items, serialize(v))
+            else
+                table.insert(items, k .. '=' .. serialize(v))
+            end
+        end
+        return '{' .. table.concat(items, ',') .. '}'
+    elseif type(value) == 'string' then
+        return "'" .. value .. "'"
+    else
+        return tostring(value)
+    end
+end
+
+function dcsbot.enableMissionStats(json)
+    local subscription = {
+        required = json.required,
+        persist = json.persist,
+        filter = json.filter,
+        players_only = json.players_only,
+        aggregate = json.aggregate,
+        interval = tonumber(json.interval)
+    }
+    net.dostring_in('mission', 'a_do_script("dcsbot.enableMissionStats(' .. serialize(subscription) .. ')")')
 end
 
 function dcsbot.disableMissionStats()
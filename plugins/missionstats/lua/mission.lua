@@ -22,6 +22,76 @@ world.event.S_EVENT_PLAYER_ENTER_AIRCRAFT = world.event.S_EVENT_MAX + 1007
 
 dcsbot.mission_stats_enabled = false
 
+-- event subscription, sent by the bot on enableMissionStats
+local subscription = {
+	required = {},			-- events that are always sent
+	persist = true,			-- if false, only the required events are sent
+	filter = {},			-- events that are never sent (unless required)
+	players_only = false,	-- if true, events without a player involved are only sent if required
+	aggregate = {},			-- events that are summed up per unit, target and weapon
+	interval = 5			-- interval in seconds in which aggregated events are sent
+}
+local aggregated = {}
+local aggregation_scheduled = false
+
+local function toSet(list)
+	local set = {}
+	for _, value in ipairs(list or {}) do
+		set[value] = true
+	end
+	return set
+end
+
+local function isPlayer(object)
+	return object ~= nil and object.getPlayerName ~= nil and object:getPlayerName() ~= nil
+end
+
+local function isSubscribed(event, eventName)
+	if subscription.required[eventName] then
+		return true
+	end
+	if not subscription.persist or subscription.filter[eventName] then
+		return false
+	end
+	if subscription.players_only and not isPlayer(event.initiator) and not isPlayer(event.target) then
+		return false
+	end
+	return true
+end
+
+local function flushAggregated()
+	for _, msg in pairs(aggregated) do
+		dcsbot.sendBotTable(msg)
+	end
+	aggregated = {}
+end
+
+local function aggregate(msg)
+	local key = msg.eventName
+	if msg.initiator then
+		key = key .. '|' .. (msg.initiator.unit_name or '')
+	end
+	if msg.target then
+		key = key .. '|' .. (msg.target.unit_name or '')
+	end
+	if msg.weapon then
+		key = key .. '|' .. msg.weapon.name
+	end
+	if aggregated[key] then
+		aggregated[key].count = aggregated[key].count + 1
+	else
+		msg.count = 1
+		aggregated[key] = msg
+	end
+	if not aggregation_scheduled then
+		aggregation_scheduled = true
+		timer.scheduleFunction(function()
+			aggregation_scheduled = false
+			flushAggregated()
+		end, nil, timer.getTime() + subscription.interval)
+	end
+end
+
 dcsbot.eventHandler = {}
 function dcsbot.eventHandler:onEvent(event)
 	status, err = pcall(onEvent, event)
@@ -99,6 +169,9 @@ function onEvent(event)
 		else
 			return -- ignore other events
 		end
+		if not isSubscribed(event, msg.eventName) then
+			return
+		end
 		msg.time = event.time
 		if event.initiator then
 			msg.initiator = {}
@@ -220,7 +293,13 @@ function onEvent(event)
 		if event.comment then
 			msg.comment = event.comment
 		end
-		dcsbot.sendBotTable(msg)
+		if subscription.aggregate[msg.eventName] and subscription.interval > 0 then
+			aggregate(msg)
+		else
+			-- keep the order of events
+			flushAggregated()
+			dcsbot.sendBotTable(msg)
+		end
 	end
 end
 
@@ -283,7 +362,15 @@ function dcsbot.getMissionSituation(channel)
 	dcsbot.sendBotTable(msg, channel)
 end
 
-function dcsbot.enableMissionStats()
+function dcsbot.enableMissionStats(json)
+	if json then
+		subscription.required = toSet(json.required)
+		subscription.persist = json.persist
+		subscription.filter = toSet(json.filter)
+		subscription.players_only = json.players_only
+		subscription.aggregate = toSet(json.aggregate)
+		subscription.interval = tonumber(json.interval) or subscription.interval
+	end
 	if not dcsbot.mission_stats_enabled then
         world.addEventHandler(dcsbot.eventHandler)
         env.info('DCSServerBot - Mission Statistics enabled.')
@@ -294,6 +381,7 @@ end
 function dcsbot.disableMissionStats()
 	if dcsbot.mission_stats_enabled then
         world.removeEventHandler(dcsbot.eventHandler)
+        flushAggregated()
         env.info('DCSServerBot - Mission Statistics disabled.')
         dcsbot.mission_stats_enabled = false
     end
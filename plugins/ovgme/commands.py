@@ -3,16 +3,27 @@ import os
 import psycopg2
 import re
 import shutil
+import threading
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import closing, suppress
-from core import Status, Plugin, DCSServerBot, PluginConfigurationError, utils, Server
+from core import Status, Plugin, DCSServerBot, PluginConfigurationError, utils, Server, TEventListener, \
+    DCS_EXECUTABLES
 from discord.ext import commands
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Type
+from .store import ContentStore, PackageManifest, ManifestEntry
 
 OVGME_FOLDERS = ['RootFolder', 'SavedGames']
 
 
 class OvGME(Plugin):
+    def __init__(self, bot: DCSServerBot, eventlistener: Type[TEventListener] = None):
+        self.stores: dict[str, ContentStore] = dict()
+        self.locks: dict[str, threading.Lock] = dict()
+        self._lock = threading.Lock()
+        self._active = 0
+        super().__init__(bot, eventlistener)
+
     def install(self):
         super().install()
         if self.locals and 'configs' in self.locals:
@@ -20,16 +31,30 @@ class OvGME(Plugin):
             for folder in OVGME_FOLDERS:
                 if folder not in config:
                     raise PluginConfigurationError(self.plugin_name, folder)
-            self.install_packages()
+
+    async def cog_load(self) -> None:
+        # copying the packages would block the bot otherwise
+        await self.bot.loop.run_in_executor(self.bot.executor, self.install_packages)
+
+    def uninstall_packages(self, folder: str):
+        with ThreadPoolExecutor(thread_name_prefix='OvGME') as executor:
+            futures = [
+                executor.submit(self.uninstall_package, server, folder, package_name, version)
+                for server in self.bot.servers.values()
+                for package_name, version in self.get_installed_packages(server, folder)
+            ]
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as ex:
+                    self.log.exception(ex)
 
     async def before_dcs_update(self):
         # uninstall all RootFolder-packages
-        for server_name, server in self.bot.servers.items():
-            for package_name, version in self.get_installed_packages(server, 'RootFolder'):
-                self.uninstall_package(server, 'RootFolder', package_name, version)
+        await self.bot.loop.run_in_executor(self.bot.executor, self.uninstall_packages, 'RootFolder')
 
     async def after_dcs_update(self):
-        self.install_packages()
+        await self.bot.loop.run_in_executor(self.bot.executor, self.install_packages)
 
     def rename(self, old_name: str, new_name: str):
         conn = self.pool.getconn()
@@ -67,47 +92,55 @@ class OvGME(Plugin):
     def install_packages(self):
         if not self.locals or 'configs' not in self.locals:
             return
-        for server_name, server in self.bot.servers.items():
-            config = self.get_config(server)
-            if 'packages' not in config:
-                return
-            for package in config['packages']:
-                version = package['version'] if package['version'] != 'latest' \
-                    else self.get_latest_version(package['source'], package['name'])
-                installed = self.check_package(server, package['source'], package['name'])
-                # If the bot is still starting up (default), we're trying to figure out the state of the DCS process
-                for exe in ['DCS_server.exe', 'DCS.exe']:
-                    p = utils.find_process(exe, server.installation)
-                    if p:
-                        break
-                if (not installed or installed != version) and \
-                        (p or server.status != Status.SHUTDOWN):
-                    self.log.warning(f"  - Server {server.name} needs to be shutdown to install packages.")
-                    break
-                maintenance = server.maintenance
-                server.maintenance = True
+        # servers are independent of each other, so their packages are installed in parallel
+        with ThreadPoolExecutor(thread_name_prefix='OvGME') as executor:
+            futures = [executor.submit(self.install_server_packages, x) for x in self.bot.servers.values()]
+            for future in futures:
                 try:
-                    if not installed:
-                        if self.install_package(server, package['source'], package['name'], version):
-                            self.log.info(f"  - Package {package['name']}_v{version} installed.")
-                        else:
-                            self.log.warning(f"  - Package {package['name']}_v{version} not found!")
-                    elif installed != version:
-                        if self.is_greater(installed, version):
-                            self.log.debug(f"  - Installed package {package['name']}_v{installed} is newer than the "
-                                           f"configured version. Skipping.")
-                            continue
-                        if not self.uninstall_package(server, package['source'], package['name'], installed):
-                            self.log.warning(f"  - Package {package['name']}_v{installed} could not be uninstalled!")
-                        elif not self.install_package(server, package['source'], package['name'], version):
-                            self.log.warning(f"  - Package {package['name']}_v{version} could not be installed!")
-                        else:
-                            self.log.info(f"  - Package {package['name']}_v{installed} updated to v{version}.")
-                finally:
-                    if maintenance:
-                        server.maintenance = maintenance
+                    future.result()
+                except Exception as ex:
+                    self.log.exception(ex)
+        self.prune()
+
+    def install_server_packages(self, server: Server):
+        config = self.get_config(server)
+        if 'packages' not in config:
+            return
+        self.cleanup(server)
+        # If the bot is still starting up (default), we're trying to figure out the state of the DCS process
+        p = self.bot.processes.find(server.installation, DCS_EXECUTABLES, server.installation)
+        for package in config['packages']:
+            version = package['version'] if package['version'] != 'latest' \
+                else self.get_latest_version(package['source'], package['name'])
+            installed = self.check_package(server, package['source'], package['name'])
+            if (not installed or installed != version) and \
+                    (p or server.status != Status.SHUTDOWN):
+                self.log.warning(f"  - Server {server.name} needs to be shutdown to install packages.")
+                break
+            maintenance = server.maintenance
+            server.maintenance = True
+            try:
+                if not installed:
+                    if self.install_package(server, package['source'], package['name'], version):
+                        self.log.info(f"  - Package {package['name']}_v{version} installed.")
                     else:
-                        server.maintenance = False
+                        self.log.warning(f"  - Package {package['name']}_v{version} not found!")
+                elif installed != version:
+                    if self.is_greater(installed, version):
+                        self.log.debug(f"  - Installed package {package['name']}_v{installed} is newer than the "
+                                       f"configured version. Skipping.")
+                        continue
+                    if not self.uninstall_package(server, package['source'], package['name'], installed):
+                        self.log.warning(f"  - Package {package['name']}_v{installed} could not be uninstalled!")
+                    elif not self.install_package(server, package['source'], package['name'], version):
+                        self.log.warning(f"  - Package {package['name']}_v{version} could not be installed!")
+                    else:
+                        self.log.info(f"  - Package {package['name']}_v{installed} updated to v{version}.")
+            finally:
+                if maintenance:
+                    server.maintenance = maintenance
+                else:
+                    server.maintenance = False
 
     def get_latest_version(self, folder: str, package: str) -> str:
         config = self.locals['configs'][0]
@@ -129,68 +162,148 @@ class OvGME(Plugin):
         finally:
             self.pool.putconn(conn)
 
+    def get_store(self, path: str) -> ContentStore:
+        with self._lock:
+            if path not in self.stores:
+                self.stores[path] = ContentStore(os.path.join(path, '.store'))
+            return self.stores[path]
+
+    def get_lock(self, target: str) -> threading.Lock:
+        # servers share the DCS installation, so installations into the same target have to be serialized
+        with self._lock:
+            return self.locks.setdefault(os.path.normcase(os.path.normpath(target)), threading.Lock())
+
+    def get_target(self, server: Server, folder: str) -> str:
+        return os.path.expandvars(self.bot.config['DCS']['DCS_INSTALLATION']) if folder == 'RootFolder' else \
+            os.path.expandvars(self.bot.config[server.installation]['DCS_HOME'])
+
+    def cleanup(self, server: Server):
+        # roll back installations that were interrupted, e.g. by a crash of the bot
+        config = self.get_config(server)
+        for folder in OVGME_FOLDERS:
+            path = os.path.expandvars(config[folder])
+            instance_path = os.path.join(path, '.' + server.installation)
+            if not os.path.exists(instance_path):
+                continue
+            for package in os.listdir(instance_path):
+                manifest = PackageManifest.load(os.path.join(instance_path, package, 'manifest.json'))
+                if manifest and not manifest.complete:
+                    self.log.warning(f"  - Rolling back incomplete installation of package {package}.")
+                    with self.get_lock(manifest.target):
+                        manifest.rollback(self.get_store(path))
+                    shutil.rmtree(os.path.join(instance_path, package))
+
+    def prune(self):
+        # only prune, if no installation is running, as these might have staged objects that are not referenced yet
+        with self._lock:
+            if self._active:
+                return
+            stores = list(self.stores.values())
+            for store in stores:
+                count = store.prune()
+                if count:
+                    self.log.debug(f"  - {count} unused files removed from {store.path}.")
+
+    def stage_package(self, store: ContentStore, filename: str) -> list[Tuple[str, str]]:
+        # copies all files of a package into the content store, the installation isn't touched yet
+        files: list[Tuple[str, str]] = []
+        if os.path.isfile(filename):
+            with zipfile.ZipFile(filename, 'r') as zip:
+                for info in zip.infolist():
+                    if not info.is_dir():
+                        with zip.open(info) as stream:
+                            files.append((info.filename, store.put_stream(stream)))
+        else:
+            for root, _, names in os.walk(filename):
+                for name in names:
+                    file = os.path.join(root, name)
+                    files.append((os.path.relpath(file, filename).replace('\\', '/'), store.put_file(file)))
+        return files
+
     def install_package(self, server: Server, folder: str, package_name: str, version: str) -> bool:
         config = self.get_config(server)
         path = os.path.expandvars(config[folder])
-        os.makedirs(os.path.join(path, '.' + server.installation), exist_ok=True)
-        target = os.path.expandvars(self.bot.config['DCS']['DCS_INSTALLATION']) if folder == 'RootFolder' else \
-            os.path.expandvars(self.bot.config[server.installation]['DCS_HOME'])
-        for file in os.listdir(path):
-            filename = os.path.join(path, file)
-            if (os.path.isfile(filename) and file == package_name + '_v' + version + '.zip') or \
-                    (os.path.isdir(filename) and file == package_name + '_v' + version):
-                ovgme_path = os.path.join(path, '.' + server.installation, package_name + '_v' + version)
-                os.makedirs(ovgme_path, exist_ok=True)
-                if os.path.isfile(filename) and file == package_name + '_v' + version + '.zip':
-                    with open(os.path.join(ovgme_path, 'install.log'), 'w') as log:
-                        with zipfile.ZipFile(filename, 'r') as zip:
-                            for name in zip.namelist():
-                                orig = os.path.join(target, name)
-                                if os.path.exists(orig) and os.path.isfile(orig):
-                                    log.write(f"x {name}\n")
-                                    shutil.copy2(orig, os.path.join(ovgme_path, name))
-                                else:
-                                    log.write(f"w {name}\n")
-                                zip.extract(name, target)
-                else:
-                    with open(os.path.join(ovgme_path, 'install.log'), 'w') as log:
-                        def backup(p, names) -> list[str]:
-                            dir = p[len(os.path.join(path, package_name + '_v' + version)):].replace('\\', '/').lstrip('/')
-                            for name in names:
-                                if len(dir):
-                                    name = dir + '/' + name
-                                orig = os.path.join(target, name)
-                                if os.path.exists(orig) and os.path.isfile(orig):
-                                    log.write(f"x {name}\n")
-                                    shutil.copy2(orig, os.path.join(ovgme_path, name))
-                                else:
-                                    log.write(f"w {name}\n")
-                            return []
-
-                        shutil.copytree(filename, target, ignore=backup, dirs_exist_ok=True)
-                conn = self.pool.getconn()
+        filename = os.path.join(path, package_name + '_v' + version)
+        if os.path.isfile(filename + '.zip'):
+            filename += '.zip'
+        elif not os.path.isdir(filename):
+            return False
+        target = self.get_target(server, folder)
+        store = self.get_store(path)
+        manifest = PackageManifest(filename=os.path.join(path, '.' + server.installation, package_name + '_v' + version,
+                                                         'manifest.json'), target=target)
+        with self._lock:
+            self._active += 1
+        try:
+            files = self.stage_package(store, filename)
+            with self.get_lock(target):
+                # backup everything that is going to be replaced and write the manifest before the first change,
+                # so that an interrupted installation can always be rolled back
+                dirs = set()
+                for name, digest in files:
+                    file = os.path.normpath(os.path.join(target, name))
+                    directory = os.path.dirname(name)
+                    while directory and directory not in dirs and not os.path.exists(os.path.join(target, directory)):
+                        dirs.add(directory)
+                        directory = os.path.dirname(directory)
+                    backup = store.put_file(file) if os.path.isfile(file) else None
+                    manifest.files.append(ManifestEntry(name=name, digest=digest, backup=backup))
+                manifest.dirs = sorted(dirs)
+                manifest.save()
                 try:
-                    with closing(conn.cursor()) as cursor:
-                        cursor.execute('INSERT INTO ovgme_packages (server_name, package_name, version, folder) '
-                                       'VALUES (%s, %s, %s, %s)', (server.name, package_name, version,
-                                                                   folder))
-                    conn.commit()
-                except (Exception, psycopg2.DatabaseError) as error:
-                    self.log.exception(error)
-                    conn.rollback()
-                finally:
-                    self.pool.putconn(conn)
-                return True
-        return False
+                    for entry in manifest.files:
+                        store.link(entry.digest, os.path.normpath(os.path.join(target, entry.name)))
+                except Exception:
+                    manifest.rollback(store)
+                    raise
+                manifest.complete = True
+                manifest.save()
+        finally:
+            with self._lock:
+                self._active -= 1
+        conn = self.pool.getconn()
+        try:
+            with closing(conn.cursor()) as cursor:
+                cursor.execute('INSERT INTO ovgme_packages (server_name, package_name, version, folder) '
+                               'VALUES (%s, %s, %s, %s)', (server.name, package_name, version,
+                                                           folder))
+            conn.commit()
+        except (Exception, psycopg2.DatabaseError) as error:
+            self.log.exception(error)
+            conn.rollback()
+        finally:
+            self.pool.putconn(conn)
+        return True
 
     def uninstall_package(self, server: Server, folder: str, package_name: str, version: str) -> bool:
         config = self.get_config(server)
         path = os.path.expandvars(config[folder])
         ovgme_path = os.path.join(path, '.' + server.installation, package_name + '_v' + version)
-        target = os.path.expandvars(self.bot.config['DCS']['DCS_INSTALLATION']) if folder == 'RootFolder' else \
-            os.path.expandvars(self.bot.config[server.installation]['DCS_HOME'])
-        if not os.path.exists(os.path.join(ovgme_path, 'install.log')):
+        manifest = PackageManifest.load(os.path.join(ovgme_path, 'manifest.json'))
+        if manifest:
+            with self.get_lock(manifest.target):
+                manifest.rollback(self.get_store(path))
+        elif os.path.exists(os.path.join(ovgme_path, 'install.log')):
+            # packages installed by older versions of this plugin
+            self.uninstall_legacy_package(ovgme_path, self.get_target(server, folder))
+        else:
             return False
+        shutil.rmtree(ovgme_path)
+        conn = self.pool.getconn()
+        try:
+            with closing(conn.cursor()) as cursor:
+                cursor.execute('DELETE FROM ovgme_packages WHERE server_name = %s AND folder = %s AND package_name = '
+                               '%s AND version = %s', (server.name, folder, package_name, version))
+            conn.commit()
+        except (Exception, psycopg2.DatabaseError) as error:
+            self.log.exception(error)
+            conn.rollback()
+        finally:
+            self.pool.putconn(conn)
+        return True
+
+    @staticmethod
+    def uninstall_legacy_package(ovgme_path: str, target: str):
         with open(os.path.join(ovgme_path, 'install.log')) as log:
             lines = log.readlines()
             # delete has to run reverse to clean the directories
@@ -205,19 +318,6 @@ class OvGME(Plugin):
                             os.removedirs(file)
                 elif lines[i].startswith('x'):
                     shutil.copy2(os.path.join(ovgme_path, filename), file)
-        shutil.rmtree(ovgme_path)
-        conn = self.pool.getconn()
-        try:
-            with closing(conn.cursor()) as cursor:
-                cursor.execute('DELETE FROM ovgme_packages WHERE server_name = %s AND folder = %s AND package_name = '
-                               '%s AND version = %s', (server.name, folder, package_name, version))
-            conn.commit()
-        except (Exception, psycopg2.DatabaseError) as error:
-            self.log.exception(error)
-            conn.rollback()
-        finally:
-            self.pool.putconn(conn)
-        return True
 
     def format_packages(self, data, marker, marker_emoji):
         embed = discord.Embed(title="List of installed Packages", color=discord.Color.blue())
@@ -272,10 +372,12 @@ class OvGME(Plugin):
                     await utils.yn_question(ctx, f"Would you like to update package {packages[n][1]}?"):
                 msg = await ctx.send('Updating ...')
                 try:
-                    if not self.uninstall_package(server, packages[n][0], packages[n][1], packages[n][2]):
+                    if not await self.bot.loop.run_in_executor(self.bot.executor, self.uninstall_package, server,
+                                                                packages[n][0], packages[n][1], packages[n][2]):
                         await ctx.send(f"Package {packages[n][1]}_v{packages[n][2]} could not be uninstalled!")
                         return
-                    elif not self.install_package(server, packages[n][0], packages[n][1], latest):
+                    elif not await self.bot.loop.run_in_executor(self.bot.executor, self.install_package, server,
+                                                                  packages[n][0], packages[n][1], latest):
                         await ctx.send(f"Package {packages[n][1]}_v{latest} could not be installed!")
                         return
                     await ctx.send(f"Package {packages[n][1]} updated from version v{packages[n][2]} to v{latest}.")
@@ -285,7 +387,8 @@ class OvGME(Plugin):
             elif await utils.yn_question(ctx, f"Would you like to uninstall package {packages[n][1]}?"):
                 msg = await ctx.send('Uninstalling ...')
                 try:
-                    if self.uninstall_package(server, packages[n][0], packages[n][1], packages[n][2]):
+                    if await self.bot.loop.run_in_executor(self.bot.executor, self.uninstall_package, server,
+                                                            packages[n][0], packages[n][1], packages[n][2]):
                         await ctx.send(f"Package {packages[n][1]} uninstalled.")
                     else:
                         await ctx.send(f"Package {packages[n][1]} could not be uninstalled.")
@@ -345,7 +448,8 @@ class OvGME(Plugin):
             return
         msg = await ctx.send('Installing ...')
         try:
-            if self.install_package(server, folder, files[n][0], files[n][1]):
+            if await self.bot.loop.run_in_executor(self.bot.executor, self.install_package, server, folder,
+                                                    files[n][0], files[n][1]):
                 await ctx.send(f"Package {files[n][0]} installed.")
             else:
                 await ctx.send(f"Package {files[n][0]} could not be installed.")
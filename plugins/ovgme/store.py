@@ -0,0 +1,220 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from contextlib import suppress
+from dataclasses import dataclass, field, asdict
+from typing import BinaryIO, Optional
+
+CHUNK_SIZE = 1024 * 1024
+# ioctl to clone a file on Linux (btrfs, XFS, ...)
+FICLONE = 0x40049409
+
+
+def _hash_file(filename: str) -> str:
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _reflink(source: str, target: str) -> bool:
+    # a copy-on-write clone shares the data with the source, but changes to one of them don't affect the other
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(source, 'rb') as src, open(target, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return True
+    except OSError:
+        with suppress(OSError):
+            os.remove(target)
+        return False
+
+
+def _hardlink(source: str, target: str) -> bool:
+    # hardlinks need the same volume
+    try:
+        os.link(source, target)
+        return True
+    except OSError:
+        return False
+
+
+class ContentStore:
+    """
+    Stores files by their sha256, so that package files and backups are only kept once, no matter how many servers
+    use them. Objects are installed as copy-on-write clones where the filesystem supports them, as hardlinks if the
+    store is on the same volume and as copies otherwise.
+    As DCS or a mod manager might change a hardlinked file in place, an object is checked again before it is reused,
+    whenever its size or modification time has changed. Files are always copied into the store, so that objects never
+    share their data with a live file before they are installed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # digest => (size, mtime) of the object when its hash was checked last
+        self.verified: dict[str, tuple[int, int]] = dict()
+        self._lock = threading.Lock()
+
+    def get_path(self, digest: str) -> str:
+        return os.path.join(self.path, digest[:2], digest)
+
+    def _add(self, tmp: str, digest: str) -> str:
+        path = self.get_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if self.is_valid(digest):
+            os.remove(tmp)
+        else:
+            # a corrupted object has been removed already
+            os.replace(tmp, path)
+            self._verified(digest, path)
+        return digest
+
+    def _verified(self, digest: str, path: str) -> None:
+        st = os.stat(path)
+        with self._lock:
+            self.verified[digest] = (st.st_size, st.st_mtime_ns)
+
+    def _tmp(self) -> str:
+        os.makedirs(self.path, exist_ok=True)
+        return os.path.join(self.path, f'.{uuid.uuid4()}.tmp')
+
+    def put_file(self, filename: str) -> str:
+        digest = _hash_file(filename)
+        if self.is_valid(digest):
+            return digest
+        tmp = self._tmp()
+        shutil.copy2(filename, tmp)
+        return self._add(tmp, digest)
+
+    def put_stream(self, stream: BinaryIO) -> str:
+        digest = hashlib.sha256()
+        tmp = self._tmp()
+        with open(tmp, 'wb') as f:
+            while chunk := stream.read(CHUNK_SIZE):
+                digest.update(chunk)
+                f.write(chunk)
+        return self._add(tmp, digest.hexdigest())
+
+    def is_valid(self, digest: str) -> bool:
+        # the hash is only calculated again, if the object might have been changed through a hardlink
+        path = self.get_path(digest)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return False
+        with self._lock:
+            if self.verified.get(digest) == (st.st_size, st.st_mtime_ns):
+                return True
+        if _hash_file(path) != digest:
+            os.remove(path)
+            with self._lock:
+                self.verified.pop(digest, None)
+            return False
+        with self._lock:
+            self.verified[digest] = (st.st_size, st.st_mtime_ns)
+        return True
+
+    def link(self, digest: str, target: str, *, hardlink: bool = True) -> None:
+        # replaces the target atomically with a clone, hardlink or copy of the object
+        if not self.is_valid(digest):
+            raise ValueError(f'Object {digest} is missing or corrupted in {self.path}.')
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = target + '.ovgme'
+        with suppress(FileNotFoundError):
+            os.remove(tmp)
+        source = self.get_path(digest)
+        if not _reflink(source, tmp) and not (hardlink and _hardlink(source, tmp)):
+            shutil.copy2(source, tmp)
+        os.replace(tmp, target)
+
+    def referenced(self) -> set[str]:
+        digests = set()
+        for manifest in PackageManifest.find_all(os.path.dirname(self.path)):
+            for entry in manifest.files:
+                digests.add(entry.digest)
+                if entry.backup:
+                    digests.add(entry.backup)
+        return digests
+
+    def prune(self) -> int:
+        # removes all objects that are neither part of an installed package nor a backup
+        referenced = self.referenced()
+        count = 0
+        for root, _, files in os.walk(self.path):
+            for name in files:
+                if name not in referenced:
+                    with suppress(OSError):
+                        os.remove(os.path.join(root, name))
+                        count += 1
+        with self._lock:
+            self.verified = {k: v for k, v in self.verified.items() if k in referenced}
+        return count
+
+
+@dataclass
+class ManifestEntry:
+    name: str
+    digest: str
+    backup: Optional[str] = None
+
+
+@dataclass
+class PackageManifest:
+    filename: str
+    target: str
+    files: list[ManifestEntry] = field(default_factory=list)
+    dirs: list[str] = field(default_factory=list)
+    complete: bool = False
+
+    @staticmethod
+    def load(filename: str) -> Optional['PackageManifest']:
+        if not os.path.exists(filename):
+            return None
+        with open(filename, encoding='utf-8') as f:
+            data = json.load(f)
+        return PackageManifest(filename=filename, target=data['target'],
+                               files=[ManifestEntry(**x) for x in data['files']],
+                               dirs=data['dirs'], complete=data['complete'])
+
+    @staticmethod
+    def find_all(path: str) -> list['PackageManifest']:
+        # all manifests of all instances below an OvGME folder
+        manifests = []
+        for instance in [x for x in os.listdir(path) if x.startswith('.') and x != '.store']:
+            if not os.path.isdir(os.path.join(path, instance)):
+                continue
+            for package in os.listdir(os.path.join(path, instance)):
+                with suppress(Exception):
+                    manifest = PackageManifest.load(os.path.join(path, instance, package, 'manifest.json'))
+                    if manifest:
+                        manifests.append(manifest)
+        return manifests
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+        data = asdict(self)
+        del data['filename']
+        with open(self.filename + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.replace(self.filename + '.tmp', self.filename)
+
+    def rollback(self, store: ContentStore) -> None:
+        # restores the state before the installation, in reverse order
+        for entry in reversed(self.files):
+            file = os.path.normpath(os.path.join(self.target, entry.name))
+            if entry.backup:
+                # other manifests might still reference the backup, so it is never restored as a hardlink
+                store.link(entry.backup, file, hardlink=False)
+            elif os.path.isfile(file):
+                os.remove(file)
+        for directory in sorted(self.dirs, key=len, reverse=True):
+            with suppress(OSError):
+                os.rmdir(os.path.join(self.target, directory))
+        os.remove(self.filename)
@@ -6,11 +6,14 @@ import os
 import platform
 import random
 import string
+import time
+from contextlib import asynccontextmanager
 from copy import deepcopy
 from discord import Interaction
 from discord.ui import View, Select, Button
-from core import Plugin, PluginRequiredError, utils, Status, MizFile, Autoexec, Extension, Server, Coalition, Channel
-from datetime import datetime, timedelta
+from core import Plugin, PluginRequiredError, utils, Status, MizFile, Autoexec, Extension, Server, Coalition, Channel, \
+    DCS_EXECUTABLES
+from datetime import date, datetime, timedelta
 from discord.ext import tasks, commands
 from typing import Type, Optional, List, TYPE_CHECKING, cast
 from .listener import SchedulerListener
@@ -19,10 +22,26 @@ if TYPE_CHECKING:
     from core import DCSServerBot, TEventListener
 
 
+# the schedule is checked at least that often (in seconds), even if nothing is due
+MAX_SCHEDULE_INTERVAL = 900.0
+# how often a warning countdown checks the maintenance flag (in seconds)
+WARN_CHECK_INTERVAL = 5.0
+
+
 class Scheduler(Plugin):
 
     def __init__(self, bot: DCSServerBot, eventlistener: Type[TEventListener] = None):
         super().__init__(bot, eventlistener)
+        # set and replaced on every state change that might affect the schedule
+        self.changed = asyncio.Event()
+        # actions (launch, teardown, restart) that are running per server
+        self.actions: dict[str, asyncio.Task] = dict()
+        # (server, local time) => day it fired last, as the schedule is checked more than once a minute
+        self.restarted: dict[tuple[str, str], date] = dict()
+        # loading a mission takes all the CPU DCS can get, so only some servers are launched at a time
+        self.launches = asyncio.Semaphore(max(self.bot.config.getint('DCS', 'MAX_PARALLEL_STARTS'), 1))
+        self.next_launch = 0.0
+        self.timer = asyncio.create_task(self.run_schedule())
         self.check_state.start()
         self.lastrun = None
         self.schedule_extensions.start()
@@ -30,8 +49,39 @@ class Scheduler(Plugin):
     async def cog_unload(self):
         self.schedule_extensions.cancel()
         self.check_state.cancel()
+        self.timer.cancel()
         await super().cog_unload()
 
+    def notify(self):
+        # wakes up the schedule and everyone waiting for a state change
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    async def wait_for_change(self, timeout: float, event: Optional[asyncio.Event] = None):
+        try:
+            await asyncio.wait_for((event or self.changed).wait(), max(timeout, 0))
+        except asyncio.TimeoutError:
+            pass
+
+    def run_action(self, server: Server, coro) -> None:
+        # only one scheduled action per server at a time
+        if server.name in self.actions:
+            coro.close()
+            return
+
+        self.actions[server.name] = asyncio.create_task(coro)
+        self.actions[server.name].add_done_callback(lambda _: self.actions.pop(server.name, None))
+
+    @asynccontextmanager
+    async def launch_slot(self):
+        async with self.launches:
+            # launches are staggered, even if more of them are allowed to run in parallel
+            now = time.monotonic()
+            start = max(now, self.next_launch)
+            self.next_launch = start + self.bot.config.getfloat('DCS', 'START_DELAY')
+            await asyncio.sleep(start - now)
+            yield
+
     def read_locals(self) -> dict:
         # create a base scheduler.json if non exists
         file = 'config/scheduler.json'
@@ -180,16 +230,35 @@ class Scheduler(Plugin):
                 else:
                     continue
 
-    async def launch_dcs(self, server: Server, config: dict, member: Optional[discord.Member] = None):
+    async def start_extensions(self, server: Server):
+        async def start(ext: Extension):
+            if not await ext.check_running() and await ext.startup():
+                ext.reset()
+                self.log.info(f"  - {ext.name} v{ext.get_version()} launched for \"{server.name}\".")
+                await self.bot.audit(f"{ext.name} started", server=server)
+
+        # extensions don't depend on each other, so they can be started in parallel
+        for result in await asyncio.gather(*[start(ext) for ext in server.extensions.values()],
+                                           return_exceptions=True):
+            if isinstance(result, Exception):
+                self.log.exception(result)
+
+    async def launch_dcs(self, server: Server, config: dict, member: Optional[discord.Member] = None, *,
+                         mizfile: Optional[tuple[str, str]] = None):
         self.init_extensions(server, config)
+        # DCS writes its options on exit, so these can only run when the server is down
+        await asyncio.gather(*[server.extensions[ext].prepare() for ext in sorted(server.extensions)])
+        # these might change the mission file, so they have to run one after the other
         for ext in sorted(server.extensions):
-            await server.extensions[ext].prepare()
             await server.extensions[ext].beforeMissionLoad()
         # change the weather in the mission if provided
         if not server.maintenance and 'restart' in config and 'settings' in config['restart']:
-            self.change_mizfile(server, config)
-        self.log.info(f"  => DCS server \"{server.name}\" starting up ...")
-        await server.startup()
+            await self.apply_mizfile(server, config, prepared=mizfile)
+        else:
+            self.discard_mizfile(mizfile)
+        async with self.launch_slot():
+            self.log.info(f"  => DCS server \"{server.name}\" starting up ...")
+            await server.startup()
         if not member:
             self.log.info(f"  => DCS server \"{server.name}\" started by "
                           f"{string.capwords(self.plugin_name)}.")
@@ -218,23 +287,34 @@ class Scheduler(Plugin):
                 item = 'server'
             else:
                 item = 'mission'
-            while restart_in > 0 and server.is_populated() and not server.maintenance:
-                for warn_time in warn_times:
-                    if warn_time == restart_in:
-                        server.sendPopupMessage(Coalition.ALL, warn_text.format(item=item, what=what,
-                                                                                when=utils.format_time(warn_time)),
-                                                self.bot.config['BOT']['MESSAGE_TIMEOUT'])
-                        chat_channel = server.get_channel(Channel.CHAT)
-                        if chat_channel:
-                            await chat_channel.send(warn_text.format(item=item, what=what,
-                                                                     when=utils.format_time(warn_time)))
-                await asyncio.sleep(1)
-                restart_in -= 1
+            deadline = time.monotonic() + restart_in
+
+            async def wait_until(remaining: float) -> bool:
+                # sleeps until the given time before the deadline, unless the server got empty in the meantime
+                while server.is_populated() and not server.maintenance:
+                    timeout = deadline - time.monotonic() - remaining
+                    if timeout <= 0:
+                        return True
+                    # the maintenance flag can be set anywhere, so check it every now and then
+                    await self.wait_for_change(min(timeout, WARN_CHECK_INTERVAL))
+                return False
+
+            for warn_time in sorted(warn_times, reverse=True):
+                if not await wait_until(warn_time):
+                    return
+                server.sendPopupMessage(Coalition.ALL, warn_text.format(item=item, what=what,
+                                                                        when=utils.format_time(warn_time)),
+                                        self.bot.config['BOT']['MESSAGE_TIMEOUT'])
+                chat_channel = server.get_channel(Channel.CHAT)
+                if chat_channel:
+                    await chat_channel.send(warn_text.format(item=item, what=what,
+                                                             when=utils.format_time(warn_time)))
+            await wait_until(0)
 
     async def teardown_extensions(self, server: Server, config: dict, member: Optional[discord.Member] = None) -> list:
         retval = []
         for extension in config['extensions']:  # type: str
-            ext: Extension = server.extensions[extension] if 'extensions' in server.extensions else None
+            ext: Extension = server.extensions[extension] if extension in server.extensions else None
             if not ext:
                 if '.' not in extension:
                     ext = utils.str_to_class('extensions.' + extension)(self.bot, server, config['extensions'][extension])
@@ -242,7 +322,8 @@ class Scheduler(Plugin):
                     ext = utils.str_to_class(extension)(self.bot, server, config['extensions'][extension])
                 if ext.verify():
                     server.extensions[extension] = ext
-            if ext.is_running() and await ext.shutdown():
+            if await ext.check_running(force=True) and await ext.shutdown():
+                ext.reset(running=False)
                 retval.append(ext.name)
                 if not member:
                     self.log.info(f"  => {ext.name} shut down for \"{server.name}\" by "
@@ -291,7 +372,8 @@ class Scheduler(Plugin):
             server.restart_pending = False
 
     @staticmethod
-    def change_mizfile(server: Server, config: dict, presets: Optional[str] = None):
+    def change_mizfile(server: Server, config: dict, presets: Optional[str] = None, *,
+                       now: Optional[datetime] = None, outfile: Optional[str] = None) -> Optional[str]:
         def apply_preset(value: dict):
             if 'start_time' in value:
                 miz.start_time = value['start_time']
@@ -327,8 +409,8 @@ class Scheduler(Plugin):
 
         filename = server.get_current_mission_file()
         if not filename:
-            return
-        now = datetime.now()
+            return None
+        now = now or datetime.now()
         if not presets:
             if isinstance(config['restart']['settings'], dict):
                 for key, value in config['restart']['settings'].items():
@@ -337,7 +419,7 @@ class Scheduler(Plugin):
                         break
                 if not presets:
                     # no preset found for the current time, so don't change anything
-                    return
+                    return None
             elif isinstance(config['restart']['settings'], list):
                 presets = random.choice(config['restart']['settings'])
         miz = MizFile(filename)
@@ -356,7 +438,49 @@ class Scheduler(Plugin):
             elif isinstance(value, dict):
                 apply_preset(value)
             server.bot.log.info(f"  => Preset {preset} applied.")
-        miz.save()
+        miz.save(outfile)
+        return outfile or filename
+
+    async def apply_mizfile(self, server: Server, config: dict, presets: Optional[str] = None, *,
+                            prepared: Optional[tuple[str, str]] = None):
+        # a mission that has been prepared in advance is only used, if the server still runs that mission
+        if prepared and prepared[0] == server.get_current_mission_file():
+            os.replace(prepared[1], prepared[0])
+            return
+        self.discard_mizfile(prepared)
+        await asyncio.get_running_loop().run_in_executor(self.bot.executor, self.change_mizfile, server, config,
+                                                         presets)
+
+    @staticmethod
+    def discard_mizfile(prepared: Optional[tuple[str, str]]):
+        if prepared and os.path.exists(prepared[1]):
+            os.remove(prepared[1])
+
+    async def prepare_restart(self, server: Server, config: dict, method: str,
+                              restart_in: int) -> Optional[tuple[str, str]]:
+        # everything that does not need a stopped server is done while the users are warned or DCS shuts down
+        try:
+            if method == 'restart_with_shutdown':
+                self.init_extensions(server, config)
+            elif method != 'restart':
+                return None
+            if server.maintenance or 'settings' not in config['restart']:
+                return None
+            # extensions that change the mission on their own have to run first
+            for ext in server.extensions.values():
+                if ext.__class__.beforeMissionLoad != Extension.beforeMissionLoad:
+                    return None
+            filename = server.get_current_mission_file()
+            if not filename:
+                return None
+            # the presets are chosen for the time the mission will be restarted
+            outfile = await asyncio.get_running_loop().run_in_executor(
+                self.bot.executor, lambda: self.change_mizfile(
+                    server, config, now=datetime.now() + timedelta(seconds=restart_in), outfile=filename + '.tmp'))
+            return (filename, outfile) if outfile else None
+        except Exception as ex:
+            self.log.exception(ex)
+            return None
 
     @staticmethod
     def is_mission_change(server: Server, config: dict) -> bool:
@@ -391,45 +515,55 @@ class Scheduler(Plugin):
                 elif server.current_mission.mission_time <= (config['restart']['max_mission_time'] * 60 - restart_in):
                     return
             server.restart_pending = True
+            preparation = asyncio.create_task(self.prepare_restart(server, config, method, restart_in))
             await self.warn_users(server, config, method)
             # in the unlikely event that we did restart already in the meantime while warning users or
             # if the restart has been cancelled due to maintenance mode
             if not server.restart_pending or not server.is_populated():
+                self.discard_mizfile(await preparation)
                 return
             else:
                 server.on_empty = dict()
         else:
             server.restart_pending = True
+            preparation = asyncio.create_task(self.prepare_restart(server, config, method, 0))
 
         if 'shutdown' in method:
             await self.teardown_dcs(server)
         if method == 'restart_with_shutdown':
             try:
-                await self.launch_dcs(server, config)
+                await self.launch_dcs(server, config, mizfile=await preparation)
             except asyncio.TimeoutError:
                 await self.bot.audit(f"{string.capwords(self.plugin_name)}: Timeout while starting server",
                                      server=server)
         elif method == 'restart':
             if self.is_mission_change(server, config):
                 await server.stop()
+                mizfile = await preparation
                 for ext in server.extensions.values():
                     await ext.beforeMissionLoad()
                 if 'settings' in config['restart']:
-                    self.change_mizfile(server, config)
-                await server.start()
+                    await self.apply_mizfile(server, config, prepared=mizfile)
+                async with self.launch_slot():
+                    await server.start()
             else:
-                await server.current_mission.restart()
+                self.discard_mizfile(await preparation)
+                async with self.launch_slot():
+                    await server.current_mission.restart()
             await self.bot.audit(f"{string.capwords(self.plugin_name)} restarted mission "
                                  f"{server.current_mission.display_name}", server=server)
         elif method == 'rotate':
-            await server.loadNextMission()
+            await preparation
+            async with self.launch_slot():
+                await server.loadNextMission()
             if self.is_mission_change(server, config):
                 await server.stop()
                 for ext in server.extensions.values():
                     await ext.beforeMissionLoad()
                 if 'settings' in config['restart']:
-                    self.change_mizfile(server, config)
-                await server.start()
+                    await self.apply_mizfile(server, config)
+                async with self.launch_slot():
+                    await server.start()
             await self.bot.audit(f"{string.capwords(self.plugin_name)} rotated to mission "
                                  f"{server.current_mission.display_name}", server=server)
 
@@ -439,28 +573,52 @@ class Scheduler(Plugin):
             restart_in = max(warn_times) if len(warn_times) and server.is_populated() else 0
             if 'mission_time' in config['restart'] and \
                     (server.current_mission.mission_time + restart_in) >= (int(config['restart']['mission_time']) * 60):
-                asyncio.create_task(self.restart_mission(server, config))
+                self.run_action(server, self.restart_mission(server, config))
             if 'local_times' in config['restart']:
                 now = datetime.now()
                 if 'mission_end' not in config['restart'] or not config['restart']['mission_end']:
                     now += timedelta(seconds=restart_in)
                 for t in config['restart']['local_times']:
-                    if utils.is_in_timeframe(now, t):
-                        asyncio.create_task(self.restart_mission(server, config))
+                    if utils.is_in_timeframe(now, t) and self.restarted.get((server.name, t)) != now.date():
+                        self.restarted[(server.name, t)] = now.date()
+                        self.run_action(server, self.restart_mission(server, config))
 
     @staticmethod
     def check_affinity(server: Server, config: dict):
         if not server.process:
-            for exe in ['DCS_server.exe', 'DCS.exe']:
-                server.process = utils.find_process(exe, server.installation)
-                if server.process:
-                    break
+            server.process = server.bot.processes.find(server.installation, DCS_EXECUTABLES, server.installation)
         if server.process:
             server.process.cpu_affinity(config['affinity'])
 
-    @tasks.loop(minutes=1.0)
-    async def check_state(self):
-        # check all servers
+    @staticmethod
+    def get_next_due(server: Server, config: dict, now: datetime) -> Optional[float]:
+        # seconds until the next time the state of this server might change according to its configuration
+        if server.maintenance:
+            return None
+        warn_times = Scheduler.get_warn_times(config)
+        restart_in = max(warn_times) if len(warn_times) and server.is_populated() else 0
+        minutes = set()
+        if 'schedule' in config:
+            # the weekday changes at midnight
+            minutes.add(0)
+            for period in config['schedule'].keys():
+                start, end = utils.parse_timeframe(period)
+                minutes |= {start, (end + 1) % 1440}
+        if 'restart' in config and 'local_times' in config['restart']:
+            for t in config['restart']['local_times']:
+                start, end = utils.parse_timeframe(t)
+                minutes |= {start, (end + 1) % 1440}
+        seconds = now.hour * 3600 + now.minute * 60 + now.second + now.microsecond / 1000000
+        due = [((m * 60 - offset - seconds) % 86400) or 86400 for m in minutes for offset in {0, restart_in}]
+        if 'restart' in config and 'mission_time' in config['restart'] and \
+                server.status in [Status.RUNNING, Status.PAUSED] and server.current_mission:
+            remaining = int(config['restart']['mission_time']) * 60 - restart_in - \
+                server.current_mission.mission_time
+            if remaining > 0:
+                due.append(remaining)
+        return min(due) if due else None
+
+    async def check_schedule(self):
         for server_name, server in self.bot.servers.items():
             # only care about servers that are not in the startup phase
             if server.status in [Status.UNREGISTERED, Status.LOADING] or server.maintenance:
@@ -469,23 +627,54 @@ class Scheduler(Plugin):
             # if no config is defined for this server, ignore it
             if config:
                 try:
-                    if server.status == Status.RUNNING and 'affinity' in config:
-                        self.check_affinity(server, config)
                     target_state = self.check_server_state(server, config)
                     if target_state == Status.RUNNING and server.status == Status.SHUTDOWN:
-                        asyncio.create_task(self.launch_dcs(server, config))
+                        self.run_action(server, self.launch_dcs(server, config))
                     elif target_state == Status.SHUTDOWN and server.status in [Status.STOPPED, Status.RUNNING, Status.PAUSED]:
-                        asyncio.create_task(self.teardown(server, config))
+                        self.run_action(server, self.teardown(server, config))
                     elif server.status in [Status.RUNNING, Status.PAUSED]:
                         await self.check_mission_state(server, config)
+                except Exception as ex:
+                    self.log.warning("Exception in check_schedule(): " + str(ex))
+
+    async def run_schedule(self):
+        await self.before_check()
+        while True:
+            event = self.changed
+            try:
+                await self.check_schedule()
+            except Exception as ex:
+                self.log.exception(ex)
+            now = datetime.now()
+            due = [self.get_next_due(server, config, now) for server, config in
+                   [(x, self.get_config(x)) for x in self.bot.servers.values()] if config]
+            due = [x for x in due if x is not None]
+            # pending actions (like restarts of populated servers) are checked again regularly
+            timeout = MAX_SCHEDULE_INTERVAL if not self.actions and not any(
+                x.restart_pending or x.on_empty or x.on_mission_end for x in self.bot.servers.values()
+            ) else 60.0
+            # wake up at the beginning of the minute that is due
+            await self.wait_for_change(min(due + [timeout]) + 0.1, event)
+
+    @tasks.loop(minutes=1.0)
+    async def check_state(self):
+        running = []
+        # check the affinity and the extensions of all servers, the schedule itself is handled by run_schedule()
+        for server_name, server in self.bot.servers.items():
+            if server.status in [Status.UNREGISTERED, Status.LOADING] or server.maintenance:
+                continue
+            config = self.get_config(server)
+            if config:
+                try:
+                    if server.status == Status.RUNNING and 'affinity' in config:
+                        self.check_affinity(server, config)
                     # if the server is running, and should run, check if all the extensions are running, too
-                    if server.status in [Status.RUNNING, Status.PAUSED, Status.STOPPED] and target_state == server.status:
-                        for ext in server.extensions.values():
-                            if not ext.is_running() and await ext.startup():
-                                self.log.info(f"  - {ext.name} v{ext.version} launched for \"{server.name}\".")
-                                await self.bot.audit(f"{ext.name} started", server=server)
+                    if server.status in [Status.RUNNING, Status.PAUSED, Status.STOPPED] and \
+                            self.check_server_state(server, config) == server.status:
+                        running.append(server)
                 except Exception as ex:
                     self.log.warning("Exception in check_state(): " + str(ex))
+        await asyncio.gather(*[self.start_extensions(server) for server in running])
 
     @check_state.before_loop
     async def before_check(self):
@@ -665,6 +854,7 @@ class Scheduler(Plugin):
                 server.restart_pending = False
                 server.on_empty = dict()
                 server.on_mission_end = dict()
+                self.notify()
                 await ctx.send(f"Maintenance mode set for server {server.display_name}.\n"
                                f"The {string.capwords(self.plugin_name)} will be set on hold until you use"
                                f" {ctx.prefix}clear again.")
@@ -680,6 +870,7 @@ class Scheduler(Plugin):
         if server:
             if server.maintenance:
                 server.maintenance = False
+                self.notify()
                 await ctx.send(f"Maintenance mode cleared for server {server.display_name}.\n"
                                f"The {string.capwords(self.plugin_name)} will take over the state handling now.")
                 await self.bot.audit("cleared maintenance flag", user=ctx.message.author, server=server)
@@ -768,7 +959,7 @@ class Scheduler(Plugin):
             if server.status not in [Status.STOPPED, Status.SHUTDOWN]:
                 stopped = True
                 await server.stop()
-            self.change_mizfile(server, config, ','.join(view.result))
+            await self.apply_mizfile(server, config, ','.join(view.result))
             message = 'Preset changed to: {}.'.format(','.join(view.result))
             if stopped:
                 await server.start()
@@ -36,15 +36,15 @@ class SchedulerListener(EventListener):
         server: Server = self.bot.servers[data['server_name']]
         config = self.plugin.get_config(server)
         self.plugin.init_extensions(server, config)
-        for ext in server.extensions.values():
-            if not ext.is_running() and await ext.startup():
-                self.log.info(f"  - {ext.name} v{ext.version} launched for \"{server.name}\".")
-                await self.bot.audit(f"{ext.name} started", server=server)
+        self.plugin.notify()
+        await self.plugin.start_extensions(server)
 
     async def onPlayerStart(self, data: dict) -> None:
         if data['id'] == 1 or 'ucid' not in data:
             return
         server: Server = self.bot.servers[data['server_name']]
+        # the warning times depend on whether the server is populated
+        self.plugin.notify()
         if server.restart_pending:
             player: Player = server.get_player(id=data['id'])
             player.sendChatMessage("*** Mission is about to be restarted soon! ***")
@@ -66,8 +66,9 @@ class SchedulerListener(EventListener):
                         for ext in server.extensions.values():
                             await ext.beforeMissionLoad()
                         if 'settings' in config['restart']:
-                            self.plugin.change_mizfile(server, config)
-                        await server.start()
+                            await self.plugin.apply_mizfile(server, config)
+                        async with self.plugin.launch_slot():
+                            await server.start()
                     message = 'started DCS server'
                     if 'user' not in what:
                         message = string.capwords(self.plugin_name) + ' ' + message
@@ -78,23 +79,27 @@ class SchedulerListener(EventListener):
                         for ext in server.extensions.values():
                             await ext.beforeMissionLoad()
                         if 'settings' in config['restart']:
-                            self.plugin.change_mizfile(server, config)
-                        await server.start()
+                            await self.plugin.apply_mizfile(server, config)
+                        async with self.plugin.launch_slot():
+                            await server.start()
                     else:
-                        await server.current_mission.restart()
+                        async with self.plugin.launch_slot():
+                            await server.current_mission.restart()
                     message = f'restarted mission {server.current_mission.display_name}'
                     if 'user' not in what:
                         message = string.capwords(self.plugin_name) + ' ' + message
                     await self.bot.audit(message, server=server, user=what['user'] if 'user' in what else None)
             elif what['command'] == 'rotate':
-                await server.loadNextMission()
+                async with self.plugin.launch_slot():
+                    await server.loadNextMission()
                 if self.plugin.is_mission_change(server, config):
                     await server.stop()
                     for ext in server.extensions.values():
                         await ext.beforeMissionLoad()
                     if 'settings' in config['restart']:
-                        self.plugin.change_mizfile(server, config)
-                    await server.start()
+                        await self.plugin.apply_mizfile(server, config)
+                    async with self.plugin.launch_slot():
+                        await server.start()
                 await self.bot.audit(f"{string.capwords(self.plugin_name)} rotated to mission "
                                      f"{server.current_mission.display_name}", server=server)
             elif what['command'] == 'load':
@@ -106,13 +111,15 @@ class SchedulerListener(EventListener):
             elif what['command'] == 'preset':
                 await server.stop()
                 for preset in what['preset']:
-                    self.plugin.change_mizfile(server, config, preset)
-                await server.start()
+                    await self.plugin.apply_mizfile(server, config, preset)
+                async with self.plugin.launch_slot():
+                    await server.start()
                 await self.bot.audit(f"changed preset to {what['preset']}", server=server, user=what['user'])
             server.restart_pending = False
 
         server: Server = self.bot.servers[data['server_name']]
         if data['eventName'] == 'disconnect':
+            self.plugin.notify()
             if not server.is_populated() and server.on_empty:
                 await _process(server, server.on_empty)
                 server.on_empty = dict()
@@ -124,6 +131,7 @@ class SchedulerListener(EventListener):
 
     async def onSimulationStart(self, data: dict) -> None:
         server: Server = self.bot.servers[data['server_name']]
+        self.plugin.notify()
         config = self.plugin.get_config(server)
         if config and 'onMissionStart' in config:
             self._run(server, config['onMissionStart'])
@@ -131,8 +139,9 @@ class SchedulerListener(EventListener):
     async def onMissionLoadEnd(self, data: dict) -> None:
         server: Server = self.bot.servers[data['server_name']]
         server.restart_pending = False
+        self.plugin.notify()
         for ext in server.extensions.values():
-            if ext.is_running():
+            if await ext.check_running():
                 self.bot.loop.call_soon(asyncio.create_task, ext.onMissionLoadEnd(data))
 
     async def onMissionEnd(self, data: dict) -> None:
@@ -143,12 +152,14 @@ class SchedulerListener(EventListener):
 
     async def onSimulationStop(self, data: dict) -> None:
         server: Server = self.bot.servers[data['server_name']]
+        self.plugin.notify()
         for ext in server.extensions.values():
-            if ext.is_running():
+            if await ext.check_running():
                 self.bot.loop.call_soon(asyncio.create_task, ext.onSimulationStop(data))
 
     async def onShutdown(self, data: dict) -> None:
         server: Server = self.bot.servers[data['server_name']]
+        self.plugin.notify()
         config = self.plugin.get_config(server)
         if config and 'onShutdown' in config:
             self._run(server, config['onShutdown'])
@@ -172,7 +183,7 @@ class SchedulerListener(EventListener):
                 else:
                     n = int(data['params'][0]) - 1
                     await server.stop()
-                    self.plugin.change_mizfile(server, config, presets[n])
+                    await self.plugin.apply_mizfile(server, config, presets[n])
                     await server.start()
                     await self.bot.audit(f"changed preset to {presets[n]}", server=server, user=player.member)
             else:
@@ -183,6 +194,7 @@ class SchedulerListener(EventListener):
                 server.restart_pending = False
                 server.on_empty = dict()
                 server.on_mission_end = dict()
+                self.plugin.notify()
                 player.sendChatMessage('Maintenance mode enabled.')
                 await self.bot.audit("set maintenance flag", user=player.member, server=server)
             else:
@@ -190,6 +202,7 @@ class SchedulerListener(EventListener):
         elif data['subcommand'] == 'clear':
             if server.maintenance:
                 server.maintenance = False
+                self.plugin.notify()
                 player.sendChatMessage('Maintenance mode disabled/cleared.')
                 await self.bot.audit("cleared maintenance flag", user=player.member, server=server)
             else:
@@ -15,5 +15,6 @@ end
 
 function dcsbot.shutdown(json)
     log.write('DCSServerBot', log.DEBUG, 'Scheduler: shutdown()')
+	utils.flush()
 	DCS.exitProcess()
 end
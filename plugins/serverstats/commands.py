@@ -1,29 +1,33 @@
 import discord
-import icmplib
 import os
 import platform
-import psutil
 import psycopg2
 from contextlib import closing
-from core import utils, Plugin, DCSServerBot, TEventListener, Status, PluginRequiredError, Report, PaginationReport, \
-    Server
+from core import utils, Plugin, DCSServerBot, TEventListener, PluginRequiredError, Report, PaginationReport, Server, \
+    QueryCache
 from discord.ext import tasks, commands
 from typing import Type, Optional, Tuple
 from .listener import ServerStatsListener
+from .sampler import ResourceSampler, Aggregate
+
+# minute aggregates that are kept, if the database is not available
+MAX_BACKLOG = 1000
 
 
 class AgentServerStats(Plugin):
 
     def __init__(self, bot: DCSServerBot, eventlistener: Type[TEventListener] = None):
         super().__init__(bot, eventlistener)
+        self.sampler = ResourceSampler(bot, self.eventlistener)
+        self.sampler.start()
+        self.backlog: list[Aggregate] = []
         self.cleanup.start()
         self.schedule.start()
-        self.io_counters = {}
-        self.net_io_counters = None
 
     async def cog_unload(self):
         self.cleanup.cancel()
         self.schedule.cancel()
+        self.sampler.stop()
         await super().cog_unload()
 
     def rename(self, old_name: str, new_name: str):
@@ -77,62 +81,39 @@ class AgentServerStats(Plugin):
         if not is_all and server:
             await self.display_report(ctx, 'serverstats.json', period, server.name)
 
-    @tasks.loop(minutes=1.0)
-    async def schedule(self):
+    def insert(self, aggregates: list[Aggregate]):
         conn = self.pool.getconn()
         try:
             with closing(conn.cursor()) as cursor:
-                for server_name, server in self.bot.servers.items():
-                    if server.status not in [Status.RUNNING, Status.PAUSED]:
-                        continue
-                    users = len(server.get_active_players())
-                    if not server.process or not server.process.is_running():
-                        for exe in ['DCS_server.exe', 'DCS.exe']:
-                            server.process = utils.find_process(exe, server.installation)
-                            if server.process:
-                                break
-                        else:
-                            self.log.warning(f"Could not find a running DCS instance for server {server_name}, "
-                                             f"skipping server load gathering.")
-                            continue
-                    cpu = server.process.cpu_percent()
-                    memory = server.process.memory_full_info()
-                    io_counters = server.process.io_counters()
-                    if server.process.pid not in self.io_counters:
-                        write_bytes = read_bytes = 0
-                    else:
-                        write_bytes = io_counters.write_bytes - self.io_counters[server.process.pid].write_bytes
-                        read_bytes = io_counters.read_bytes - self.io_counters[server.process.pid].read_bytes
-                    self.io_counters[server.process.pid] = io_counters
-                    net_io_counters = psutil.net_io_counters(pernic=False)
-                    if not self.net_io_counters:
-                        bytes_sent = bytes_recv = 0
-                    else:
-                        bytes_sent = int((net_io_counters.bytes_sent - self.net_io_counters.bytes_sent) / 7200)
-                        bytes_recv = int((net_io_counters.bytes_recv - self.net_io_counters.bytes_recv) / 7200)
-                    self.net_io_counters = net_io_counters
-                    if self.bot.config.getboolean('BOT', 'PING_MONITORING'):
-                        net_ping = icmplib.ping('1.1.1.1', count=1, privileged=False)
-                        if not net_ping.packets_received:
-                            ping = None
-                        else:
-                            ping = net_ping.avg_rtt
-                    else:
-                        ping = None
-                    if server_name in self.eventlistener.fps:
-                        cursor.execute('INSERT INTO serverstats (server_name, agent_host, mission_id, users, status, '
-                                       'cpu, mem_total, mem_ram, read_bytes, write_bytes, bytes_sent, bytes_recv, '
-                                       'fps, ping) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)',
-                                       (server_name, platform.node(), server.mission_id, users, server.status.name, cpu,
-                                        memory.private, memory.rss, read_bytes, write_bytes, bytes_sent, bytes_recv,
-                                        self.eventlistener.fps[server_name], ping))
-                        conn.commit()
-        except (Exception, psycopg2.DatabaseError) as error:
+                cursor.executemany('INSERT INTO serverstats (server_name, agent_host, mission_id, users, status, cpu, '
+                                   'cpu_max, cpu_p95, mem_total, mem_ram, read_bytes, write_bytes, bytes_sent, '
+                                   'bytes_recv, fps, ping, time) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, '
+                                   '%s, %s, %s, %s, %s, %s)',
+                                   [(x.server_name, platform.node(), x.mission_id, x.users, x.status, x.cpu, x.cpu_max,
+                                     x.cpu_p95, x.mem_total, x.mem_ram, x.read_bytes, x.write_bytes, x.bytes_sent,
+                                     x.bytes_recv, x.fps, x.ping, x.time) for x in aggregates])
+            conn.commit()
+        except (Exception, psycopg2.DatabaseError):
             conn.rollback()
-            self.log.exception(error)
+            raise
         finally:
             self.pool.putconn(conn)
 
+    @tasks.loop(minutes=1.0)
+    async def schedule(self):
+        # the sampler does the measuring, the aggregates of all servers are written in one go
+        self.backlog.extend(self.sampler.aggregate())
+        if not self.backlog:
+            return
+        try:
+            await self.bot.loop.run_in_executor(self.bot.executor, self.insert, self.backlog)
+            self.backlog = []
+            QueryCache().invalidate('serverstats')
+        except (Exception, psycopg2.DatabaseError) as error:
+            self.log.exception(error)
+            # keep them for the next run, but don't pile them up forever
+            self.backlog = self.backlog[-MAX_BACKLOG:]
+
     @tasks.loop(hours=12.0)
     async def cleanup(self):
         conn = self.pool.getconn()
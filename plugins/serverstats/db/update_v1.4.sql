@@ -0,0 +1,2 @@
+ALTER TABLE serverstats ADD COLUMN cpu_max NUMERIC(5,2) NULL;
+ALTER TABLE serverstats ADD COLUMN cpu_p95 NUMERIC(5,2) NULL;
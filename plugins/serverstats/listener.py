@@ -5,6 +5,11 @@ class ServerStatsListener(EventListener):
     def __init__(self, plugin: Plugin):
         super().__init__(plugin)
         self.fps = {}
+        self.frame_times = {}
 
     async def perfmon(self, data):
         self.fps[data['server_name']] = data['fps']
+        # time in ms that the DCSServerBot hook needed per simulation frame
+        self.frame_times[data['server_name']] = (data.get('frame_time_avg'), data.get('frame_time_max'))
+        self.log.debug('{}: {:.2f} fps, bot hook {:.2f} ms per frame (max {:.2f} ms)'.format(
+            data['server_name'], data['fps'], data.get('frame_time_avg', 0), data.get('frame_time_max', 0)))
@@ -0,0 +1,195 @@
+from __future__ import annotations
+import icmplib
+import psutil
+import threading
+import time
+from collections import deque
+from core import Status
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from core import DCSServerBot
+    from .listener import ServerStatsListener
+
+# seconds between two samples
+SAMPLE_INTERVAL = 5.0
+# seconds of samples that are kept in memory per server
+HISTORY = 3600
+# seconds between two pings
+PING_INTERVAL = 60.0
+
+
+@dataclass
+class Sample:
+    time: datetime
+    elapsed: float
+    mission_id: int
+    users: int
+    status: str
+    cpu: float
+    mem_total: int
+    mem_ram: int
+    read_bytes: int
+    write_bytes: int
+    bytes_sent: int
+    bytes_recv: int
+    fps: Optional[float]
+    ping: Optional[float]
+
+
+@dataclass
+class Aggregate:
+    # time of the last sample, so that aggregates written later keep their minute
+    time: datetime
+    server_name: str
+    mission_id: int
+    users: int
+    status: str
+    cpu: float
+    cpu_max: float
+    cpu_p95: float
+    mem_total: float
+    mem_ram: float
+    read_bytes: int
+    write_bytes: int
+    bytes_sent: int
+    bytes_recv: int
+    fps: float
+    ping: Optional[float]
+
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(int(round(p / 100 * (len(values) - 1))), len(values) - 1)]
+
+
+class ResourceSampler(threading.Thread):
+    """
+    Samples the resource usage of the local DCS servers every few seconds outside of the event loop. The samples of
+    the last hour are kept per server, the ones that have not been persisted yet are handed out as minute aggregates.
+    """
+
+    def __init__(self, bot: DCSServerBot, eventlistener: ServerStatsListener, interval: float = SAMPLE_INTERVAL):
+        super().__init__(name='ResourceSampler', daemon=True)
+        self.bot = bot
+        self.log = bot.log
+        self.eventlistener = eventlistener
+        self.interval = interval
+        self.history: dict[str, deque[Sample]] = dict()
+        # samples that are not part of an aggregate yet
+        self.pending: dict[str, list[Sample]] = dict()
+        self.io_counters = dict()
+        self.net_io_counters = None
+        self.last_sample = 0.0
+        self.ping: Optional[float] = None
+        self.last_ping = 0.0
+        self._lock = threading.Lock()
+        self._shutdown = threading.Event()
+
+    def stop(self) -> None:
+        self._shutdown.set()
+
+    def get_samples(self, server_name: str) -> list[Sample]:
+        with self._lock:
+            return list(self.history.get(server_name, []))
+
+    def _ping(self, now: float) -> Optional[float]:
+        if not self.bot.config.getboolean('BOT', 'PING_MONITORING'):
+            return None
+        if now - self.last_ping >= PING_INTERVAL:
+            self.last_ping = now
+            try:
+                net_ping = icmplib.ping('1.1.1.1', count=1, privileged=False)
+                self.ping = net_ping.avg_rtt if net_ping.packets_received else None
+            except Exception as ex:
+                self.log.debug(f'Ping failed: {ex}')
+                self.ping = None
+        return self.ping
+
+    def _sample(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self.last_sample if self.last_sample else self.interval
+        self.last_sample = now
+        net_io_counters = psutil.net_io_counters(pernic=False)
+        if not self.net_io_counters:
+            bytes_sent = bytes_recv = 0
+        else:
+            bytes_sent = net_io_counters.bytes_sent - self.net_io_counters.bytes_sent
+            bytes_recv = net_io_counters.bytes_recv - self.net_io_counters.bytes_recv
+        self.net_io_counters = net_io_counters
+        ping = self._ping(now)
+        pids = set()
+        for server_name, server in list(self.bot.servers.items()):
+            if server.status not in [Status.RUNNING, Status.PAUSED]:
+                continue
+            # the registry only hands out processes that are still running
+            process = self.bot.processes.get(server.installation)
+            if not process:
+                continue
+            try:
+                with process.oneshot():
+                    cpu = process.cpu_percent()
+                    memory = process.memory_full_info()
+                    io_counters = process.io_counters()
+            except psutil.Error:
+                continue
+            pids.add(process.pid)
+            if process.pid not in self.io_counters:
+                write_bytes = read_bytes = 0
+            else:
+                write_bytes = io_counters.write_bytes - self.io_counters[process.pid].write_bytes
+                read_bytes = io_counters.read_bytes - self.io_counters[process.pid].read_bytes
+            self.io_counters[process.pid] = io_counters
+            sample = Sample(time=datetime.now(), elapsed=elapsed, mission_id=server.mission_id,
+                            users=len(server.get_active_players()), status=server.status.name, cpu=cpu,
+                            mem_total=memory.private, mem_ram=memory.rss, read_bytes=read_bytes,
+                            write_bytes=write_bytes, bytes_sent=bytes_sent, bytes_recv=bytes_recv,
+                            fps=self.eventlistener.fps.get(server_name), ping=ping)
+            with self._lock:
+                if server_name not in self.history:
+                    self.history[server_name] = deque(maxlen=int(HISTORY / self.interval))
+                self.history[server_name].append(sample)
+                self.pending.setdefault(server_name, []).append(sample)
+        for pid in [x for x in self.io_counters if x not in pids]:
+            del self.io_counters[pid]
+
+    def aggregate(self) -> list[Aggregate]:
+        # one aggregate per server for the samples since the last call
+        with self._lock:
+            pending = self.pending
+            self.pending = dict()
+        aggregates = []
+        for server_name, samples in pending.items():
+            samples = [x for x in samples if x.fps is not None]
+            if not samples:
+                continue
+            cpu = [x.cpu for x in samples]
+            pings = [x.ping for x in samples if x.ping is not None]
+            last = samples[-1]
+            aggregates.append(Aggregate(
+                time=last.time, server_name=server_name, mission_id=last.mission_id, users=last.users,
+                status=last.status, cpu=sum(cpu) / len(cpu), cpu_max=max(cpu), cpu_p95=percentile(cpu, 95),
+                mem_total=sum(x.mem_total for x in samples) / len(samples),
+                mem_ram=sum(x.mem_ram for x in samples) / len(samples),
+                read_bytes=sum(x.read_bytes for x in samples), write_bytes=sum(x.write_bytes for x in samples),
+                # same scale as the former minutely samples
+                bytes_sent=int(sum(x.bytes_sent for x in samples) / 7200),
+                bytes_recv=int(sum(x.bytes_recv for x in samples) / 7200),
+                fps=last.fps, ping=sum(pings) / len(pings) if pings else None
+            ))
+        return aggregates
+
+    def run(self) -> None:
+        while not self._shutdown.is_set():
+            start = time.monotonic()
+            try:
+                self._sample()
+            except Exception as ex:
+                self.log.exception(ex)
+            with self._lock:
+                # forget about servers that are gone
+                for server_name in [x for x in self.history if x not in self.bot.servers]:
+                    del self.history[server_name]
+            self._shutdown.wait(max(self.interval - (time.monotonic() - start), 0))
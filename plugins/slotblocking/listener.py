@@ -1,17 +1,28 @@
 import asyncio
-import re
 from core import EventListener, Plugin, Server, Side, Status, utils
-from typing import Union, cast
+from typing import Optional, Union, cast
 from plugins.creditsystem.player import CreditPlayer
+from .slots import SlotRules
 
 
 class SlotBlockingListener(EventListener):
     def __init__(self, plugin: Plugin):
         super().__init__(plugin)
+        # compiled restrictions per server, they live as long as the configuration does
+        self.rules: dict[str, SlotRules] = dict()
+
+    def get_rules(self, server: Server) -> Optional[SlotRules]:
+        if server.name not in self.rules:
+            config = self.plugin.get_config(server)
+            if not config or 'restricted' not in config:
+                return None
+            self.rules[server.name] = SlotRules(config['restricted'])
+        return self.rules[server.name]
 
     async def registerDCSServer(self, data: dict) -> None:
         server: Server = self.bot.servers[data['server_name']]
         config: dict = self.plugin.get_config(server)
+        self.rules.pop(server.name, None)
         if config:
             server.sendtoDCS({
                 'command': 'loadParams',
@@ -20,33 +31,26 @@ class SlotBlockingListener(EventListener):
             })
 
     def _get_points(self, server: Server, player: CreditPlayer) -> int:
-        config = self.plugin.get_config(server)
-        if 'restricted' in config:
-            for unit in config['restricted']:
-                if ('unit_type' in unit and unit['unit_type'] == player.unit_type) or \
-                        ('unit_name' in unit and unit['unit_name'] in player.unit_name) or \
-                        ('group_name' in unit and unit['group_name'] in player.group_name):
-                    if player.sub_slot == 0 and 'points' in unit:
-                        return unit['points']
-                    elif player.sub_slot > 0 and 'crew' in unit:
-                        return unit['crew']
-        return 0
+        rules = self.get_rules(server)
+        if not rules:
+            return 0
+        return rules.get_points(player.unit_type, player.unit_name, player.group_name, player.sub_slot)
 
     def _get_costs(self, server: Server, data: Union[CreditPlayer, dict]) -> int:
-        config = self.plugin.get_config(server)
-        unit_type = data.unit_type if isinstance(data, CreditPlayer) else data['unit_type']
-        unit_name = data.unit_name if isinstance(data, CreditPlayer) else data['unit_name']
-        group_name = data.group_name if isinstance(data, CreditPlayer) else data['group_name']
-        if 'restricted' in config:
-            for unit in config['restricted']:
-                if ('unit_type' in unit and re.match(unit['unit_type'], unit_type)) or \
-                        ('unit_name' in unit and re.match(unit['unit_name'], unit_name)) or \
-                        ('group_name' in unit and re.match(unit['group_name'], group_name)):
-                    if 'costs' in unit:
-                        return unit['costs']
-        return 0
+        rules = self.get_rules(server)
+        if not rules:
+            return 0
+        if isinstance(data, CreditPlayer):
+            return rules.get_costs(data.unit_type, data.unit_name, data.group_name)
+        else:
+            return rules.get_costs(data['unit_type'], data['unit_name'], data['group_name'])
+
+    def _get_member(self, server: Server, ucid: str):
+        # the player knows its member already, the database is only asked for players that are not loaded yet
+        player = server.get_player(ucid=ucid)
+        return player.member if player else self.bot.get_member_by_ucid(ucid)
 
-    def _is_vip(self, config: dict, data: dict) -> bool:
+    def _is_vip(self, server: Server, config: dict, data: dict) -> bool:
         if 'VIP' not in config:
             return False
         if 'ucid' in config['VIP']:
@@ -54,7 +58,7 @@ class SlotBlockingListener(EventListener):
             if (isinstance(ucid, str) and ucid == data['ucid']) or (isinstance(ucid, list) and data['ucid'] in ucid):
                 return True
         if 'discord' in config['VIP']:
-            member = self.bot.get_member_by_ucid(data['ucid'])
+            member = self._get_member(server, data['ucid'])
             return utils.check_roles(config['VIP']['discord'], member) if member else False
         return False
 
@@ -63,8 +67,8 @@ class SlotBlockingListener(EventListener):
         config = self.plugin.get_config(server)
         if not config or data['id'] == 1:
             return
-        if self._is_vip(config, data):
-            member = self.bot.get_member_by_ucid(data['ucid'])
+        if self._is_vip(server, config, data):
+            member = self._get_member(server, data['ucid'])
             if member:
                 message = f"VIP member {member.display_name} joined"
             else:
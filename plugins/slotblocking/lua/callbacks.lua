@@ -63,57 +63,82 @@ function slotblock.onPlayerTryConnect(addr, name, ucid, playerID)
     end
 end
 
+-- the restrictions that apply to a slot, they are reset, when the bot sends a new configuration or a mission is loaded
+local slotRules = {}
+local slotParams = nil
+
+local function getRules(slotID)
+    local params = dcsbot.params['slotblocking']
+    if params ~= slotParams then
+        slotRules = {}
+        slotParams = params
+    end
+    local rules = slotRules[slotID]
+    if rules == nil then
+        local unit_name = DCS.getUnitProperty(slotID, DCS.UNIT_NAME)
+        local group_name = DCS.getUnitProperty(slotID, DCS.UNIT_GROUPNAME)
+        local unit_type = DCS.getUnitType(slotID)
+        rules = {}
+        for id, unit in ipairs(params['restricted']) do
+            if (unit['unit_type'] and unit['unit_type'] == unit_type)
+                    or (unit['unit_name'] and string.match(unit_name, unit['unit_name']) ~= nil)
+                    or (unit['group_name'] and string.match(group_name, unit['group_name']) ~= nil) then
+                table.insert(rules, unit)
+            end
+        end
+        slotRules[slotID] = rules
+    end
+    return rules
+end
+
+function slotblock.onMissionLoadEnd()
+    slotRules = {}
+end
+
 function slotblock.onPlayerTryChangeSlot(playerID, side, slotID)
     log.write('DCSServerBot', log.DEBUG, 'Slotblocking: onPlayerTryChangeSlot()')
-    local player = net.get_player_info(playerID, 'ucid')
-    local unit_name = DCS.getUnitProperty(slotID, DCS.UNIT_NAME)
-    local group_name = DCS.getUnitProperty(slotID, DCS.UNIT_GROUPNAME)
-    local unit_type = DCS.getUnitType(slotID)
-    local points
-    if not dcsbot.params['slotblocking'] or not dcsbot.params['slotblocking']['restricted'] then
+    if not dcsbot.params or not dcsbot.params['slotblocking'] or not dcsbot.params['slotblocking']['restricted'] then
         return
     end
+    local player = net.get_player_info(playerID, 'ucid')
+    local points
     -- check levels if any
-    for id, unit in pairs(dcsbot.params['slotblocking']['restricted']) do
-        if (unit['unit_type'] and unit['unit_type'] == unit_type)
-                or (unit['unit_name'] and string.match(unit_name, unit['unit_name']) ~= nil)
-                or (unit['group_name'] and string.match(group_name, unit['group_name']) ~= nil) then
-            -- blocking slots by points // check multicrew
-            if tonumber(slotID) then
-                points = unit['points']
-            else
-                points = unit['crew']
-            end
-            if points then
-                if not dcsbot.userInfo[player].points then
-                    log.write('DCSServerBot', log.ERROR, 'Slotblocking: User has no points, but points are configured. Check your creditsystem.json and make sure a campaign is running.')
-                    return
-                end
-                if dcsbot.userInfo[player].points < points then
-                    local message = 'You need at least ' .. points .. ' points to enter this slot. You currently have ' .. dcsbot.userInfo[player].points .. ' points.'
-                    net.send_chat_to(message, playerID)
-                    return false
-                end
+    for id, unit in ipairs(getRules(slotID)) do
+        -- blocking slots by points // check multicrew
+        if tonumber(slotID) then
+            points = unit['points']
+        else
+            points = unit['crew']
+        end
+        if points then
+            if not dcsbot.userInfo[player].points then
+                log.write('DCSServerBot', log.ERROR, 'Slotblocking: User has no points, but points are configured. Check your creditsystem.json and make sure a campaign is running.')
+                return
             end
-            if unit['ucid'] and player ~= unit['ucid'] then
-                local message = unit['message'] or 'This slot is only accessible to a certain user.'
-                net.send_chat_to(message, playerID)
-                return false
-            elseif unit['ucids'] and has_value(unit['ucids'], player) == false then
-                local message = unit['message'] or 'This slot is only accessible to certain users.'
-                net.send_chat_to(message, playerID)
-                return false
-            -- blocking slots by discord groups
-            elseif unit['discord'] and has_value(dcsbot.userInfo[player].roles, unit['discord']) == false then
-                local message = unit['message'] or 'This slot is only accessible to members with the ' .. unit['discord'] .. ' role.'
-                net.send_chat_to(message, playerID)
-                return false
-            elseif unit['VIP'] and not unit['VIP'] == is_vip(player) then
-                local message = unit['message'] or 'This slot is only accessible to VIP users.'
+            if dcsbot.userInfo[player].points < points then
+                local message = 'You need at least ' .. points .. ' points to enter this slot. You currently have ' .. dcsbot.userInfo[player].points .. ' points.'
                 net.send_chat_to(message, playerID)
                 return false
             end
         end
+        if unit['ucid'] and player ~= unit['ucid'] then
+            local message = unit['message'] or 'This slot is only accessible to a certain user.'
+            net.send_chat_to(message, playerID)
+            return false
+        elseif unit['ucids'] and has_value(unit['ucids'], player) == false then
+            local message = unit['message'] or 'This slot is only accessible to certain users.'
+            net.send_chat_to(message, playerID)
+            return false
+        -- blocking slots by discord groups
+        elseif unit['discord'] and has_value(dcsbot.userInfo[player].roles, unit['discord']) == false then
+            local message = unit['message'] or 'This slot is only accessible to members with the ' .. unit['discord'] .. ' role.'
+            net.send_chat_to(message, playerID)
+            return false
+        elseif unit['VIP'] and not unit['VIP'] == is_vip(player) then
+            local message = unit['message'] or 'This slot is only accessible to VIP users.'
+            net.send_chat_to(message, playerID)
+            return false
+        end
     end
 end
 
@@ -1,37 +1,84 @@
-import discord
-from abc import ABC
-from dataclasses import dataclass, field
+import re
+from dataclasses import dataclass
+from typing import Optional, Pattern
+
+# characters that turn a unit_type into a pattern, plain unit types are looked up by their prefix
+PATTERN_CHARS = set('^$*+?[]{}()|\\.')
 
 
 @dataclass
-class Slot(ABC):
-    category: str = None
-    unit_type: str = None
-    group_name: str = None
-    message: str = None
-
-    def match(self, **kwargs) -> bool:
-        if 'category' in kwargs and self.category != kwargs['category']:
-            return False
-        if 'unit_type' in kwargs and self.unit_type != kwargs['unit_type']:
-            return False
-        if 'group_name' in kwargs and self.group_name != kwargs['group_name']:
-            return False
-        return True
+class SlotRule:
+    config: dict
+    unit_type: Optional[str] = None
+    type_pattern: Optional[Pattern] = None
+    unit_name: Optional[Pattern] = None
+    group_name: Optional[Pattern] = None
 
+    def match(self, unit_type: str, unit_name: str, group_name: str) -> bool:
+        # same as re.match(), a plain unit_type matches all types that start with it
+        if self.type_pattern:
+            if self.type_pattern.match(unit_type or ''):
+                return True
+        elif self.unit_type and (unit_type or '').startswith(self.unit_type):
+            return True
+        if self.unit_name and self.unit_name.match(unit_name or ''):
+            return True
+        if self.group_name and self.group_name.match(group_name or ''):
+            return True
+        return False
 
-@dataclass
-class RoleBaseSlot(Slot):
-    roles: list[discord.Role] = field(default_factory=list)
 
-    def match(self, **kwargs) -> bool:
-        return super().match(**kwargs)
+class SlotRules:
+    """
+    The "restricted" section of a slotblocking configuration, compiled once per configuration load.
+    Rules for plain unit types are indexed by their prefix, all others are precompiled patterns. The matching rules of a slot
+    are cached, as the slots of a mission don't change.
+    """
 
+    def __init__(self, restricted: list[dict]):
+        self.rules: list[SlotRule] = []
+        self.by_type: dict[str, list[int]] = dict()
+        self.patterns: list[int] = []
+        self.cache: dict[tuple[str, str, str], list[dict]] = dict()
+        for idx, unit in enumerate(restricted):
+            rule = SlotRule(config=unit)
+            if 'unit_type' in unit:
+                rule.unit_type = unit['unit_type']
+                if PATTERN_CHARS.intersection(unit['unit_type']):
+                    rule.type_pattern = re.compile(unit['unit_type'])
+            if 'unit_name' in unit:
+                rule.unit_name = re.compile(unit['unit_name'])
+            if 'group_name' in unit:
+                rule.group_name = re.compile(unit['group_name'])
+            self.rules.append(rule)
+            if rule.unit_type and not rule.type_pattern and not rule.unit_name and not rule.group_name:
+                self.by_type.setdefault(rule.unit_type, []).append(idx)
+            else:
+                self.patterns.append(idx)
 
-@dataclass
-class CreditBasedSlot(Slot):
-    points: int = 0
-    costs: int = 0
+    def find(self, unit_type: str, unit_name: str, group_name: str) -> list[dict]:
+        # all rules that apply to this slot, in the order of the configuration
+        key = (unit_type, unit_name, group_name)
+        if key not in self.cache:
+            candidates = [
+                idx for prefix, rules in self.by_type.items() if (unit_type or '').startswith(prefix) for idx in rules
+            ]
+            candidates = sorted(candidates + [
+                idx for idx in self.patterns if self.rules[idx].match(unit_type, unit_name, group_name)
+            ])
+            self.cache[key] = [self.rules[idx].config for idx in candidates]
+        return self.cache[key]
+
+    def get_points(self, unit_type: str, unit_name: str, group_name: str, sub_slot: int) -> int:
+        for unit in self.find(unit_type, unit_name, group_name):
+            if sub_slot == 0 and 'points' in unit:
+                return unit['points']
+            elif sub_slot > 0 and 'crew' in unit:
+                return unit['crew']
+        return 0
 
-    def match(self, **kwargs) -> bool:
-        return super().match(**kwargs)
+    def get_costs(self, unit_type: str, unit_name: str, group_name: str) -> int:
+        for unit in self.find(unit_type, unit_name, group_name):
+            if 'costs' in unit:
+                return unit['costs']
+        return 0
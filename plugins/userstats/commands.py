@@ -5,7 +5,7 @@ import psycopg2
 import random
 from contextlib import closing
 from core import utils, DCSServerBot, Plugin, PluginRequiredError, Report, PaginationReport, Status, Server, Player, \
-    DataObjectFactory, Member
+    DataObjectFactory, Member, QueryCache
 from discord.ext import commands, tasks
 from typing import Union, Optional, Tuple
 from .filter import StatisticsFilter
@@ -230,6 +230,7 @@ class UserStatisticsMaster(UserStatisticsAgent):
             with closing(conn.cursor()) as cursor:
                 cursor.execute('UPDATE players SET discord_id = %s, manual = TRUE WHERE ucid = %s', (member.id, ucid))
             conn.commit()
+            QueryCache().invalidate('players')
         except (Exception, psycopg2.DatabaseError) as error:
             self.log.exception(error)
             conn.rollback()
@@ -256,6 +257,7 @@ class UserStatisticsMaster(UserStatisticsAgent):
             with closing(conn.cursor()) as cursor:
                 cursor.execute('UPDATE players SET discord_id = -1, manual = FALSE WHERE ucid = %s', (ucid, ))
             conn.commit()
+            QueryCache().invalidate('players')
         except (Exception, psycopg2.DatabaseError) as error:
             self.log.exception(error)
             conn.rollback()
@@ -379,6 +381,7 @@ class UserStatisticsMaster(UserStatisticsAgent):
                                          user=ctx.message.author)
                     await ctx.send(f"DCS player {unmatched[n]['name']} linked to member {unmatched[n]['match'].display_name}.")
             conn.commit()
+            QueryCache().invalidate('players')
         except (Exception, psycopg2.DatabaseError) as error:
             self.bot.log.exception(error)
             conn.rollback()
@@ -440,6 +443,7 @@ class UserStatisticsMaster(UserStatisticsAgent):
                     else:
                         await ctx.send(f"Member {suspicious[n]['mismatch'].display_name} unlinked.")
                 conn.commit()
+                QueryCache().invalidate('players')
         except (Exception, psycopg2.DatabaseError) as error:
             self.bot.log.exception(error)
             conn.rollback()
@@ -496,6 +500,7 @@ class UserStatisticsMaster(UserStatisticsAgent):
                         pass
                 await send_token(ctx, token)
                 conn.commit()
+                QueryCache().invalidate('players')
         except (Exception, psycopg2.DatabaseError) as error:
             self.log.exception(error)
             conn.rollback()
@@ -1,7 +1,6 @@
 import discord
 import psycopg2
 import psycopg2.extras
-from contextlib import closing
 from core import report, utils, Side, Coalition
 from .filter import StatisticsFilter
 
@@ -31,29 +30,25 @@ class HighscorePlaytime(report.GraphElement):
         sql += ' AND ' + flt.filter(self.env.bot, period, server_name)
         sql += f' GROUP BY 1, 2 ORDER BY 3 DESC LIMIT {limit}'
 
-        conn = self.pool.getconn()
         try:
-            with closing(conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)) as cursor:
-                labels = []
-                values = []
-                self.log.debug(sql)
-                cursor.execute(sql)
-                for row in cursor.fetchall():
-                    member = self.bot.guilds[0].get_member(row['discord_id']) if row['discord_id'] != '-1' else None
-                    name = member.display_name if member else row['name']
-                    labels.insert(0, name)
-                    values.insert(0, row['playtime'] / 3600)
-                self.axes.barh(labels, values, color=['#CD7F32', 'silver', 'gold'], height=0.75)
-                self.axes.set_xlabel('hours')
-                self.axes.set_title('Longest Playtimes', color='white', fontsize=25)
-                if len(values) == 0:
-                    self.axes.set_xticks([])
-                    self.axes.set_yticks([])
-                    self.axes.text(0, 0, 'No data available.', ha='center', va='center', size=15)
+            labels = []
+            values = []
+            self.log.debug(sql)
+            rows = self.query(sql, cursor_factory=psycopg2.extras.RealDictCursor)
+            for row in rows:
+                member = self.bot.guilds[0].get_member(row['discord_id']) if row['discord_id'] != '-1' else None
+                name = member.display_name if member else row['name']
+                labels.insert(0, name)
+                values.insert(0, row['playtime'] / 3600)
+            self.axes.barh(labels, values, color=['#CD7F32', 'silver', 'gold'], height=0.75)
+            self.axes.set_xlabel('hours')
+            self.axes.set_title('Longest Playtimes', color='white', fontsize=25)
+            if len(values) == 0:
+                self.axes.set_xticks([])
+                self.axes.set_yticks([])
+                self.axes.text(0, 0, 'No data available.', ha='center', va='center', size=15)
         except (Exception, psycopg2.DatabaseError) as error:
             self.log.exception(error)
-        finally:
-            self.pool.putconn(conn)
 
 
 class HighscoreElement(report.GraphElement):
@@ -102,25 +97,21 @@ class HighscoreElement(report.GraphElement):
         sql += ' AND ' + flt.filter(self.env.bot, period, server_name)
         sql += f' AND s.hop_off IS NOT NULL GROUP BY 1, 2 HAVING {sql_parts[kill_type]} > 0 ORDER BY 3 DESC LIMIT {limit}'
 
-        conn = self.pool.getconn()
         try:
-            with closing(conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)) as cursor:
-                cursor.execute(sql)
-                labels = []
-                values = []
-                for row in cursor.fetchall():
-                    member = self.bot.guilds[0].get_member(row['discord_id']) if row['discord_id'] != '-1' else None
-                    name = member.display_name if member else row['name']
-                    labels.insert(0, name)
-                    values.insert(0, row['value'])
-                self.axes.barh(labels, values, color=colors, label=kill_type, height=0.75)
-                self.axes.set_title(kill_type, color='white', fontsize=25)
-                self.axes.set_xlabel(xlabels[kill_type])
-                if len(values) == 0:
-                    self.axes.set_xticks([])
-                    self.axes.set_yticks([])
-                    self.axes.text(0, 0, 'No data available.', ha='center', va='center', rotation=45, size=15)
+            rows = self.query(sql, cursor_factory=psycopg2.extras.RealDictCursor)
+            labels = []
+            values = []
+            for row in rows:
+                member = self.bot.guilds[0].get_member(row['discord_id']) if row['discord_id'] != '-1' else None
+                name = member.display_name if member else row['name']
+                labels.insert(0, name)
+                values.insert(0, row['value'])
+            self.axes.barh(labels, values, color=colors, label=kill_type, height=0.75)
+            self.axes.set_title(kill_type, color='white', fontsize=25)
+            self.axes.set_xlabel(xlabels[kill_type])
+            if len(values) == 0:
+                self.axes.set_xticks([])
+                self.axes.set_yticks([])
+                self.axes.text(0, 0, 'No data available.', ha='center', va='center', rotation=45, size=15)
         except (Exception, psycopg2.DatabaseError) as error:
             self.log.exception(error)
-        finally:
-            self.pool.putconn(conn)
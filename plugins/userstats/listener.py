@@ -1,10 +1,13 @@
 import psycopg2
 from contextlib import closing
-from core import EventListener, Plugin, Status, Server, Side, Player, Channel
+from core import EventListener, Plugin, Status, Server, Side, Player, Channel, QueryCache
 from typing import Union, Any
 
 
 class UserStatisticsEventListener(EventListener):
+    # events that write the statistics, reports reading them have to be refreshed afterwards
+    WRITERS = ['registerDCSServer', 'onMissionLoadEnd', 'onSimulationStop', 'onPlayerChangeSlot', 'disableUserStats',
+               'onGameEvent']
 
     SQL_EVENT_UPDATES = {
         'takeoff': 'UPDATE statistics SET takeoffs = takeoffs + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
@@ -37,10 +40,17 @@ class UserStatisticsEventListener(EventListener):
                                 'WHERE server_name = %s AND mission_end IS NULL) AND hop_off IS NULL',
         'close_mission': 'UPDATE missions SET mission_end = NOW() WHERE id = %s',
         'close_all_missions': 'UPDATE missions SET mission_end = NOW() WHERE server_name = %s AND mission_end IS NULL',
-        'check_player': 'SELECT slot FROM statistics WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
         'start_player': 'INSERT INTO statistics (mission_id, player_ucid, slot, side) VALUES (%s, %s, %s, %s) ON CONFLICT DO NOTHING',
         'stop_player': 'UPDATE statistics SET hop_off = NOW() WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'all_players': 'SELECT player_ucid FROM statistics WHERE mission_id = %s AND hop_off IS NULL'
+        'reconcile_players': 'WITH reported AS (SELECT * FROM UNNEST(%(ucids)s::TEXT[], %(slots)s::TEXT[], '
+                             '%(sides)s::INTEGER[], %(seated)s::BOOLEAN[]) AS r(player_ucid, slot, side, seated)), '
+                             'closed AS (UPDATE statistics s SET hop_off = NOW() WHERE s.mission_id = %(mission_id)s '
+                             'AND s.hop_off IS NULL AND NOT EXISTS (SELECT 1 FROM reported r WHERE r.player_ucid = '
+                             's.player_ucid AND r.slot = s.slot)) INSERT INTO statistics (mission_id, player_ucid, '
+                             'slot, side) SELECT %(mission_id)s, r.player_ucid, r.slot, r.side FROM reported r WHERE '
+                             'r.seated AND NOT EXISTS (SELECT 1 FROM statistics s WHERE s.mission_id = '
+                             '%(mission_id)s AND s.player_ucid = r.player_ucid AND s.slot = r.slot AND s.hop_off IS '
+                             'NULL) ON CONFLICT DO NOTHING'
     }
 
     def __init__(self, plugin: Plugin):
@@ -50,7 +60,11 @@ class UserStatisticsEventListener(EventListener):
     async def processEvent(self, data: dict[str, Union[str, int]]) -> Any:
         if (data['command'] == 'registerDCSServer') or \
                 (data['server_name'] in self.statistics and data['command'] in self.commands):
-            return await super().processEvent(data)
+            try:
+                return await super().processEvent(data)
+            finally:
+                if data['command'] in self.WRITERS:
+                    QueryCache().invalidate('statistics', 'missions')
         else:
             return None
 
@@ -62,6 +76,55 @@ class UserStatisticsEventListener(EventListener):
             unit_type += ' (Crew)'
         return unit_type
 
+    def _reconcile(self, server: Server, data: dict) -> int:
+        # brings the missions and open sessions in line with what the server reported, in one transaction
+        conn = self.pool.getconn()
+        try:
+            with closing(conn.cursor()) as cursor:
+                mission_id = -1
+                cursor.execute(self.SQL_MISSION_HANDLING['current_mission_id'], (server.name,))
+                if cursor.rowcount == 1:
+                    row = cursor.fetchone()
+                    if row[1] == data['current_mission']:
+                        mission_id = row[0]
+                    else:
+                        self.log.warning('The mission in the database does not match the mission that is live '
+                                         'on this server. Fixing...')
+                if mission_id == -1:
+                    # close ambiguous missions
+                    if cursor.rowcount >= 1:
+                        cursor.execute(self.SQL_MISSION_HANDLING['close_all_statistics'], (server.name,))
+                        cursor.execute(self.SQL_MISSION_HANDLING['close_all_missions'], (server.name,))
+                    # create a new mission
+                    cursor.execute(self.SQL_MISSION_HANDLING['start_mission'], (server.name,
+                                                                                data['current_mission'],
+                                                                                data['current_map']))
+                    cursor.execute(self.SQL_MISSION_HANDLING['current_mission_id'], (server.name,))
+                    if cursor.rowcount == 1:
+                        mission_id = cursor.fetchone()[0]
+                    else:
+                        self.log.error('FATAL: Initialization of mission table failed. Statistics will not be '
+                                       'gathered for this session.')
+                if mission_id != -1:
+                    players = [p for p in data.get('players', []) if p['id'] != 1 and p['active']]
+                    # sessions of players that left or changed their slot in the meantime are closed, seated
+                    # players without a session in their current slot get a new one
+                    cursor.execute(self.SQL_MISSION_HANDLING['reconcile_players'], {
+                        "mission_id": mission_id,
+                        "ucids": [p['ucid'] for p in players],
+                        "slots": [self.get_unit_type(p) for p in players],
+                        "sides": [p['side'] for p in players],
+                        "seated": [Side(p['side']) != Side.SPECTATOR for p in players]
+                    })
+            conn.commit()
+            return mission_id
+        except (Exception, psycopg2.DatabaseError) as error:
+            conn.rollback()
+            self.log.exception(error)
+            return -1
+        finally:
+            self.pool.putconn(conn)
+
     async def registerDCSServer(self, data: dict) -> None:
         server: Server = self.bot.servers[data['server_name']]
         if data['statistics']:
@@ -70,73 +133,7 @@ class UserStatisticsEventListener(EventListener):
             return
         # registering a running instance
         if data['channel'].startswith('sync-') and 'current_mission' in data:
-            conn = self.pool.getconn()
-            try:
-                with closing(conn.cursor()) as cursor:
-                    mission_id = -1
-                    cursor.execute(self.SQL_MISSION_HANDLING['current_mission_id'], (server.name,))
-                    if cursor.rowcount == 1:
-                        row = cursor.fetchone()
-                        if row[1] == data['current_mission']:
-                            mission_id = row[0]
-                        else:
-                            self.log.warning('The mission in the database does not match the mission that is live '
-                                             'on this server. Fixing...')
-                    if mission_id == -1:
-                        # close ambiguous missions
-                        if cursor.rowcount >= 1:
-                            cursor.execute(self.SQL_MISSION_HANDLING['close_all_statistics'], (server.name,))
-                            cursor.execute(self.SQL_MISSION_HANDLING['close_all_missions'], (server.name,))
-                        # create a new mission
-                        cursor.execute(self.SQL_MISSION_HANDLING['start_mission'], (server.name,
-                                                                                    data['current_mission'],
-                                                                                    data['current_map']))
-                        cursor.execute(self.SQL_MISSION_HANDLING['current_mission_id'], (server.name,))
-                        if cursor.rowcount == 1:
-                            mission_id = cursor.fetchone()[0]
-                        else:
-                            self.log.error('FATAL: Initialization of mission table failed. Statistics will not be '
-                                           'gathered for this session.')
-                    server.mission_id = mission_id
-                    if mission_id != -1:
-                        # initialize active players
-                        players = server.get_active_players()
-                        ucids = []
-                        for player in players:
-                            ucids.append(player.ucid)
-                            # make sure we get slot changes that might have occurred in the meantime
-                            cursor.execute(self.SQL_MISSION_HANDLING['check_player'], (mission_id, player.ucid))
-                            player_started = False
-                            if cursor.rowcount == 1:
-                                # the player is there already ...
-                                if cursor.fetchone()[0] != player.unit_type:
-                                    # ... but with a different aircraft, so close the old session
-                                    cursor.execute(self.SQL_MISSION_HANDLING['stop_player'],
-                                                   (mission_id, player.ucid))
-                                else:
-                                    # session will be kept
-                                    player_started = True
-                            if not player_started and player.side != Side.SPECTATOR:
-                                # only warn for unknown users if it is a non-public server and automatch is on
-                                if not player.member and self.bot.config.getboolean('BOT', 'AUTOMATCH') and \
-                                        len(server.settings['password']) > 0:
-                                    await server.get_channel(Channel.ADMIN).send(
-                                        'Player {} (ucid={}) can\'t be matched to a discord user.'.format(
-                                            data['name'], data['ucid']))
-                                cursor.execute(self.SQL_MISSION_HANDLING['start_player'],
-                                               (mission_id, player.ucid, self.get_unit_type(player),
-                                                player.side.value))
-                        # close dead entries in the database (if existent)
-                        cursor.execute(self.SQL_MISSION_HANDLING['all_players'], (mission_id, ))
-                        for row in cursor.fetchall():
-                            if row[0] not in ucids:
-                                cursor.execute(self.SQL_MISSION_HANDLING['stop_player'], (mission_id, row[0]))
-                    conn.commit()
-            except (Exception, psycopg2.DatabaseError) as error:
-                conn.rollback()
-                self.log.exception(error)
-            finally:
-                self.pool.putconn(conn)
+            server.mission_id = await self.bot.loop.run_in_executor(self.bot.executor, self._reconcile, server, data)
 
     async def onMissionLoadEnd(self, data):
         server: Server = self.bot.servers[data['server_name']]
@@ -4,7 +4,6 @@ import numpy as np
 import string
 import psycopg2
 import psycopg2.extras
-from contextlib import closing
 from core import report, utils
 from matplotlib.axes import Axes
 from matplotlib.patches import ConnectionPatch
@@ -29,31 +28,27 @@ class PlaytimesPerPlane(report.GraphElement):
         sql += ' AND ' + flt.filter(self.env.bot, period, server_name)
         sql += ' GROUP BY s.slot ORDER BY 2'
 
-        conn = self.pool.getconn()
         try:
-            with closing(conn.cursor(cursor_factory=psycopg2.extras.DictCursor)) as cursor:
-                cursor.execute(sql, (member.id if isinstance(member, discord.Member) else member,))
-                labels = []
-                values = []
-                for row in cursor.fetchall():
-                    labels.insert(0, row['slot'])
-                    values.insert(0, row['playtime'] / 3600.0)
-                self.axes.bar(labels, values, width=0.5, color='mediumaquamarine')
-                for label in self.axes.get_xticklabels():
-                    label.set_rotation(30)
-                    label.set_ha('right')
-                self.axes.set_title('Airframe Hours per Aircraft', color='white', fontsize=25)
-                self.axes.set_yticks([])
-                for i in range(0, len(values)):
-                    self.axes.annotate('{:.1f} h'.format(values[i]), xy=(
-                        labels[i], values[i]), ha='center', va='bottom', weight='bold')
-                if cursor.rowcount == 0:
-                    self.axes.set_xticks([])
-                    self.axes.text(0, 0, 'No data available.', ha='center', va='center', rotation=45, size=15)
+            rows = self.query(sql, (member.id if isinstance(member, discord.Member) else member,))
+            labels = []
+            values = []
+            for row in rows:
+                labels.insert(0, row['slot'])
+                values.insert(0, row['playtime'] / 3600.0)
+            self.axes.bar(labels, values, width=0.5, color='mediumaquamarine')
+            for label in self.axes.get_xticklabels():
+                label.set_rotation(30)
+                label.set_ha('right')
+            self.axes.set_title('Airframe Hours per Aircraft', color='white', fontsize=25)
+            self.axes.set_yticks([])
+            for i in range(0, len(values)):
+                self.axes.annotate('{:.1f} h'.format(values[i]), xy=(
+                    labels[i], values[i]), ha='center', va='bottom', weight='bold')
+            if len(rows) == 0:
+                self.axes.set_xticks([])
+                self.axes.text(0, 0, 'No data available.', ha='center', va='center', rotation=45, size=15)
         except (Exception, psycopg2.DatabaseError) as error:
             self.log.exception(error)
-        finally:
-            self.pool.putconn(conn)
 
 
 class PlaytimesPerServer(report.GraphElement):
@@ -72,31 +67,27 @@ class PlaytimesPerServer(report.GraphElement):
         sql += ' AND ' + flt.filter(self.env.bot, period, server_name)
         sql += ' GROUP BY 1'
 
-        conn = self.pool.getconn()
         try:
-            with closing(conn.cursor(cursor_factory=psycopg2.extras.DictCursor)) as cursor:
-                cursor.execute(sql, (member.id if isinstance(member, discord.Member) else member,))
-                if cursor.rowcount > 0:
-                    def func(pct, allvals):
-                        absolute = int(round(pct / 100. * np.sum(allvals)))
-                        return utils.convert_time(absolute)
-
-                    labels = []
-                    values = []
-                    for row in cursor.fetchall():
-                        labels.insert(0, row['server_name'])
-                        values.insert(0, row['playtime'])
-                    patches, texts, pcts = self.axes.pie(values, labels=labels, autopct=lambda pct: func(pct, values),
-                                                    wedgeprops={'linewidth': 3.0, 'edgecolor': 'black'}, normalize=True)
-                    plt.setp(pcts, color='black', fontweight='bold')
-                    self.axes.set_title('Server Time', color='white', fontsize=25)
-                    self.axes.axis('equal')
-                else:
-                    self.axes.set_visible(False)
+            rows = self.query(sql, (member.id if isinstance(member, discord.Member) else member,))
+            if len(rows) > 0:
+                def func(pct, allvals):
+                    absolute = int(round(pct / 100. * np.sum(allvals)))
+                    return utils.convert_time(absolute)
+
+                labels = []
+                values = []
+                for row in rows:
+                    labels.insert(0, row['server_name'])
+                    values.insert(0, row['playtime'])
+                patches, texts, pcts = self.axes.pie(values, labels=labels, autopct=lambda pct: func(pct, values),
+                                                wedgeprops={'linewidth': 3.0, 'edgecolor': 'black'}, normalize=True)
+                plt.setp(pcts, color='black', fontweight='bold')
+                self.axes.set_title('Server Time', color='white', fontsize=25)
+                self.axes.axis('equal')
+            else:
+                self.axes.set_visible(False)
         except (Exception, psycopg2.DatabaseError) as error:
             self.log.exception(error)
-        finally:
-            self.pool.putconn(conn)
 
 
 class PlaytimesPerMap(report.GraphElement):
@@ -114,31 +105,27 @@ class PlaytimesPerMap(report.GraphElement):
         sql += ' AND ' + flt.filter(self.env.bot, period, server_name)
         sql += ' GROUP BY m.mission_theatre'
 
-        conn = self.pool.getconn()
         try:
-            with closing(conn.cursor(cursor_factory=psycopg2.extras.DictCursor)) as cursor:
-                cursor.execute(sql, (member.id if isinstance(member, discord.Member) else member,))
-                if cursor.rowcount > 0:
-                    def func(pct, allvals):
-                        absolute = int(round(pct / 100. * np.sum(allvals)))
-                        return utils.convert_time(absolute)
-
-                    labels = []
-                    values = []
-                    for row in cursor.fetchall():
-                        labels.insert(0, row['mission_theatre'])
-                        values.insert(0, row['playtime'])
-                    patches, texts, pcts = self.axes.pie(values, labels=labels, autopct=lambda pct: func(pct, values),
-                                                    wedgeprops={'linewidth': 3.0, 'edgecolor': 'black'}, normalize=True)
-                    plt.setp(pcts, color='black', fontweight='bold')
-                    self.axes.set_title('Time per Map', color='white', fontsize=25)
-                    self.axes.axis('equal')
-                else:
-                    self.axes.set_visible(False)
+            rows = self.query(sql, (member.id if isinstance(member, discord.Member) else member,))
+            if len(rows) > 0:
+                def func(pct, allvals):
+                    absolute = int(round(pct / 100. * np.sum(allvals)))
+                    return utils.convert_time(absolute)
+
+                labels = []
+                values = []
+                for row in rows:
+                    labels.insert(0, row['mission_theatre'])
+                    values.insert(0, row['playtime'])
+                patches, texts, pcts = self.axes.pie(values, labels=labels, autopct=lambda pct: func(pct, values),
+                                                wedgeprops={'linewidth': 3.0, 'edgecolor': 'black'}, normalize=True)
+                plt.setp(pcts, color='black', fontweight='bold')
+                self.axes.set_title('Time per Map', color='white', fontsize=25)
+                self.axes.axis('equal')
+            else:
+                self.axes.set_visible(False)
         except (Exception, psycopg2.DatabaseError) as error:
             self.log.exception(error)
-        finally:
-            self.pool.putconn(conn)
 
 
 class RecentActivities(report.GraphElement):
@@ -157,28 +144,24 @@ class RecentActivities(report.GraphElement):
         sql += ' AND ' + flt.filter(self.env.bot, period, server_name)
         sql += ' GROUP BY day'
 
-        conn = self.pool.getconn()
         try:
-            with closing(conn.cursor(cursor_factory=psycopg2.extras.DictCursor)) as cursor:
-                labels = []
-                values = []
-                cursor.execute(sql, (member.id if isinstance(member, discord.Member) else member,))
-                self.axes.set_title('Recent Activities', color='white', fontsize=25)
-                self.axes.set_yticks([])
-                for row in cursor.fetchall():
-                    labels.append(row['day'])
-                    values.append(row['playtime'] / 3600.0)
-                self.axes.bar(labels, values, width=0.5, color='mediumaquamarine')
-                for i in range(0, len(values)):
-                    self.axes.annotate('{:.1f} h'.format(values[i]), xy=(
-                        labels[i], values[i]), ha='center', va='bottom', weight='bold')
-                if cursor.rowcount == 0:
-                    self.axes.set_xticks([])
-                    self.axes.text(0, 0, 'No data available.', ha='center', va='center', rotation=45, size=15)
+            labels = []
+            values = []
+            rows = self.query(sql, (member.id if isinstance(member, discord.Member) else member,))
+            self.axes.set_title('Recent Activities', color='white', fontsize=25)
+            self.axes.set_yticks([])
+            for row in rows:
+                labels.append(row['day'])
+                values.append(row['playtime'] / 3600.0)
+            self.axes.bar(labels, values, width=0.5, color='mediumaquamarine')
+            for i in range(0, len(values)):
+                self.axes.annotate('{:.1f} h'.format(values[i]), xy=(
+                    labels[i], values[i]), ha='center', va='bottom', weight='bold')
+            if len(rows) == 0:
+                self.axes.set_xticks([])
+                self.axes.text(0, 0, 'No data available.', ha='center', va='center', rotation=45, size=15)
         except (Exception, psycopg2.DatabaseError) as error:
             self.log.exception(error)
-        finally:
-            self.pool.putconn(conn)
 
 
 class FlightPerformance(report.GraphElement):
@@ -196,36 +179,32 @@ class FlightPerformance(report.GraphElement):
             sql += "AND m.server_name = '{}'".format(server_name.replace('\'', '\'\''))
         sql += ' AND ' + flt.filter(self.env.bot, period, server_name)
 
-        conn = self.pool.getconn()
         try:
-            with closing(conn.cursor(cursor_factory=psycopg2.extras.DictCursor)) as cursor:
-                cursor.execute(sql, (member.id if isinstance(member, discord.Member) else member,))
-                if cursor.rowcount > 0:
-                    def func(pct, allvals):
-                        absolute = int(round(pct / 100. * np.sum(allvals)))
-                        return f'{absolute}'
-
-                    labels = []
-                    values = []
-                    for name, value in dict(cursor.fetchone()).items():
-                        if value and value > 0:
-                            labels.append(name)
-                            values.append(value)
-                    if len(values) > 0:
-                        patches, texts, pcts = \
-                            self.axes.pie(values, labels=labels, autopct=lambda pct: func(pct, values),
-                                          wedgeprops={'linewidth': 3.0, 'edgecolor': 'black'}, normalize=True)
-                        plt.setp(pcts, color='black', fontweight='bold')
-                        self.axes.set_title('Flying', color='white', fontsize=25)
-                        self.axes.axis('equal')
-                    else:
-                        self.axes.set_visible(False)
+            rows = self.query(sql, (member.id if isinstance(member, discord.Member) else member,))
+            if len(rows) > 0:
+                def func(pct, allvals):
+                    absolute = int(round(pct / 100. * np.sum(allvals)))
+                    return f'{absolute}'
+
+                labels = []
+                values = []
+                for name, value in dict(rows[0]).items():
+                    if value and value > 0:
+                        labels.append(name)
+                        values.append(value)
+                if len(values) > 0:
+                    patches, texts, pcts = \
+                        self.axes.pie(values, labels=labels, autopct=lambda pct: func(pct, values),
+                                      wedgeprops={'linewidth': 3.0, 'edgecolor': 'black'}, normalize=True)
+                    plt.setp(pcts, color='black', fontweight='bold')
+                    self.axes.set_title('Flying', color='white', fontsize=25)
+                    self.axes.axis('equal')
                 else:
                     self.axes.set_visible(False)
+            else:
+                self.axes.set_visible(False)
         except (Exception, psycopg2.DatabaseError) as error:
             self.log.exception(error)
-        finally:
-            self.pool.putconn(conn)
 
 
 class KDRatio(report.MultiGraphElement):
@@ -247,51 +226,47 @@ class KDRatio(report.MultiGraphElement):
         sql += ' AND ' + flt.filter(self.env.bot, period, server_name)
 
         retval = []
-        conn = self.pool.getconn()
         try:
-            with closing(conn.cursor(cursor_factory=psycopg2.extras.DictCursor)) as cursor:
-                cursor.execute(sql, (member.id if isinstance(member, discord.Member) else member,))
-                if cursor.rowcount > 0:
-                    def func(pct, allvals):
-                        absolute = int(round(pct / 100. * np.sum(allvals)))
-                        return f'{absolute}'
-
-                    labels = []
-                    values = []
-                    explode = []
-                    result = cursor.fetchone()
-                    for name, value in dict(result).items():
-                        if value and value > 0:
-                            labels.append(name)
-                            values.append(value)
-                            retval.append(name)
-                            explode.append(0.02)
-                    if len(values) > 0:
-                        angle1 = -180 * (result[0] + result[1]) / np.sum(values)
-                        angle2 = 180 - 180 * (result[2] + result[3]) / np.sum(values)
-                        if angle1 == 0:
-                            angle = angle2
-                        elif angle2 == 180:
-                            angle = angle1
-                        else:
-                            angle = angle1 + (angle2 + angle1) / 2
-
-                        patches, texts, pcts = ax.pie(values, labels=labels, startangle=angle, explode=explode,
-                                                      autopct=lambda pct: func(pct, values),
-                                                      colors=['lightgreen', 'darkorange', 'lightblue'],
-                                                      wedgeprops={'linewidth': 3.0, 'edgecolor': 'black'},
-                                                      normalize=True)
-                        plt.setp(pcts, color='black', fontweight='bold')
-                        ax.set_title('Kill/Death-Ratio', color='white', fontsize=25)
-                        ax.axis('equal')
+            rows = self.query(sql, (member.id if isinstance(member, discord.Member) else member,))
+            if len(rows) > 0:
+                def func(pct, allvals):
+                    absolute = int(round(pct / 100. * np.sum(allvals)))
+                    return f'{absolute}'
+
+                labels = []
+                values = []
+                explode = []
+                result = rows[0]
+                for name, value in dict(result).items():
+                    if value and value > 0:
+                        labels.append(name)
+                        values.append(value)
+                        retval.append(name)
+                        explode.append(0.02)
+                if len(values) > 0:
+                    angle1 = -180 * (result[0] + result[1]) / np.sum(values)
+                    angle2 = 180 - 180 * (result[2] + result[3]) / np.sum(values)
+                    if angle1 == 0:
+                        angle = angle2
+                    elif angle2 == 180:
+                        angle = angle1
                     else:
-                        ax.set_visible(False)
+                        angle = angle1 + (angle2 + angle1) / 2
+
+                    patches, texts, pcts = ax.pie(values, labels=labels, startangle=angle, explode=explode,
+                                                  autopct=lambda pct: func(pct, values),
+                                                  colors=['lightgreen', 'darkorange', 'lightblue'],
+                                                  wedgeprops={'linewidth': 3.0, 'edgecolor': 'black'},
+                                                  normalize=True)
+                    plt.setp(pcts, color='black', fontweight='bold')
+                    ax.set_title('Kill/Death-Ratio', color='white', fontsize=25)
+                    ax.axis('equal')
                 else:
                     ax.set_visible(False)
+            else:
+                ax.set_visible(False)
         except (Exception, psycopg2.DatabaseError) as error:
             self.log.exception(error)
-        finally:
-            self.pool.putconn(conn)
         return retval
 
     def draw_kill_types(self, ax: Axes, member: Union[discord.Member, str], server_name: str, period: str,
@@ -309,42 +284,38 @@ class KDRatio(report.MultiGraphElement):
         sql += ' AND ' + flt.filter(self.env.bot, period, server_name)
 
         retval = False
-        conn = self.pool.getconn()
         try:
-            with closing(conn.cursor(cursor_factory=psycopg2.extras.DictCursor)) as cursor:
-                cursor.execute(sql, (member.id if isinstance(member, discord.Member) else member,))
-                # if no data was found, return False as no chart was drawn
-                if cursor.rowcount > 0:
-                    labels = []
-                    values = []
-                    for item in dict(cursor.fetchone()).items():
-                        labels.append(string.capwords(item[0], sep='_').replace('_', ' '))
-                        values.append(item[1])
-                    xpos = 0
-                    bottom = 0
-                    width = 0.2
-                    # there is something to be drawn
-                    sum = np.sum(values)
-                    if sum > 0:
-                        for i in range(len(values)):
-                            height = values[i] / sum
-                            ax.bar(xpos, height, width, bottom=bottom)
-                            ypos = bottom + ax.patches[i].get_height() / 2
-                            bottom += height
-                            if int(values[i]) > 0:
-                                ax.text(xpos, ypos, f"{values[i]}", ha='center', color='black')
-
-                        ax.set_title('Killed by\nPlayer', color='white', fontsize=15)
-                        ax.axis('off')
-                        ax.set_xlim(- 2.5 * width, 2.5 * width)
-                        ax.legend(labels, fontsize=15, loc=3, ncol=6, mode='expand',
-                                    bbox_to_anchor=(-2.4, -0.2, 2.8, 0.4), columnspacing=1, frameon=False)
-                        # Chart was drawn, return True
-                        retval = True
+            rows = self.query(sql, (member.id if isinstance(member, discord.Member) else member,))
+            # if no data was found, return False as no chart was drawn
+            if len(rows) > 0:
+                labels = []
+                values = []
+                for item in dict(rows[0]).items():
+                    labels.append(string.capwords(item[0], sep='_').replace('_', ' '))
+                    values.append(item[1])
+                xpos = 0
+                bottom = 0
+                width = 0.2
+                # there is something to be drawn
+                sum = np.sum(values)
+                if sum > 0:
+                    for i in range(len(values)):
+                        height = values[i] / sum
+                        ax.bar(xpos, height, width, bottom=bottom)
+                        ypos = bottom + ax.patches[i].get_height() / 2
+                        bottom += height
+                        if int(values[i]) > 0:
+                            ax.text(xpos, ypos, f"{values[i]}", ha='center', color='black')
+
+                    ax.set_title('Killed by\nPlayer', color='white', fontsize=15)
+                    ax.axis('off')
+                    ax.set_xlim(- 2.5 * width, 2.5 * width)
+                    ax.legend(labels, fontsize=15, loc=3, ncol=6, mode='expand',
+                                bbox_to_anchor=(-2.4, -0.2, 2.8, 0.4), columnspacing=1, frameon=False)
+                    # Chart was drawn, return True
+                    retval = True
         except (Exception, psycopg2.DatabaseError) as error:
             self.log.exception(error)
-        finally:
-            self.pool.putconn(conn)
         return retval
 
     def draw_death_types(self, ax: Axes, legend: bool, member: Union[discord.Member, str], server_name: str,
@@ -361,44 +332,40 @@ class KDRatio(report.MultiGraphElement):
         sql += ' AND ' + flt.filter(self.env.bot, period, server_name)
 
         retval = False
-        conn = self.pool.getconn()
         try:
-            with closing(conn.cursor(cursor_factory=psycopg2.extras.DictCursor)) as cursor:
-                cursor.execute(sql, (member.id if isinstance(member, discord.Member) else member,))
-                result = cursor.fetchone()
-                # if no data was found, return False as no chart was drawn
-                if cursor.rowcount > 0:
-                    labels = []
-                    values = []
-                    for item in dict(result).items():
-                        labels.append(string.capwords(item[0], sep='_').replace('_', ' '))
-                        values.append(item[1])
-                    xpos = 0
-                    bottom = 0
-                    width = 0.2
-                    # there is something to be drawn
-                    sum = np.sum(values)
-                    if sum > 0:
-                        for i in range(len(values)):
-                            height = values[i] / sum
-                            ax.bar(xpos, height, width, bottom=bottom)
-                            ypos = bottom + ax.patches[i].get_height() / 2
-                            bottom += height
-                            if int(values[i]) > 0:
-                                ax.text(xpos, ypos, f"{values[i]}", ha='center', color='black')
-
-                        ax.set_title('Player\nkilled by', color='white', fontsize=15)
-                        ax.axis('off')
-                        ax.set_xlim(- 2.5 * width, 2.5 * width)
-                        if legend is True:
-                            ax.legend(labels, fontsize=15, loc=3, ncol=6, mode='expand',
-                                      bbox_to_anchor=(0.6, -0.2, 2.8, 0.4), columnspacing=1, frameon=False)
-                        # Chart was drawn, return True
-                        retval = True
+            rows = self.query(sql, (member.id if isinstance(member, discord.Member) else member,))
+            result = rows[0]
+            # if no data was found, return False as no chart was drawn
+            if len(rows) > 0:
+                labels = []
+                values = []
+                for item in dict(result).items():
+                    labels.append(string.capwords(item[0], sep='_').replace('_', ' '))
+                    values.append(item[1])
+                xpos = 0
+                bottom = 0
+                width = 0.2
+                # there is something to be drawn
+                sum = np.sum(values)
+                if sum > 0:
+                    for i in range(len(values)):
+                        height = values[i] / sum
+                        ax.bar(xpos, height, width, bottom=bottom)
+                        ypos = bottom + ax.patches[i].get_height() / 2
+                        bottom += height
+                        if int(values[i]) > 0:
+                            ax.text(xpos, ypos, f"{values[i]}", ha='center', color='black')
+
+                    ax.set_title('Player\nkilled by', color='white', fontsize=15)
+                    ax.axis('off')
+                    ax.set_xlim(- 2.5 * width, 2.5 * width)
+                    if legend is True:
+                        ax.legend(labels, fontsize=15, loc=3, ncol=6, mode='expand',
+                                  bbox_to_anchor=(0.6, -0.2, 2.8, 0.4), columnspacing=1, frameon=False)
+                    # Chart was drawn, return True
+                    retval = True
         except (Exception, psycopg2.DatabaseError) as error:
             self.log.exception(error)
-        finally:
-            self.pool.putconn(conn)
         return retval
 
     def render(self, member: Union[discord.Member, str], server_name: str, period: str, flt: StatisticsFilter):
@@ -12,8 +12,10 @@ import shutil
 import string
 import subprocess
 import sys
+import time
 import zipfile
 from core import utils, Server, DCSServerBot, Status
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import closing, suppress
 from discord import SelectOption
 from discord.ext import commands
@@ -61,13 +63,22 @@ class Main:
             self.log.warning('- Restart needed => exiting.')
             exit(-1)
         self.db_version = None
-        self.install_plugins()
-        self.pool = self.init_db()
-        utils.desanitize(self)
-        self.install_hooks()
+        self.timings: dict[str, float] = dict()
+        self.timed('plugins', self.install_plugins)
+        self.pool = self.timed('database', self.init_db)
+        self.timed('desanitize', utils.desanitize, self)
+        self.timed('hooks', self.install_hooks)
         self.install_fonts()
         self.bot: DCSServerBot = self.init_bot()
         self.add_commands()
+        self.log.debug('- Startup timings: ' + ', '.join([f'{k}: {v:.2f}s' for k, v in self.timings.items()]))
+
+    def timed(self, phase: str, func, *args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.timings[phase] = time.perf_counter() - start
 
     def init_logger(self):
         # Initialize the logger
@@ -162,44 +173,33 @@ class Main:
         psycopg2.extensions.register_type(dec2float)
         return db_pool
 
+    def install_hook(self, installation: str):
+        try:
+            deployment = utils.install_hooks(installation)
+        except KeyError as k:
+            self.log.error(
+                f'! Your dcsserverbot.ini contains errors. You must set a value for {k}. See README for help.')
+            raise k
+        if deployment.failed:
+            self.log.warning(f"  - Hooks in {installation} could not be updated: {', '.join(deployment.failed)}")
+        if deployment.changed:
+            self.log.debug(f'  - Hooks installed into {installation} ({len(deployment.copied)} updated, '
+                           f'{len(deployment.removed)} removed).')
+        else:
+            self.log.debug(f'  - Hooks in {installation} are up-to-date.')
+
     def install_hooks(self):
         self.log.info('- Configure DCS installations ...')
+        installations = []
         for server_name, installation in utils.findDCSInstallations():
             if installation not in self.config:
                 continue
             self.log.info(f'  => {installation}')
-            dcs_path = os.path.expandvars(self.config[installation]['DCS_HOME'] + '\\Scripts')
-            if not os.path.exists(dcs_path):
-                os.mkdir(dcs_path)
-            ignore = None
-            if os.path.exists(dcs_path + r'\net\DCSServerBot'):
-                self.log.debug('  - Updating Hooks ...')
-                shutil.rmtree(dcs_path + r'\net\DCSServerBot')
-                ignore = shutil.ignore_patterns('DCSServerBotConfig.lua.tmpl')
-            else:
-                self.log.debug('  - Installing Hooks ...')
-            shutil.copytree('./Scripts', dcs_path, dirs_exist_ok=True, ignore=ignore)
-            try:
-                with open(r'Scripts/net/DCSServerBot/DCSServerBotConfig.lua.tmpl', 'r') as template:
-                    with open(dcs_path + r'\net\DCSServerBot\DCSServerBotConfig.lua', 'w') as outfile:
-                        for line in template.readlines():
-                            s = line.find('{')
-                            e = line.find('}')
-                            if s != -1 and e != -1 and (e - s) > 1:
-                                param = line[s + 1:e].split('.')
-                                if len(param) == 2:
-                                    if param[0] == 'BOT' and param[1] == 'HOST' and self.config[param[0]][param[1]] == '0.0.0.0':
-                                        line = line.replace('{' + '.'.join(param) + '}', '127.0.0.1')
-                                    else:
-                                        line = line.replace('{' + '.'.join(param) + '}', self.config[param[0]][param[1]])
-                                elif len(param) == 1:
-                                    line = line.replace('{' + '.'.join(param) + '}', self.config[installation][param[0]])
-                            outfile.write(line)
-            except KeyError as k:
-                self.log.error(
-                    f'! Your dcsserverbot.ini contains errors. You must set a value for {k}. See README for help.')
-                raise k
-            self.log.debug('  - Hooks installed into {}.'.format(installation))
+            installations.append(installation)
+        # installations are independent of each other, so they can be updated in parallel
+        with ThreadPoolExecutor(thread_name_prefix='Install') as executor:
+            for future in [executor.submit(self.install_hook, x) for x in installations]:
+                future.result()
 
     def install_fonts(self):
         if 'CJK_FONT' in self.config['REPORTS']: